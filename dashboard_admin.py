@@ -43,9 +43,11 @@ st.markdown("""
 monitor = SystemMonitor()
 
 def load_data():
-    df_preds = monitor.get_recent_predictions(limit=500)
+    # KPIs come from precomputed 24h aggregates; raw rows only for the table
+    summary = monitor.get_aggregates().snapshot(window_minutes=24 * 60, series=False)
+    df_preds = monitor.get_recent_predictions(limit=10)
     df_metrics = monitor.get_system_metrics(limit=100)
-    return df_preds, df_metrics
+    return summary, df_preds, df_metrics
 
 # Sidebar
 st.sidebar.title("🐾 VetNet Admin")
@@ -64,15 +66,15 @@ placeholder = st.empty()
 
 while True:
     with placeholder.container():
-        df_preds, df_metrics = load_data()
+        summary, df_preds, df_metrics = load_data()
         
         # --- Top Metrics Row ---
         col1, col2, col3, col4 = st.columns(4)
         
-        total_preds = len(df_preds) if not df_preds.empty else 0
-        avg_latency = df_preds['latency_ms'].mean() if not df_preds.empty else 0
-        error_rate = (len(df_preds[df_preds['status'] == 'error']) / total_preds * 100) if total_preds > 0 else 0
-        avg_conf = df_preds['disease_confidence'].mean() * 100 if not df_preds.empty else 0
+        total_preds = summary['count']
+        avg_latency = summary['latency_ms']['mean'] or 0
+        error_rate = summary['error_rate'] * 100
+        avg_conf = (summary['mean_confidence'] or 0) * 100
         
         with col1:
             st.metric("Total Predictions (24h)", f"{total_preds}", delta="Live")
@@ -88,9 +90,9 @@ while True:
         
         with col_c1:
             st.subheader("Category Distribution")
-            if not df_preds.empty and 'category' in df_preds.columns:
-                cat_counts = df_preds['category'].value_counts()
-                fig_cat = px.pie(values=cat_counts.values, names=cat_counts.index, hole=0.4)
+            if summary['categories']:
+                cat_counts = summary['categories']
+                fig_cat = px.pie(values=list(cat_counts.values()), names=list(cat_counts), hole=0.4)
                 fig_cat.update_layout(margin=dict(t=0, b=0, l=0, r=0))
                 st.plotly_chart(fig_cat, key=f"cat_dist_chart_{time.time()}", **{'use_container_width': True} if st.__version__ < "1.40.0" else {'width': "stretch"})
             else:
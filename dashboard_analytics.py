@@ -12,9 +12,12 @@ import time
 
 # st.set_page_config(layout="wide", page_title="VetNet Analytics")
 
-# Load Logs
+# Load Logs (columnar store: only the partitions of the selected window are read)
 monitor = SystemMonitor()
-logs_df = monitor.get_recent_predictions(limit=1000)
+with st.sidebar:
+    st.header("Filters")
+    window_days = st.selectbox("Time Window (days)", [1, 7, 30, 90], index=1)
+logs_df = monitor.query_predictions(days=window_days)
 
 if logs_df.empty:
     st.warning("No data available for analytics yet. Waiting for predictions...")
@@ -32,14 +35,18 @@ st.markdown("Geospatial trends, outbreak prediction, and deep learning model ins
 
 # --- Filters ---
 with st.sidebar:
-    st.header("Filters")
-    selected_species = st.multiselect("Select Species", logs_df['animal'].unique(), default=logs_df['animal'].unique()[:5])
-    selected_category = st.multiselect("Select Disease Category", logs_df['category'].unique())
+    species_options = list(logs_df['animal'].dropna().unique())
+    selected_species = st.multiselect("Select Species", species_options, default=species_options[:5])
+    selected_category = st.multiselect("Select Disease Category", list(logs_df['category'].dropna().unique()))
 
 # Filter Data
 filtered_df = logs_df[logs_df['animal'].isin(selected_species)]
 if selected_category:
     filtered_df = filtered_df[filtered_df['category'].isin(selected_category)]
+# Categorical columns keep every category; only chart the ones still present
+filtered_df = filtered_df.copy()
+for col in filtered_df.select_dtypes('category').columns:
+    filtered_df[col] = filtered_df[col].cat.remove_unused_categories()
 
 # --- Row 1: Geospatial & Trends ---
 col1, col2 = st.columns([2, 1])
@@ -102,6 +109,16 @@ with c3:
     fig_lat = px.box(filtered_df, y="latency_ms", x="animal", title="Inference Latency by Species")
     st.plotly_chart(fig_lat, key="latency_box_chart", **{'use_container_width': True} if st.__version__ < "1.40.0" else {'width': "stretch"})
 
+    # Where the time goes: per-stage quantiles from the in-process sketches
+    stage_species = selected_species[0] if len(selected_species) == 1 else None
+    stages = monitor.get_stage_latency().snapshot(window_days * 24 * 60, species=stage_species)["stages"]
+    if stages:
+        stage_df = pd.DataFrame([{"stage": stage, "quantile": q, "ms": summary[q]}
+                                 for stage, summary in stages.items() for q in ("p50", "p95", "p99")])
+        fig_stage = px.bar(stage_df, x="stage", y="ms", color="quantile", barmode="group",
+                           title=f"Latency by Stage ({stage_species or 'all species'})")
+        st.plotly_chart(fig_stage, key="stage_latency_chart", **{'use_container_width': True} if st.__version__ < "1.40.0" else {'width': "stretch"})
+
 # --- Row 3: Raw Data Explorer ---
 with st.expander("🔎 Drill Down: Case Explorer"):
     st.dataframe(filtered_df)
@@ -10,11 +10,11 @@ from src.monitoring import SystemMonitor
 
 # st.set_page_config(layout="wide", page_title="VetNet Executive View")
 
-# Load Logs
+# Load precomputed all-time aggregates (every prediction, all API workers)
 monitor = SystemMonitor()
-logs_df = monitor.get_recent_predictions(limit=1000)
+summary = monitor.get_aggregates().snapshot()
 
-if logs_df.empty:
+if summary['count'] == 0:
     st.warning("Data pending. Executive overview will populate shortly.")
     st.stop()
     
@@ -24,10 +24,10 @@ st.markdown("High-level overview of VetNet adoption and performance.")
 
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
-total_predictions = len(logs_df)
+total_predictions = summary['count']
 # Simulated "Adoption" - unique animals ~= unique patients
-unique_patients = logs_df.groupby(['animal', 'category']).ngroups
-avg_diagnosis_time = logs_df['latency_ms'].mean() / 1000 # seconds
+unique_patients = sum(len(row) for row in summary['species_category'].values())
+avg_diagnosis_time = (summary['latency_ms']['mean'] or 0) / 1000 # seconds
 # Assuming saved time per diagnosis vs manual
 time_saved_hours = (total_predictions * 15 * 60) / 3600 # 15 mins saved per case
 
@@ -54,8 +54,9 @@ with t1:
 with t2:
     st.subheader("Diagnosis Category Share")
     # Pie chart of Categories
-    if not logs_df.empty:
-        fig_pie = go.Figure(data=[go.Pie(labels=logs_df['category'].value_counts().index, values=logs_df['category'].value_counts().values, hole=.3)])
+    if summary['categories']:
+        category_counts = summary['categories']
+        fig_pie = go.Figure(data=[go.Pie(labels=list(category_counts), values=list(category_counts.values()), hole=.3)])
         st.plotly_chart(fig_pie, key="cat_share_pie_chart", **{'use_container_width': True} if st.__version__ < "1.40.0" else {'width': "stretch"})
         
 # --- ROI Calculator ---
@@ -0,0 +1,67 @@
+"""
+Benchmark VetNet batch inference
+Compares records/sec of predict_disease_nn (one call per record) against
+predict_disease_nn_batch at several batch sizes.
+
+Usage:
+    python scripts/benchmark_batch_inference.py [--records 4096] [--sizes 1 32 256 4096]
+"""
+import sys
+import os
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import pandas as pd
+
+from src.inference_nn import predict_disease_nn, predict_disease_nn_batch, prediction_cache, wait_until_ready
+
+INPUT_COLS = ['Animal', 'Age', 'Gender', 'Breed', 'WBC', 'RBC', 'Hemoglobin', 'Platelets',
+              'Glucose', 'ALT', 'AST', 'Urea', 'Creatinine']
+
+def load_records(n, data_path='data/enhanced_training_data.csv'):
+    """Build `n` realistic request dicts from the training data."""
+    df = pd.read_csv(data_path)
+    symptom_cols = [c for c in df.columns if c.startswith('Symptom_')]
+    df = df[INPUT_COLS + symptom_cols].sample(n=n, replace=n > len(df), random_state=42)
+    df = df.astype(object).where(df.notna(), None)
+    records = df.to_dict(orient='records')
+    # Match the API: missing lab values use PredictionRequest defaults
+    return [{k: v for k, v in r.items() if v is not None} for r in records]
+
+def run_benchmark(n_records, batch_sizes):
+    records = load_records(n_records)
+
+    print("="*60)
+    print(f"VETNET BATCH INFERENCE BENCHMARK ({n_records} records)")
+    print("="*60)
+
+    # Baseline: one call per record
+    start = time.perf_counter()
+    for record in records:
+        predict_disease_nn(dict(record))
+    elapsed = time.perf_counter() - start
+    print(f"{'single-record loop':<22} {n_records / elapsed:>10.1f} records/sec")
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, n_records, batch_size):
+            predict_disease_nn_batch([dict(r) for r in records[i:i + batch_size]])
+        elapsed = time.perf_counter() - start
+        print(f"{'batch size ' + str(batch_size):<22} {n_records / elapsed:>10.1f} records/sec")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark VetNet batch inference")
+    parser.add_argument('--records', type=int, default=4096)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 32, 256, 4096])
+    parser.add_argument('--cache', action='store_true', help="Keep the prediction cache on (repeats become hits)")
+    args = parser.parse_args()
+
+    if not args.cache:
+        prediction_cache.max_size = 0
+
+    if not wait_until_ready():
+        print("❌ Models not loaded. Train models first.")
+        sys.exit(1)
+    run_benchmark(args.records, args.sizes)
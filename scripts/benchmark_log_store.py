@@ -0,0 +1,123 @@
+"""
+Benchmark the columnar prediction log store
+Writes synthetic predictions spread over several days through the real
+buffered log writer (with rotation and Parquet compaction) into a scratch
+directory, then loads the last `--days` days the way the analytics page
+does, once through the JSON readers and once through the Parquet store.
+
+Each load runs in a fresh process and reports wall time, the DataFrame's
+memory and how much the process's RSS grew.
+
+Usage:
+    python scripts/benchmark_log_store.py [--rows 1000000] [--days 7] [--dir /tmp/vetnet_log_bench]
+"""
+import sys
+import os
+# Add project root to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import argparse
+import multiprocessing
+import shutil
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import psutil
+
+from src import log_store, monitoring
+from src.log_archive import LogArchive
+from src.monitoring import BufferedLogWriter
+
+ANALYTICS_COLUMNS = ['timestamp', 'animal', 'category', 'disease', 'disease_confidence', 'latency_ms']
+SPECIES = ['Dog', 'Cat', 'Cattle', 'Horse', 'Sheep', 'Goat', 'Pig', 'Chicken', 'Rabbit', 'Duck']
+CATEGORIES = ['Viral', 'Bacterial', 'Parasitic', 'Metabolic', 'Healthy']
+
+def generate(log_path, rows, days):
+    """`rows` predictions, evenly spread over the last `days` days, ending now."""
+    rng = np.random.default_rng(42)
+    writer = BufferedLogWriter(log_path, max_queue=rows + 1, flush_lines=8192, flush_interval_s=0.05)
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / rows
+    animals = rng.integers(0, len(SPECIES), rows)
+    categories = rng.integers(0, len(CATEGORIES), rows)
+    confidences = rng.random(rows)
+    latencies = rng.gamma(2.0, 4.0, rows)
+    batch = []
+    for i in range(rows):
+        category = CATEGORIES[categories[i]]
+        batch.append({
+            "timestamp": (start + step * i).isoformat(),
+            "animal": SPECIES[animals[i]],
+            "category": category,
+            "disease": f"{category} disease {i % 7}",
+            "category_confidence": float(confidences[i]),
+            "disease_confidence": float(confidences[i]) * 0.9,
+            "latency_ms": float(latencies[i]),
+            "status": "success",
+            "error_msg": None
+        })
+        if len(batch) == 8192:
+            writer.write(batch)
+            batch = []
+    writer.write(batch)
+    writer.flush(timeout=600)
+    # Segments rotated before the writer could compact them (e.g. pyarrow installed later)
+    log_store.compact_archive(log_path)
+    return writer.stats()
+
+def _load(path, days, columnar, results):
+    monitoring.LOG_FILE = path
+    monitor = monitoring.SystemMonitor()
+    process = psutil.Process()
+    base_rss = process.memory_info().rss
+    start = time.perf_counter()
+    if columnar:
+        df = monitor.query_predictions(days=days, columns=ANALYTICS_COLUMNS)
+    else:
+        df = monitor.get_predictions_between(days=days)[ANALYTICS_COLUMNS]
+    elapsed = time.perf_counter() - start
+    results.put({"rows": len(df), "seconds": elapsed, "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+                 "rss_growth_mb": (process.memory_info().rss - base_rss) / 1e6})
+
+def measure(path, days, columnar):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    proc = ctx.Process(target=_load, args=(path, days, columnar, results))
+    proc.start()
+    result = results.get(timeout=1800)
+    proc.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar prediction log store")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--dir', default='/tmp/vetnet_log_bench')
+    args = parser.parse_args()
+
+    if not log_store.PYARROW_AVAILABLE:
+        print("❌ pyarrow is not installed; the columnar store is disabled")
+        return
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+    os.makedirs(args.dir)
+    path = os.path.join(args.dir, "prediction_log.jsonl")
+    print(f"📝 Writing {args.rows:,} predictions over {args.days} days...")
+    start = time.perf_counter()
+    stats = generate(path, args.rows, args.days)
+    segments = LogArchive(path).segments()
+    gz = sum(s["bytes"] for s in segments) / 1e6
+    parquet = sum(s.get("columnar_bytes", 0) for s in segments) / 1e6
+    raw = sum(s["raw_bytes"] for s in segments) / 1e6
+    print(f"   {time.perf_counter() - start:.1f}s, {stats['rotations']} rotations, {len(segments)} segments: "
+          f"{raw:.0f} MB JSONL -> {gz:.0f} MB gzip + {parquet:.0f} MB Parquet")
+
+    print(f"\n{'path':<10}{'rows':>10}{'load s':>10}{'frame MB':>10}{'RSS +MB':>10}")
+    for name, columnar in (("json", False), ("parquet", True)):
+        r = measure(path, args.days, columnar)
+        print(f"{name:<10}{r['rows']:>10,}{r['seconds']:>10.3f}{r['frame_mb']:>10.1f}{r['rss_growth_mb']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark the telemetry ring buffer
+Memory and append speed of TelemetryRingBuffer against the previous store
+(a list of pydantic TelemetryData per device, trimmed with pop(0)).
+
+Memory is the RSS growth of filling every device's history; the ring
+buffer's own column bytes are reported too. The list store needs ~64 KB
+per device (~6 GB for 100,000), so it is filled for --list-devices only
+and scaled up.
+
+Usage:
+    python scripts/benchmark_telemetry_buffer.py [--devices 100000] [--list-devices 10000] [--history 50]
+"""
+import sys
+import os
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import gc
+import time
+
+import psutil
+
+from src.iot_gateway import TelemetryData
+from src.telemetry_buffer import TelemetryRingBuffer
+
+def rss():
+    gc.collect()
+    return psutil.Process().memory_info().rss
+
+def fill_lists(devices, history):
+    store = {}
+    for d in range(devices):
+        device_id = f"TAG_{d:06d}"
+        store[device_id] = [TelemetryData(device_id=device_id, animal_id=f"Animal_{d:06d}", species="Cattle",
+                                          timestamp=1.7e9 + t, temperature=38.5 + t / 100, heart_rate=60.0 + t,
+                                          activity_level=50.0, battery_level=90.0)
+                            for t in range(history)]
+    return store
+
+def fill_ring(devices, history):
+    buffer = TelemetryRingBuffer(history_length=history)
+    for d in range(devices):
+        device_id = f"TAG_{d:06d}"
+        buffer.extend(device_id, f"Animal_{d:06d}", "Cattle", {
+            "timestamp": [1.7e9 + t for t in range(history)],
+            "temperature": [38.5 + t / 100 for t in range(history)],
+            "heart_rate": [60.0 + t for t in range(history)],
+            "activity_level": [50.0] * history,
+            "battery_level": [90.0] * history,
+        })
+    return buffer
+
+def measure_memory(label, fill, devices, history):
+    before = rss()
+    start = time.perf_counter()
+    store = fill(devices, history)
+    elapsed = time.perf_counter() - start
+    grown = rss() - before
+    print(f"{label:<22} {grown / 1e6:>10,.1f} MB RSS  {grown / devices:>8,.0f} B/device  (filled in {elapsed:.1f}s)")
+    return store, grown
+
+def measure_appends(appends, devices, history):
+    reading = dict(animal_id="Cow", species="Cattle", temperature=38.5, heart_rate=60.0,
+                   activity_level=50.0, battery_level=90.0)
+    lists = {f"TAG_{d:06d}": [] for d in range(devices)}
+    ids = list(lists)
+    start = time.perf_counter()
+    for i in range(appends):
+        device_id = ids[i % devices]
+        items = lists[device_id]
+        items.append(TelemetryData(device_id=device_id, timestamp=float(i), **reading))
+        if len(items) > history:
+            items.pop(0)
+    list_rate = appends / (time.perf_counter() - start)
+
+    buffer = TelemetryRingBuffer(history_length=history)
+    start = time.perf_counter()
+    for i in range(appends):
+        buffer.append(ids[i % devices], "Cow", "Cattle", float(i), 38.5, 60.0, 50.0, 90.0)
+    ring_rate = appends / (time.perf_counter() - start)
+    print(f"{'appends (list+pydantic)':<24} {list_rate:>12,.0f}/sec")
+    print(f"{'appends (ring buffer)':<24} {ring_rate:>12,.0f}/sec")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the telemetry ring buffer")
+    parser.add_argument('--devices', type=int, default=100000)
+    parser.add_argument('--list-devices', type=int, default=10000)
+    parser.add_argument('--history', type=int, default=50)
+    parser.add_argument('--appends', type=int, default=200000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"TELEMETRY BUFFER BENCHMARK ({args.devices:,} devices x {args.history} readings)")
+    print("=" * 60)
+    buffer, _ = measure_memory("ring buffer", fill_ring, args.devices, args.history)
+    print(f"{'  column arrays':<22} {buffer.nbytes() / 1e6:>10,.1f} MB ({buffer.stats()['rows_allocated']:,} rows allocated)")
+    del buffer
+    list_devices = min(args.list_devices, args.devices)
+    store, grown = measure_memory("list of TelemetryData", fill_lists, list_devices, args.history)
+    del store
+    print(f"{'  scaled to devices':<22} {grown * args.devices / list_devices / 1e6:>10,.1f} MB ({args.devices:,} devices)")
+    measure_appends(args.appends, 1000, args.history)
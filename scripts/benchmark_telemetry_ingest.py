@@ -0,0 +1,83 @@
+"""
+Benchmark IoT telemetry ingestion
+Compares readings/sec of POST /iot/telemetry (one request per reading)
+against POST /iot/telemetry/batch at several batch sizes.
+
+By default the API runs in-process (no network, so the numbers show the
+per-request framework, validation and analysis cost); pass --url to
+measure a running server instead.
+
+Usage:
+    python scripts/benchmark_telemetry_ingest.py [--readings 20000] [--devices 500] [--sizes 100 1000 5000] [--url http://localhost:8002]
+"""
+import sys
+import os
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+SPECIES = ['Cattle', 'Sheep', 'Goat', 'Pig', 'Horse', 'Chicken', 'Dog', 'Cat']
+
+def make_readings(n, devices, seed=42):
+    """`n` readings from `devices` tags, a few percent of them feverish or tachycardic."""
+    rng = np.random.default_rng(seed)
+    device_idx = rng.integers(0, devices, n)
+    temperature = np.round(rng.normal(38.8, 0.6, n), 1)
+    heart_rate = np.round(rng.normal(75, 15, n))
+    activity = np.round(rng.uniform(0, 100, n), 1)
+    start = time.time() - n
+    return [{
+        "device_id": f"BENCH_{d:05d}",
+        "animal_id": f"Animal_{d:05d}",
+        "species": SPECIES[d % len(SPECIES)],
+        "timestamp": start + i,
+        "temperature": float(temperature[i]),
+        "heart_rate": float(heart_rate[i]),
+        "activity_level": float(activity[i]),
+        "battery_level": 90.0
+    } for i, d in enumerate(device_idx)]
+
+def make_client(url):
+    if url:
+        import httpx
+        return httpx.Client(base_url=url, timeout=60)
+    from fastapi.testclient import TestClient
+    import simple_api
+    return TestClient(simple_api.app)
+
+def run_benchmark(client, readings, sizes):
+    print("=" * 60)
+    print(f"TELEMETRY INGESTION BENCHMARK ({len(readings)} readings)")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    for reading in readings:
+        response = client.post("/iot/telemetry", json=reading)
+        response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(f"{'single-reading POSTs':<24} {len(readings) / elapsed:>12,.0f} readings/sec")
+
+    for size in sizes:
+        bodies = [json.dumps(readings[i:i + size]) for i in range(0, len(readings), size)]
+        start = time.perf_counter()
+        for body in bodies:
+            response = client.post("/iot/telemetry/batch", content=body,
+                                   headers={"content-type": "application/json"})
+            response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        print(f"{'batch size ' + str(size):<24} {len(readings) / elapsed:>12,.0f} readings/sec")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark IoT telemetry ingestion")
+    parser.add_argument('--readings', type=int, default=20000)
+    parser.add_argument('--devices', type=int, default=500)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--url', help="benchmark a running API instead of an in-process one")
+    args = parser.parse_args()
+
+    run_benchmark(make_client(args.url), make_readings(args.readings, args.devices), args.sizes)
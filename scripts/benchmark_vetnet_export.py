@@ -0,0 +1,67 @@
+"""
+Benchmark eager vs frozen VetNet on CPU
+Times the eager model (separate Linear/BatchNorm/Dropout modules) against
+the folded TorchScript export from src/export_nn.py at batch 1 and batch 512.
+
+Usage:
+    python scripts/benchmark_vetnet_export.py [--iters 2000] [--batch-sizes 1 512] [--threads 1]
+"""
+import sys
+import os
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+import torch
+
+from src.export_nn import FROZEN_PATH, load_eager_vetnet, freeze_vetnet, max_logit_diff
+
+def time_model(model, x_num, x_cat, iters, warmup=50):
+    """Per-call latencies in milliseconds."""
+    latencies = np.empty(iters)
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(x_num, x_cat)
+        for i in range(iters):
+            start = time.perf_counter()
+            model(x_num, x_cat)
+            latencies[i] = (time.perf_counter() - start) * 1000
+    return latencies
+
+def run_benchmark(iters, batch_sizes):
+    eager = load_eager_vetnet()
+    if os.path.exists(FROZEN_PATH):
+        frozen = torch.jit.load(FROZEN_PATH, map_location='cpu')
+        source = FROZEN_PATH
+    else:
+        frozen = freeze_vetnet(eager)
+        source = "in-memory export"
+
+    print("="*60)
+    print(f"VETNET EAGER vs FROZEN (CPU, {torch.get_num_threads()} threads, {source})")
+    print("="*60)
+    print(f"max |logit diff|: {max_logit_diff(eager, frozen, eager.numeric_dim, eager.n_species):.2e}")
+    print(f"{'batch':>6} {'model':<8} {'p50 ms':>9} {'p99 ms':>9} {'rows/sec':>12}")
+
+    for batch_size in batch_sizes:
+        x_num = torch.randn(batch_size, eager.numeric_dim)
+        x_cat = torch.randint(0, eager.n_species, (batch_size,))
+        # Fewer iterations for large batches keeps the run short
+        n = max(50, iters // max(1, batch_size // 16))
+        for name, model in (("eager", eager), ("frozen", frozen)):
+            lat = time_model(model, x_num, x_cat, n)
+            p50, p99 = np.percentile(lat, [50, 99])
+            print(f"{batch_size:>6} {name:<8} {p50:>9.4f} {p99:>9.4f} {batch_size / (p50 / 1000):>12.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eager vs frozen VetNet latency")
+    parser.add_argument('--iters', type=int, default=2000, help="Timed calls at batch 1")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 512])
+    parser.add_argument('--threads', type=int, default=None, help="torch.set_num_threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    run_benchmark(args.iters, args.batch_sizes)
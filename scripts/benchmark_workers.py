@@ -0,0 +1,140 @@
+"""
+Benchmark the pre-fork multi-worker API
+Starts simple_api.py with VETNET_WORKERS = 1, 2, 4, 8, drives POST /predict
+from separate client processes, and reports throughput, latency and the
+memory of the whole process tree.
+
+Memory is reported as the sum of RSS (counts shared pages once per process,
+so it overstates the total) and the sum of PSS (shared pages split between
+the processes that map them - the real total). USS is what each worker
+holds privately.
+
+Usage:
+    python scripts/benchmark_workers.py [--workers 1 2 4 8] [--duration 15] [--clients-per-worker 4]
+"""
+import sys
+import os
+# Add project root to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import argparse
+import http.client
+import json
+import subprocess
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+import psutil
+
+INPUT_COLS = ['Animal', 'Age', 'Gender', 'Breed', 'WBC', 'RBC', 'Hemoglobin', 'Platelets',
+              'Glucose', 'ALT', 'AST', 'Urea', 'Creatinine']
+
+def load_records(n, data_path='data/enhanced_training_data.csv'):
+    """`n` request bodies from the training data (missing values left to the API defaults)."""
+    df = pd.read_csv(os.path.join(ROOT, data_path))
+    symptom_cols = [c for c in df.columns if c.startswith('Symptom_')]
+    df = df[INPUT_COLS + symptom_cols].sample(n=n, replace=n > len(df), random_state=42)
+    df = df.astype(object).where(df.notna(), None)
+    return [{k: v for k, v in r.items() if v is not None} for r in df.to_dict(orient='records')]
+
+def tree_memory(pid):
+    """(rss_mb, pss_mb, worker_uss_mb list) for a process and its children."""
+    parent = psutil.Process(pid)
+    procs = [parent] + parent.children(recursive=True)
+    rss = pss = 0
+    worker_uss = []
+    for p in procs:
+        info = p.memory_full_info()
+        rss += info.rss
+        pss += getattr(info, 'pss', info.uss)
+        if p.pid != pid or len(procs) == 1:
+            worker_uss.append(info.uss / 1e6)
+    return rss / 1e6, pss / 1e6, worker_uss
+
+def start_server(workers, port):
+    env = dict(os.environ, VETNET_WORKERS=str(workers), VETNET_API_PORT=str(port),
+               VETNET_CACHE_SIZE='0')  # every request must reach the models
+    proc = subprocess.Popen([sys.executable, 'simple_api.py'], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 180
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server with {workers} workers exited with {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/ready')
+            ready = conn.getresponse().status == 200
+            conn.close()
+            # The listening socket is up before every worker has finished starting
+            if ready and len(psutil.Process(proc.pid).children()) >= (workers if workers > 1 else 0):
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.5)
+    proc.kill()
+    raise RuntimeError(f"Server with {workers} workers did not become ready")
+
+def _client(args):
+    port, records, duration = args
+    bodies = [json.dumps(r) for r in records]
+    headers = {'Content-Type': 'application/json'}
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    end = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/predict', body=bodies[i % len(bodies)], headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except OSError:
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    return latencies, errors
+
+def run_benchmark(worker_counts, duration, clients_per_worker, port):
+    records = load_records(2000)
+    print("="*78)
+    print(f"PRE-FORK WORKER BENCHMARK ({os.cpu_count()} CPUs, {duration:.0f}s per run)")
+    print("="*78)
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} "
+          f"{'RSS sum MB':>11} {'PSS total MB':>13} {'USS/worker MB':>14}")
+
+    for workers in worker_counts:
+        proc = start_server(workers, port)
+        try:
+            n_clients = workers * clients_per_worker
+            chunks = [(port, records[i::n_clients], duration) for i in range(n_clients)]
+            with Pool(n_clients) as pool:
+                results = pool.map(_client, chunks)
+            latencies = np.concatenate([r[0] for r in results]) * 1000
+            errors = sum(r[1] for r in results)
+            rss, pss, worker_uss = tree_memory(proc.pid)
+            print(f"{workers:>7} {len(latencies) / duration:>9.1f} {np.percentile(latencies, 50):>8.1f} "
+                  f"{np.percentile(latencies, 99):>8.1f} {errors:>7} {rss:>11.0f} {pss:>13.0f} "
+                  f"{np.mean(worker_uss):>14.0f}")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pre-fork multi-worker API")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds of load per worker count")
+    parser.add_argument('--clients-per-worker', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8012)
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(ROOT, 'models', 'vetnet_best_state.pth')):
+        print("❌ Models not found. Train models first.")
+        sys.exit(1)
+    run_benchmark(args.workers, args.duration, args.clients_per_worker, args.port)
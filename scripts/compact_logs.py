@@ -0,0 +1,43 @@
+"""
+Compact archived prediction logs into the columnar store
+Writes the Parquet copy of every archived prediction log segment that does
+not have one yet (segments rotated before pyarrow was installed, or whose
+compaction failed). With --rotate the active log is archived first, so an
+existing large prediction_log.jsonl becomes queryable at once.
+
+Safe to run while the API is writing: rotation takes the same lock as the
+log writers.
+
+Usage:
+    python scripts/compact_logs.py [--rotate] [--log logs/prediction_log.jsonl]
+"""
+import sys
+import os
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from src import log_store
+from src.log_archive import LogArchive
+from src.monitoring import LOG_FILE
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact archived prediction logs to Parquet")
+    parser.add_argument('--log', default=LOG_FILE)
+    parser.add_argument('--rotate', action='store_true', help="archive the active log first")
+    args = parser.parse_args()
+
+    if not log_store.PYARROW_AVAILABLE:
+        print("❌ pyarrow is not installed; nothing to do")
+        return
+
+    archive = LogArchive(args.log)
+    if args.rotate:
+        segment = archive.rotate(lambda date, size: True)
+        print(f"📦 Archived active log to {segment['path']}" if segment else "📦 Active log is empty")
+    compacted = log_store.compact_archive(args.log)
+    print(f"✅ Compacted {compacted} segment(s) of {args.log}")
+
+if __name__ == "__main__":
+    main()
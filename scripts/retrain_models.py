@@ -147,6 +147,10 @@ print(f"   📁 models/stage2_models.pkl (8 category models)")
 print(f"   📁 models/category_encoder.pkl")
 print(f"   📁 models/disease_encoders.pkl (8 disease encoders)")
 
+# Rebuild the single versioned bundle inference loads (needs the VetNet artifacts too)
+from src.model_bundle import try_build_bundle
+try_build_bundle()
+
 # Summary
 print("\n" + "="*70)
 print("TRAINING SUMMARY")
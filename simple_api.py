@@ -3,11 +3,14 @@ FastAPI application for animal disease prediction.
 Updated to use Neural Network (VetNet) and Real-Time Monitoring.
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
 import sys
 import os
+import asyncio
+import json
 import time
 import traceback
 from datetime import datetime
@@ -16,17 +19,30 @@ from datetime import datetime
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
-    from src.inference_nn import predict_disease_nn
+    from src import inference_nn
+    from src.inference_nn import predict_disease_nn, predict_disease_nn_batch
 except ImportError as e:
     print(f"⚠️ ML Model Import Error: {e}")
     print("Running in Lightweight Mode (No Neural Network)")
+    inference_nn = None
     def predict_disease_nn(data):
         return {"success": False, "error": "ML Model not loaded"}
+    def predict_disease_nn_batch(records):
+        return [predict_disease_nn(r) for r in records]
 
-from src.monitoring import SystemMonitor, start_background_monitoring
+from src.monitoring import SystemMonitor, flush_logs, start_background_monitoring
+from src.telemetry_store import flush_stores
+from src.batching import MicroBatchScheduler, QueueFullError, DeadlineExceeded, MICROBATCH_ENABLED
+from src.inference_executor import inference_executor
+from src.admission import AdmissionMiddleware, admission_controller, current_deadline
+from src.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
 
 app = FastAPI(title="Animal Disease Prediction API (VetNet Powered)")
 
+# Per-route concurrency limits, telemetry priority lane, deadlines and load
+# shedding (src/admission.py). Added before CORS so shed responses get CORS headers.
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Enable CORS for React Frontend
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
@@ -37,8 +53,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route for /metrics. Outermost, so shed
+# (503/504) responses are counted too.
+app.add_middleware(MetricsMiddleware)
+
 monitor = SystemMonitor()
 
+# Bulk prediction limits
+MAX_BATCH_SIZE = 10000    # Max records accepted by /predict/batch
+BATCH_CHUNK_SIZE = 512    # Records scored (and logged) together
+MAX_STREAM_LINE_BYTES = 64 * 1024  # Longest NDJSON line /predict/stream buffers
+
+# Concurrent /predict calls are coalesced into one VetNet batch
+scheduler = MicroBatchScheduler(predict_disease_nn_batch) if MICROBATCH_ENABLED else None
+
 # Import and attach IoT Gateway
 from src.iot_gateway import router as iot_router
 app.include_router(iot_router, prefix="/iot", tags=["IoT Telemetry"])
@@ -73,6 +101,15 @@ class PredictionRequest(BaseModel):
 def startup_event():
     """Start background tasks"""
     start_background_monitoring(interval=10) # Log system health every 10s
+    inference_executor.start()  # also pins torch intra-op threads
+    if scheduler:
+        scheduler.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Write out queued prediction/metrics log entries and telemetry readings"""
+    flush_logs()
+    flush_stores()
 
 @app.get("/")
 def read_root():
@@ -80,33 +117,59 @@ def read_root():
         "message": "Animal Disease Prediction API (VetNet)",
         "version": "3.0",
         "model": "Deep Learning (PyTorch)",
+        "model_variant": getattr(inference_nn, 'vetnet_variant', None),
+        "model_version": getattr(inference_nn, 'MODEL_VERSION', None),
         "status": "running"
     }
 
 @app.get("/health")
 def health_check():
+    """Liveness: the process is up (models may still be loading, see /ready)"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 200 once the models are loaded and warm, 503 until then"""
+    if inference_nn is None:
+        return JSONResponse(status_code=503, content={"ready": False, "state": "unavailable"})
+    status = inference_nn.load_status()
+    status["pid"] = os.getpid()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 @app.post("/predict")
-def predict(request: PredictionRequest):
-    """Make a disease prediction using VetNet"""
+async def predict(request: PredictionRequest):
+    """
+    Make a disease prediction using VetNet.
+    The handler is async but never runs model code on the event loop: records
+    go to the micro-batch scheduler's thread or the bounded inference
+    executor, and both answer 503 when saturated.
+    """
     start_time = time.time()
     try:
         input_dict = request.dict()
         
-        # Use new Neural Network Inference
-        result = predict_disease_nn(input_dict)
+        # Use new Neural Network Inference (micro-batched with concurrent calls)
+        deadline = current_deadline()
+        if scheduler:
+            result = await asyncio.wrap_future(scheduler.submit(input_dict, deadline))
+        else:
+            result = await inference_executor.run(predict_disease_nn, input_dict, deadline=deadline)
         
         # Calculate latency
         latency_ms = (time.time() - start_time) * 1000
         
-        # Log to monitoring system
+        # Log to monitoring system (queued; written by a background thread)
         monitor.log_prediction(input_dict, result, latency_ms)
         
         if not result.get('success', False):
             raise HTTPException(status_code=500, detail=result.get('error', 'Prediction failed'))
         
         return result
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        # Dropped before scoring: nothing was computed, nothing to log
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         latency_ms = (time.time() - start_time) * 1000
@@ -114,8 +177,219 @@ def predict(request: PredictionRequest):
         monitor.log_prediction(request.dict(), {"success": False, "error": str(e)}, latency_ms)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/scheduler/stats")
+def scheduler_stats():
+    """Micro-batching scheduler batch-size and queue-wait histograms"""
+    if not scheduler:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.stats()}
+
+@app.get("/admission/stats")
+def admission_stats():
+    """Per-route in-flight counts, admitted/shed/expired counters and queue waits"""
+    return admission_controller.stats()
+
+@app.get("/executor/stats")
+def executor_stats():
+    """Inference thread pool occupancy, rejections and queue-wait histogram"""
+    return inference_executor.stats()
+
+@app.get("/monitoring/stats")
+def monitoring_stats():
+    """Runtime counters, including the log writers' queued/written/dropped entries"""
+    return monitor.get_runtime_stats()
+
+@app.get("/monitoring/aggregates")
+def monitoring_aggregates(window_minutes: int = 60):
+    """All-time and last-`window_minutes` prediction counts, shares and latency quantiles (all workers)"""
+    if window_minutes <= 0:
+        raise HTTPException(status_code=400, detail="window_minutes must be positive")
+    aggregates = monitor.get_aggregates()
+    return {"all_time": aggregates.snapshot(), "window": aggregates.snapshot(window_minutes)}
+
+@app.get("/monitoring/stages")
+def monitoring_stages(window_minutes: Optional[int] = None, species: Optional[str] = None,
+                      category: Optional[str] = None):
+    """Per-stage inference latency quantiles (p50/p95/p99/p99.9) for all time or the last `window_minutes`"""
+    if window_minutes is not None and window_minutes <= 0:
+        raise HTTPException(status_code=400, detail="window_minutes must be positive")
+    try:
+        return monitor.get_stage_latency().snapshot(window_minutes, species=species, category=category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of this process's request, stage, cache, IoT and process metrics"""
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Prediction result cache hit/miss counters"""
+    return monitor.get_runtime_stats().get('prediction_cache', {"enabled": False})
+
+@app.post("/models/reload")
+def reload_models():
+    """Reload model artifacts from models/ (e.g. after a retrain); clears the result cache"""
+    if inference_nn is None:
+        raise HTTPException(status_code=503, detail="ML Model not loaded")
+    try:
+        version = inference_nn.reload_models()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+    return {"success": True, "model_version": version, "model_variant": inference_nn.vetnet_variant}
+
+def _predict_chunk(input_dicts):
+    """Score a chunk of records and write one monitoring entry for it."""
+    start_time = time.time()
+    results = predict_disease_nn_batch(input_dicts)
+    latency_ms = (time.time() - start_time) * 1000
+    monitor.log_predictions(input_dicts, results, latency_ms)
+    return results
+
+@app.post("/predict/batch")
+async def predict_batch(requests: List[PredictionRequest]):
+    """
+    Score many animals in one call (e.g. nightly LIMS panels).
+    Records are scored in chunks through the vectorized VetNet path, each
+    chunk on the bounded inference executor (503 when it is saturated).
+    A failed record is reported in place and does not fail the batch.
+    """
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} records)")
+
+    input_dicts = [r.dict() for r in requests]
+    deadline = current_deadline()
+    results = []
+    try:
+        for i in range(0, len(input_dicts), BATCH_CHUNK_SIZE):
+            results.extend(await inference_executor.run(_predict_chunk, input_dicts[i:i + BATCH_CHUNK_SIZE],
+                                                        deadline=deadline))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    failed = sum(1 for r in results if not r.get('success', False))
+    return {"results": results, "count": len(results), "failed": failed}
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that starts answering while the request body is still
+    being read. The stock response listens for client disconnects on
+    `receive()`, which would swallow the body chunks the generator reads.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    NDJSON in, NDJSON out. One PredictionRequest JSON object per input line;
+    one result per output line, in input order, tagged with its 0-based line
+    index (blank lines get no result but keep their number). Lines longer
+    than MAX_STREAM_LINE_BYTES are answered with an error result.
+    The body is consumed and answered chunk by chunk, so neither side has to
+    hold the whole file in memory. Chunks are scored on the bounded inference
+    executor: if the first one is refused the request gets a 503 (or 504);
+    once streaming, a refused chunk's lines are answered as failed.
+    """
+    deadline = current_deadline()
+    answered = False
+
+    async def scored_lines():
+        pending = []  # (line_index, input_dict or error)
+        line_index = 0
+        buffer = b""
+
+        async def flush():
+            nonlocal answered
+            valid = [(i, d) for i, d in pending if isinstance(d, dict)]
+            try:
+                results = await inference_executor.run(_predict_chunk, [d for _, d in valid],
+                                                       deadline=deadline) if valid else []
+            except (QueueFullError, DeadlineExceeded) as e:
+                if not answered:
+                    raise  # nothing sent yet: answered with a status code below
+                results = [{"success": False, "error": str(e)}] * len(valid)
+            answered = True
+            scored = dict(zip((i for i, _ in valid), results))
+            out = []
+            for i, d in pending:
+                result = scored[i] if i in scored else {"success": False, "error": d}
+                out.append(json.dumps({"index": i, **result}) + "\n")
+            pending.clear()
+            return "".join(out)
+
+        def parse(line):
+            try:
+                return PredictionRequest(**json.loads(line)).dict()
+            except (ValueError, ValidationError, TypeError) as e:
+                return str(e)
+
+        too_long = f"Line too long (max {MAX_STREAM_LINE_BYTES} bytes)"
+        skipping = False  # inside an over-long line whose error is already pending
+
+        def add(line):
+            # Indexes count every physical line, so blank lines keep their numbers
+            nonlocal line_index
+            if len(line) > MAX_STREAM_LINE_BYTES:
+                pending.append((line_index, too_long))
+            elif line.strip():
+                pending.append((line_index, parse(line)))
+            line_index += 1
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if skipping:
+                    skipping = False  # the rest of the over-long line
+                    line_index += 1
+                else:
+                    add(line)
+                if len(pending) >= BATCH_CHUNK_SIZE:
+                    yield await flush()
+            if len(buffer) > MAX_STREAM_LINE_BYTES:
+                # Do not hold an unbounded partial line: report it and drop bytes up to its newline
+                if not skipping:
+                    pending.append((line_index, too_long))
+                    skipping = True
+                buffer = b""
+
+        if buffer and not skipping:
+            add(buffer)
+        if pending:
+            yield await flush()
+
+    # Score the first chunk before the status line goes out
+    lines = scored_lines()
+    try:
+        first = await lines.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    async def body():
+        yield first
+        async for out in lines:
+            yield out
+
+    return DuplexStreamingResponse(body(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
+    from src.prefork import WORKERS, serve
+    port = int(os.environ.get('VETNET_API_PORT', 8002))
     # Start server
-    print("Starting API server on port 8002...")
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    print(f"Starting API server on port {port}...")
+    if WORKERS > 1:
+        # Models are loaded once and shared by forked workers (src/prefork.py)
+        serve(app, host="0.0.0.0", port=port, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
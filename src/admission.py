@@ -0,0 +1,293 @@
+"""
+Admission Control and Load Shedding
+ASGI middleware that decides, before any handler runs, whether a request
+may proceed now, should wait briefly, or is shed.
+
+- Per-route concurrency limits: each route class (telemetry, predict,
+  diagnose, bulk) has its own in-flight cap, and all of them share a global
+  cap.
+- Priority lane: the last VETNET_HIGH_PRIORITY_RESERVE global slots are
+  kept for high-priority work (IoT telemetry), and waiters are woken in
+  priority order, so a flood of bulk predictions cannot starve telemetry.
+- Early shedding: a request whose estimated queue wait already exceeds its
+  priority's budget is rejected at once with 503 + Retry-After instead of
+  queueing, and so is one whose wait runs out.
+- Deadlines: clients may send X-Request-Timeout-Ms (budget from arrival) or
+  X-Request-Deadline (unix seconds). Expired requests get 504 before any
+  inference; the remaining deadline is also checked by the micro-batch
+  scheduler and the inference executor just before scoring.
+
+Everything here runs on the event loop thread, so no locks are needed.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import math
+import os
+import time
+
+from src.batching import Histogram, QUEUE_WAIT_MS_BUCKETS
+
+HIGH, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {'high': HIGH, 'normal': NORMAL, 'low': LOW}
+
+def _parse_pairs(value, cast=int):
+    """'a=1,b=2' -> {'a': 1, 'b': 2} (used for the dict-valued env settings)."""
+    pairs = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        key, _, raw = item.partition('=')
+        pairs[key.strip()] = cast(raw)
+    return pairs
+
+# Route classes: path prefix -> (route class, default priority). The longest
+# matching prefix wins; paths not listed are not admission-controlled.
+ROUTE_CLASSES = {
+    '/iot/telemetry': ('telemetry', HIGH),
+    '/iot/telemetry/batch': ('telemetry_batch', HIGH),
+    '/iot/diagnose': ('diagnose', NORMAL),
+    '/predict': ('predict', NORMAL),
+    '/predict/batch': ('bulk', LOW),
+    '/predict/stream': ('bulk', LOW),
+}
+
+# Configuration (overridable through the environment)
+ROUTE_LIMITS = {'telemetry': 256, 'telemetry_batch': 8, 'predict': 64, 'diagnose': 16, 'bulk': 4}
+ROUTE_LIMITS.update(_parse_pairs(os.environ.get('VETNET_ROUTE_LIMITS', '')))
+MAX_CONCURRENCY = int(os.environ.get('VETNET_MAX_CONCURRENCY', 256))
+HIGH_PRIORITY_RESERVE = int(os.environ.get('VETNET_HIGH_PRIORITY_RESERVE', 32))
+# Longest a request of each priority may wait for a slot
+MAX_QUEUE_WAIT_MS = {'high': 2000.0, 'normal': 500.0, 'low': 100.0}
+MAX_QUEUE_WAIT_MS.update(_parse_pairs(os.environ.get('VETNET_MAX_QUEUE_WAIT_MS', ''), float))
+
+_current_deadline = contextvars.ContextVar('vetnet_request_deadline', default=None)
+
+def current_deadline():
+    """time.monotonic() deadline of the request being handled, or None."""
+    return _current_deadline.get()
+
+def request_priority(headers, default):
+    """Route default, lowered by X-Priority if asked; clients cannot raise themselves above it."""
+    requested = PRIORITY_NAMES.get(headers.get('x-priority', '').lower(), default)
+    return max(requested, default)  # HIGH is 0: larger is lower priority
+
+def parse_deadline(headers, now=None):
+    """Monotonic deadline from X-Request-Timeout-Ms / X-Request-Deadline, or None."""
+    now = time.monotonic() if now is None else now
+    try:
+        if headers.get('x-request-timeout-ms'):
+            return now + float(headers['x-request-timeout-ms']) / 1000.0
+        if headers.get('x-request-deadline'):
+            return now + (float(headers['x-request-deadline']) - time.time())
+    except ValueError:
+        pass
+    return None
+
+class Shed(Exception):
+    """Request refused by admission control."""
+    def __init__(self, status_code, reason, retry_after=None):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+class RouteState:
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self.expired = 0
+        self.service_ms = None  # EWMA of time from admission to response
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+
+    def record_service(self, ms):
+        self.service_ms = ms if self.service_ms is None else 0.9 * self.service_ms + 0.1 * ms
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "expired": self.expired,
+            "service_ms_ewma": round(self.service_ms, 2) if self.service_ms is not None else None,
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
+
+class AdmissionController:
+    def __init__(self, route_limits=ROUTE_LIMITS, max_concurrency=MAX_CONCURRENCY,
+                 high_priority_reserve=HIGH_PRIORITY_RESERVE, max_queue_wait_ms=MAX_QUEUE_WAIT_MS):
+        self.routes = {name: RouteState(name, limit) for name, limit in route_limits.items()}
+        self.max_concurrency = max_concurrency
+        self.high_priority_reserve = high_priority_reserve
+        self.max_queue_wait_ms = {PRIORITY_NAMES[name]: ms for name, ms in max_queue_wait_ms.items()}
+        self.in_flight = 0
+        self._waiters = []  # heap of (priority, seq, route, future)
+        self._seq = itertools.count()
+
+    def classify(self, path):
+        """(route class, default priority) for a path, or None if it is not controlled."""
+        best = None
+        for prefix, route in ROUTE_CLASSES.items():
+            if (path == prefix or path.startswith(prefix + '/')) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return ROUTE_CLASSES[best] if best else None
+
+    def _has_room(self, route, priority):
+        if route.in_flight >= route.limit:
+            return False
+        reserve = 0 if priority == HIGH else self.high_priority_reserve
+        return self.in_flight < self.max_concurrency - reserve
+
+    def _estimated_wait_ms(self, route, priority):
+        """Rough wait: queued work ahead of us on this route, drained `limit` at a time."""
+        ahead = sum(1 for p, _, r, f in self._waiters if r is route and p <= priority and not f.done())
+        service_ms = route.service_ms or 0.0
+        return (ahead + 1) * service_ms / max(1, route.limit)
+
+    def _retry_after(self, route, priority):
+        return max(1, math.ceil(self._estimated_wait_ms(route, priority) / 1000.0))
+
+    def _grant(self, route):
+        route.in_flight += 1
+        route.admitted += 1
+        self.in_flight += 1
+
+    async def acquire(self, route_name, priority, deadline=None):
+        """Wait for a slot on `route_name`; raises Shed when refused."""
+        route = self.routes[route_name]
+        start = time.monotonic()
+        if deadline is not None and deadline <= start:
+            route.expired += 1
+            raise Shed(504, "Request deadline already passed")
+
+        # Waiters for global room are granted as soon as a slot frees, so the
+        # only ones we could overtake are earlier, not-lower-priority waiters
+        # for this same route
+        blocked = any(r is route and p <= priority and not f.done() for p, _, r, f in self._waiters)
+        if not blocked and self._has_room(route, priority):
+            self._grant(route)
+            route.queue_wait_ms.observe(0.0)
+            return
+
+        budget_ms = self.max_queue_wait_ms[priority]
+        if deadline is not None:
+            budget_ms = min(budget_ms, (deadline - start) * 1000)
+        if self._estimated_wait_ms(route, priority) > budget_ms:
+            route.shed += 1
+            raise Shed(503, f"{route_name} is overloaded", self._retry_after(route, priority))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), route, future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), budget_ms / 1000.0)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                if isinstance(e, asyncio.TimeoutError):
+                    # Granted in the same tick the wait ran out: keep the slot
+                    route.queue_wait_ms.observe((time.monotonic() - start) * 1000)
+                    return
+                # Client went away after being granted: hand the slot back
+                self.release(route_name, None)
+                raise
+            future.cancel()
+            self._discard(entry)
+            if not isinstance(e, asyncio.TimeoutError):
+                raise
+            if deadline is not None and time.monotonic() >= deadline:
+                route.expired += 1
+                raise Shed(504, "Request deadline passed while queued")
+            route.shed += 1
+            raise Shed(503, f"{route_name} queue wait exceeded {budget_ms:.0f}ms",
+                       self._retry_after(route, priority))
+        route.queue_wait_ms.observe((time.monotonic() - start) * 1000)
+
+    def _discard(self, entry):
+        try:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        except ValueError:
+            pass
+
+    def release(self, route_name, service_ms):
+        route = self.routes[route_name]
+        route.in_flight -= 1
+        self.in_flight -= 1
+        if service_ms is not None:
+            route.record_service(service_ms)
+        self._wake()
+
+    def _wake(self):
+        """Grant freed slots to waiters, highest priority (then oldest) first."""
+        skipped = []
+        while self._waiters:
+            entry = heapq.heappop(self._waiters)
+            priority, _, route, future = entry
+            if future.done():
+                continue
+            if self._has_room(route, priority):
+                self._grant(route)
+                future.set_result(True)
+            else:
+                skipped.append(entry)
+                # Nothing of lower priority may jump a waiter that only lacks global room
+                if self.in_flight >= self.max_concurrency - (0 if priority == HIGH else self.high_priority_reserve):
+                    break
+        for entry in skipped:
+            heapq.heappush(self._waiters, entry)
+
+    def stats(self):
+        return {
+            "config": {
+                "max_concurrency": self.max_concurrency,
+                "high_priority_reserve": self.high_priority_reserve,
+                "max_queue_wait_ms": {name: self.max_queue_wait_ms[p] for name, p in PRIORITY_NAMES.items()}
+            },
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for *_, f in self._waiters if not f.done()),
+            "routes": {name: route.stats() for name, route in self.routes.items()}
+        }
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware, so the deadline context variable reaches the handlers."""
+    def __init__(self, app, controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route = self.controller.classify(scope.get('path', '')) if scope['type'] == 'http' else None
+        if route is None or scope.get('method') == 'OPTIONS':
+            return await self.app(scope, receive, send)
+
+        route_name, priority = route
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        priority = request_priority(headers, priority)
+        deadline = parse_deadline(headers)
+
+        try:
+            await self.controller.acquire(route_name, priority, deadline)
+        except Shed as e:
+            return await self._reject(send, e)
+
+        token = _current_deadline.set(deadline)
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_deadline.reset(token)
+            self.controller.release(route_name, (time.monotonic() - start) * 1000)
+
+    async def _reject(self, send, shed):
+        body = json.dumps({"detail": shed.reason}).encode()
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        if shed.retry_after is not None:
+            headers.append((b'retry-after', str(shed.retry_after).encode()))
+        await send({'type': 'http.response.start', 'status': shed.status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+# Global Instance
+admission_controller = AdmissionController()
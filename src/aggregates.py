@@ -0,0 +1,543 @@
+"""
+Rolling Prediction Aggregates
+Incrementally maintained dashboard numbers, so KPIs cover every prediction
+instead of the last 1000 log rows and no page rescans raw logs:
+
+- all-time counts per species, category, disease and species x category,
+  errors, confidence sum and a latency quantile sketch
+- the same aggregates in tumbling 1-minute buckets (last 2 hours) and
+  1-hour buckets (last 30 days) for windowed views and time series
+- per inference stage, latency sketches overall, per species and per
+  category (StageLatency; 1-minute buckets for an hour, 1-hour for a week)
+
+Recording a prediction updates three buckets (all-time, current minute,
+current hour): O(1) per prediction.
+
+Every part is mergeable by adding counts. Each API process publishes its
+state to logs/aggregates/worker-<pid>-<start>.json every few seconds and
+readers (the /monitoring/aggregates endpoint, the Streamlit dashboards)
+merge all published files, so pre-fork workers and restarts are covered.
+Files of processes that have exited are folded into base.json.
+"""
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from contextlib import nullcontext
+from datetime import datetime
+from glob import glob
+
+from src.log_archive import file_lock
+
+SKETCH_RELATIVE_ACCURACY = 0.01
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+MINUTE_BUCKETS = int(os.environ.get('VETNET_AGG_MINUTE_BUCKETS', 120))
+HOUR_BUCKETS = int(os.environ.get('VETNET_AGG_HOUR_BUCKETS', 720))
+PUBLISH_INTERVAL_S = float(os.environ.get('VETNET_AGG_PUBLISH_S', 5.0))
+
+# Inference stages timed by src/inference_nn.py ("logging" by SystemMonitor)
+STAGES = ("feature_build", "impute_scale", "vetnet_forward", "stage2_preprocess", "stage2_trees",
+          "bio_validation", "treatment_lookup", "logging")
+STAGE_QUANTILES = (0.5, 0.95, 0.99, 0.999)
+STAGE_SKETCH_ACCURACY = 0.02  # coarser than the request sketch: there are many more of them
+STAGE_MINUTE_BUCKETS = int(os.environ.get('VETNET_STAGE_MINUTE_BUCKETS', 60))
+STAGE_HOUR_BUCKETS = int(os.environ.get('VETNET_STAGE_HOUR_BUCKETS', 168))
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram (DDSketch): values are counted in buckets whose
+    bounds grow by a factor `gamma`, so any quantile is returned within
+    `relative_accuracy` of the true value. Merging adds bucket counts.
+    """
+    def __init__(self, relative_accuracy=SKETCH_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.offset = 0  # bucket key of counts[0]
+        self.counts = array('q')  # dense: one slot per key between the smallest and largest seen
+        self.zero_count = 0  # values <= 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value, n=1):
+        if value is None or value != value:  # None / NaN
+            return
+        self.count += n
+        self.sum += value * n
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+        if value <= 0:
+            self.zero_count += n
+        else:
+            self._add_key(math.ceil(math.log(value) / self._log_gamma), n)
+
+    def _add_key(self, key, n):
+        counts = self.counts
+        if not counts:
+            self.offset = key
+            counts.append(n)
+            return
+        i = key - self.offset
+        if i < 0:
+            counts[0:0] = array('q', bytes(8 * -i))
+            self.offset, i = key, 0
+        elif i >= len(counts):
+            counts.extend(array('q', bytes(8 * (i - len(counts) + 1))))
+        counts[i] += n
+
+    @property
+    def bins(self):
+        """Non-empty buckets as {key: count}."""
+        return {self.offset + i: n for i, n in enumerate(self.counts) if n}
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        if other.counts:
+            # Grow once to cover the other range, then add slot by slot
+            self._add_key(other.offset, 0)
+            self._add_key(other.offset + len(other.counts) - 1, 0)
+            base = other.offset - self.offset
+            for i, n in enumerate(other.counts):
+                if n:
+                    self.counts[base + i] += n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return min(0.0, self.max)
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen > rank:
+                key = self.offset + i
+                # Midpoint of the bucket (gamma^(k-1), gamma^k], clamped to what was seen
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def summary(self, quantiles=QUANTILES):
+        out = {"count": self.count, "mean": _round(self.mean()), "min": _round(self.min), "max": _round(self.max)}
+        for q in quantiles:
+            out[f"p{q * 100:g}"] = _round(self.quantile(q))
+        return out
+
+    def to_dict(self):
+        return {"relative_accuracy": self.relative_accuracy, "offset": self.offset, "counts": self.counts.tolist(),
+                "zero_count": self.zero_count, "count": self.count, "sum": self.sum,
+                "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state.get("relative_accuracy", SKETCH_RELATIVE_ACCURACY))
+        sketch.offset = state.get("offset", 0)
+        sketch.counts = array('q', state.get("counts", []))
+        for key, n in sorted(state.get("bins", {}).items(), key=lambda kv: int(kv[0])):
+            sketch._add_key(int(key), n)  # sparse format of earlier versions
+        sketch.zero_count = state.get("zero_count", 0)
+        sketch.count = state.get("count", 0)
+        sketch.sum = state.get("sum", 0.0)
+        sketch.min = state.get("min")
+        sketch.max = state.get("max")
+        return sketch
+
+def _round(value, digits=3):
+    return round(value, digits) if value is not None else None
+
+def _add_counts(target, source):
+    for key, n in source.items():
+        target[key] = target.get(key, 0) + n
+
+class AggregateBucket:
+    """Counts, confidence and latency of the predictions in one time bucket."""
+    def __init__(self, start=None):
+        self.start = start  # epoch seconds; None for the all-time bucket
+        self.count = 0
+        self.errors = 0
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.species = {}
+        self.categories = {}
+        self.diseases = {}
+        self.matrix = {}  # species -> category -> count
+        self.latency_ms = QuantileSketch()
+
+    def record(self, animal, category, disease, success, latency_ms, confidence):
+        self.count += 1
+        if not success:
+            self.errors += 1
+        if confidence is not None:
+            self.confidence_sum += confidence
+            self.confidence_count += 1
+        self.species[animal] = self.species.get(animal, 0) + 1
+        if category is not None:
+            self.categories[category] = self.categories.get(category, 0) + 1
+            row = self.matrix.setdefault(animal, {})
+            row[category] = row.get(category, 0) + 1
+        if disease is not None:
+            self.diseases[disease] = self.diseases.get(disease, 0) + 1
+        self.latency_ms.add(latency_ms)
+
+    def merge(self, other):
+        self.count += other.count
+        self.errors += other.errors
+        self.confidence_sum += other.confidence_sum
+        self.confidence_count += other.confidence_count
+        _add_counts(self.species, other.species)
+        _add_counts(self.categories, other.categories)
+        _add_counts(self.diseases, other.diseases)
+        for animal, row in other.matrix.items():
+            _add_counts(self.matrix.setdefault(animal, {}), row)
+        self.latency_ms.merge(other.latency_ms)
+        return self
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": _round(self.errors / self.count if self.count else 0.0, 4),
+            "mean_confidence": _round(self.confidence_sum / self.confidence_count if self.confidence_count else None, 4),
+            "latency_ms": self.latency_ms.summary(),
+            "species": dict(sorted(self.species.items(), key=lambda kv: -kv[1])),
+            "categories": dict(sorted(self.categories.items(), key=lambda kv: -kv[1])),
+            "diseases": dict(sorted(self.diseases.items(), key=lambda kv: -kv[1])),
+            "species_category": {animal: dict(row) for animal, row in self.matrix.items()}
+        }
+
+    def to_dict(self):
+        return {"start": self.start, "count": self.count, "errors": self.errors,
+                "confidence_sum": self.confidence_sum, "confidence_count": self.confidence_count,
+                "species": self.species, "categories": self.categories, "diseases": self.diseases,
+                "matrix": self.matrix, "latency_ms": self.latency_ms.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        bucket = cls(state.get("start"))
+        bucket.count = state["count"]
+        bucket.errors = state["errors"]
+        bucket.confidence_sum = state["confidence_sum"]
+        bucket.confidence_count = state["confidence_count"]
+        bucket.species = state["species"]
+        bucket.categories = state["categories"]
+        bucket.diseases = state["diseases"]
+        bucket.matrix = state["matrix"]
+        bucket.latency_ms = QuantileSketch.from_dict(state["latency_ms"])
+        return bucket
+
+class StageBucket:
+    """Latency sketches per inference stage: overall, per species and per category."""
+    def __init__(self, start=None):
+        self.start = start
+        self.sketches = {}  # (stage, "all" | "species" | "category", value) -> QuantileSketch
+
+    def _sketch(self, key):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch(STAGE_SKETCH_ACCURACY)
+        return sketch
+
+    def record(self, species, category, stage_ms, n=1):
+        for stage, ms in stage_ms.items():
+            self._sketch((stage, "all", "")).add(ms, n)
+            if species is not None:
+                self._sketch((stage, "species", species)).add(ms, n)
+            if category is not None:
+                self._sketch((stage, "category", category)).add(ms, n)
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            self._sketch(key).merge(sketch)
+        return self
+
+    def to_dict(self):
+        return {"start": self.start,
+                "sketches": [[*key, sketch.to_dict()] for key, sketch in self.sketches.items()]}
+
+    @classmethod
+    def from_dict(cls, state):
+        bucket = cls(state.get("start"))
+        for stage, dimension, value, sketch in state["sketches"]:
+            bucket.sketches[(stage, dimension, value)] = QuantileSketch.from_dict(sketch)
+        return bucket
+
+class TimeBuckets:
+    """
+    An all-time bucket plus tumbling minute and hour buckets of `bucket_class`
+    (which provides record(*values), merge(other), to_dict() / from_dict()).
+    """
+    bucket_class = None
+
+    def __init__(self, minute_buckets, hour_buckets):
+        self.minute_buckets = minute_buckets
+        self.hour_buckets = hour_buckets
+        self._lock = threading.Lock()
+        self.all_time = self.bucket_class()
+        self.minutes = {}  # bucket start -> bucket, oldest first
+        self.hours = {}
+        self.version = 0  # bumped on every change (publishing skips unchanged state)
+
+    def add(self, *values, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.all_time.record(*values)
+            self._bucket(self.minutes, 60, self.minute_buckets, now).record(*values)
+            self._bucket(self.hours, 3600, self.hour_buckets, now).record(*values)
+            self.version += 1
+
+    def _bucket(self, buckets, width, keep, now):
+        start = int(now // width) * width
+        bucket = buckets.get(start)
+        if bucket is None:
+            bucket = buckets[start] = self.bucket_class(start)
+            # Buckets are created in time order, so expired ones are at the front
+            cutoff = start - keep * width
+            while buckets and next(iter(buckets)) <= cutoff:
+                del buckets[next(iter(buckets))]
+        return bucket
+
+    def merge(self, other):
+        with other._lock, self._lock:
+            self.all_time.merge(other.all_time)
+            for mine, theirs, keep in ((self.minutes, other.minutes, self.minute_buckets),
+                                       (self.hours, other.hours, self.hour_buckets)):
+                for start, bucket in theirs.items():
+                    if start in mine:
+                        mine[start].merge(bucket)
+                    else:
+                        mine[start] = self.bucket_class(start).merge(bucket)
+                ordered = sorted(mine.items())[-keep:]
+                mine.clear()
+                mine.update(ordered)
+            self.version += 1
+        return self
+
+    def collect(self, window_minutes=None, now=None, each=None):
+        """
+        (merged bucket, bucket seconds, window start) for all time
+        (window_minutes=None) or the last `window_minutes` minutes. Windows up
+        to the minute retention use minute buckets; longer ones whole hour
+        buckets. `each(start, bucket)` is called for every bucket in the window.
+        """
+        if window_minutes is None:
+            with self._lock:
+                return self.bucket_class().merge(self.all_time), None, None
+        now = time.time() if now is None else now
+        if window_minutes <= self.minute_buckets:
+            buckets, width = self.minutes, 60
+        else:
+            buckets, width = self.hours, 3600
+        first = (int(now // width) * width) - (math.ceil(window_minutes * 60 / width) - 1) * width
+        total = self.bucket_class(first)
+        with self._lock:
+            for start, bucket in buckets.items():
+                if start >= first:
+                    total.merge(bucket)
+                    if each is not None:
+                        each(start, bucket)
+        return total, width, first
+
+    def to_dict(self):
+        with self._lock:
+            return {"all_time": self.all_time.to_dict(),
+                    "minutes": [b.to_dict() for b in self.minutes.values()],
+                    "hours": [b.to_dict() for b in self.hours.values()]}
+
+    @classmethod
+    def from_dict(cls, state, **kwargs):
+        aggregates = cls(**kwargs)
+        aggregates.all_time = cls.bucket_class.from_dict(state["all_time"])
+        aggregates.minutes = {b["start"]: cls.bucket_class.from_dict(b) for b in state.get("minutes", [])}
+        aggregates.hours = {b["start"]: cls.bucket_class.from_dict(b) for b in state.get("hours", [])}
+        return aggregates
+
+def _window_fields(window_minutes, width, first):
+    if window_minutes is None:
+        return {"window_minutes": None}
+    return {"window_minutes": window_minutes, "bucket_seconds": width,
+            "since": datetime.fromtimestamp(first).isoformat()}
+
+class RollingAggregates(TimeBuckets):
+    """Prediction counts, shares and latency: all-time, per minute and per hour."""
+    bucket_class = AggregateBucket
+
+    def __init__(self, minute_buckets=MINUTE_BUCKETS, hour_buckets=HOUR_BUCKETS):
+        super().__init__(minute_buckets, hour_buckets)
+
+    def record(self, entry, now=None):
+        """Add one prediction log entry (see SystemMonitor._prediction_entry)."""
+        self.add(entry.get("animal", "Unknown"), entry.get("category"), entry.get("disease"),
+                 entry.get("status") == "success", entry.get("latency_ms"), entry.get("disease_confidence"),
+                 now=now)
+
+    def snapshot(self, window_minutes=None, now=None, series=True):
+        """
+        Summary of all predictions (window_minutes=None) or of the last
+        `window_minutes` minutes. `series` adds the per-bucket counts and
+        latency of windowed views for charts.
+        """
+        points = []
+        def point(start, bucket):
+            points.append({"start": datetime.fromtimestamp(start).isoformat(), "count": bucket.count,
+                           "errors": bucket.errors, "latency_ms_mean": _round(bucket.latency_ms.mean()),
+                           "latency_ms_p95": _round(bucket.latency_ms.quantile(0.95))})
+        total, width, first = self.collect(window_minutes, now, point if series else None)
+        summary = dict(_window_fields(window_minutes, width, first), **total.summary())
+        if series and window_minutes is not None:
+            summary["series"] = points
+        return summary
+
+class StageLatency(TimeBuckets):
+    """Per-stage inference latency sketches: all-time, per minute and per hour."""
+    bucket_class = StageBucket
+
+    def __init__(self, minute_buckets=STAGE_MINUTE_BUCKETS, hour_buckets=STAGE_HOUR_BUCKETS):
+        super().__init__(minute_buckets, hour_buckets)
+
+    def record(self, species, category, stage_ms, n=1, now=None):
+        """Add `n` predictions that each spent stage_ms[stage] milliseconds in each stage."""
+        self.add(species, category, stage_ms, n, now=now)
+
+    def snapshot(self, window_minutes=None, now=None, species=None, category=None, quantiles=STAGE_QUANTILES):
+        """
+        Latency quantiles per stage over all time or the last `window_minutes`
+        minutes, overall or for one species or one category.
+        """
+        if species is not None and category is not None:
+            raise ValueError("Filter by species or by category, not both")
+        dimension, value = ("species", species) if species is not None else \
+            ("category", category) if category is not None else ("all", "")
+        total, width, first = self.collect(window_minutes, now)
+        stages = {}
+        for stage in STAGES + tuple(sorted({k[0] for k in total.sketches} - set(STAGES))):
+            sketch = total.sketches.get((stage, dimension, value))
+            if sketch is not None:
+                stages[stage] = sketch.summary(quantiles)
+        return dict(_window_fields(window_minutes, width, first), species=species, category=category,
+                    stages=stages, seen={"species": sorted({k[2] for k in total.sketches if k[1] == "species"}),
+                                         "category": sorted({k[2] for k in total.sketches if k[1] == "category"})})
+
+# -- Sharing between processes ----------------------------------------------
+
+def _write_json(path, state):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _pid_of(path):
+    try:
+        return int(os.path.basename(path).split("-")[1])
+    except (IndexError, ValueError):
+        return None
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class AggregatePublisher:
+    """Periodically writes one process's aggregates to <directory>/worker-<pid>-<start>.json."""
+    def __init__(self, aggregates, directory, interval_s=PUBLISH_INTERVAL_S):
+        self.aggregates = aggregates
+        self.factory = type(aggregates)
+        self.directory = directory
+        self.interval_s = interval_s
+        self.path = os.path.join(directory, f"worker-{os.getpid()}-{time.time_ns()}.json")
+        self._published_version = 0  # nothing recorded yet: nothing to publish
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, daemon=True, name="aggregate-publisher")
+                    self._thread.start()
+
+    def _run(self):
+        try:
+            compact_published(self.directory, self.factory)
+        except Exception as e:
+            print(f"⚠️ Could not compact published aggregates: {e}")
+        while True:
+            time.sleep(self.interval_s)
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"⚠️ Could not publish aggregates: {e}")
+
+    def publish(self):
+        """Write the state if it changed since the last publish."""
+        version = self.aggregates.version
+        if version == self._published_version:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(os.path.join(self.directory, "aggregates")):
+            _write_json(self.path, self.aggregates.to_dict())
+        self._published_version = version
+        return True
+
+def compact_published(directory, factory=RollingAggregates):
+    """Fold the files of exited processes into base.json."""
+    worker_files = glob(os.path.join(directory, "worker-*.json"))
+    if not any(not _alive(_pid_of(path)) for path in worker_files if _pid_of(path)):
+        return 0
+    with file_lock(os.path.join(directory, "aggregates"), exclusive=True):
+        base_path = os.path.join(directory, "base.json")
+        state = _read_json(base_path)
+        base = factory.from_dict(state) if state else factory()
+        dead = [path for path in glob(os.path.join(directory, "worker-*.json"))
+                if _pid_of(path) and not _alive(_pid_of(path))]
+        for path in dead:
+            state = _read_json(path)
+            if state:
+                base.merge(factory.from_dict(state))
+        _write_json(base_path, base.to_dict())
+        for path in dead:
+            os.remove(path)
+    return len(dead)
+
+def load_published(directory, live=None, live_path=None, factory=RollingAggregates):
+    """
+    Merge every published state in `directory` into a new `factory()`.
+    `live` (this process's own aggregates) replaces its published file
+    `live_path`, which may be stale.
+    """
+    merged = factory()
+    paths = [os.path.join(directory, "base.json")] + sorted(glob(os.path.join(directory, "worker-*.json")))
+    with file_lock(os.path.join(directory, "aggregates")) if os.path.isdir(directory) else nullcontext():
+        states = [_read_json(path) for path in paths if path != live_path]
+    for state in states:
+        if state:
+            merged.merge(factory.from_dict(state))
+    if live is not None:
+        merged.merge(live)
+    return merged
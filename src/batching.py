@@ -0,0 +1,195 @@
+"""
+Dynamic Micro-Batching Scheduler
+Collects concurrent single-record prediction requests for a short window and
+scores them together through the vectorized VetNet batch path.
+"""
+import bisect
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+# Configuration (overridable through the environment)
+MICROBATCH_ENABLED = os.environ.get('VETNET_MICROBATCH', '1') == '1'
+MAX_BATCH_SIZE = int(os.environ.get('VETNET_BATCH_MAX_SIZE', 64))
+MAX_WAIT_MS = float(os.environ.get('VETNET_BATCH_MAX_WAIT_MS', 2.0))
+MAX_QUEUE_DEPTH = int(os.environ.get('VETNET_BATCH_QUEUE_DEPTH', 1024))
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+QUEUE_WAIT_MS_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000]
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue is at its configured depth."""
+
+class DeadlineExceeded(Exception):
+    """The caller's deadline passed before its record was scored."""
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts are derived on read)."""
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.n = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.total += value
+            self.n += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            total, n = self.total, self.n
+        labels = [str(b) for b in self.buckets] + ['+Inf']
+        return {
+            "buckets": dict(zip(labels, counts)),
+            "count": n,
+            "mean": round(total / n, 4) if n else 0.0
+        }
+
+def _resolve(future, result=None, error=None):
+    """Complete a caller's Future; one that is already done is left alone."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+class MicroBatchScheduler:
+    """
+    In-process request scheduler in front of a batch prediction function.
+
+    Callers submit one record and get a Future for its result. A worker thread
+    takes the first queued record, keeps collecting until `max_batch_size`
+    records are queued or `max_wait_ms` has passed since that first record
+    arrived, then scores the whole batch with one `predict_batch_fn` call.
+    """
+    def __init__(self, predict_batch_fn, max_batch_size=MAX_BATCH_SIZE,
+                 max_wait_ms=MAX_WAIT_MS, max_queue_depth=MAX_QUEUE_DEPTH):
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_depth = max_queue_depth
+
+        self._queue = queue.Queue(maxsize=max_queue_depth)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self.rejected = 0
+        self.expired = 0
+        self.cancelled = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="vetnet-microbatch", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, record, deadline=None):
+        """
+        Queue one record. Returns a Future resolving to its result dict.
+        A record whose `deadline` (time.monotonic()) has passed by the time its
+        batch is dispatched is dropped and its Future raises DeadlineExceeded.
+        """
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((record, future, time.perf_counter(), deadline))
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFullError(f"Prediction queue full ({self.max_queue_depth} pending)")
+        return future
+
+    def predict(self, record, timeout=None, deadline=None):
+        """Submit one record and block until its result is ready."""
+        return self.submit(record, deadline).result(timeout)
+
+    def _collect_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed: only take what is already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            dispatched = time.perf_counter()
+            for _, _, enqueued, _ in batch:
+                self.queue_wait_ms.observe((dispatched - enqueued) * 1000)
+
+            # Drop work nobody is waiting for any more before scoring it. A
+            # Future cancelled by its caller (client gone, wait_for timeout)
+            # is skipped; the rest are marked running and can no longer be.
+            now = time.monotonic()
+            live = []
+            for item in batch:
+                deadline = item[3]
+                if not item[1].set_running_or_notify_cancel():
+                    self.cancelled += 1
+                elif deadline is not None and deadline <= now:
+                    self.expired += 1
+                    _resolve(item[1], error=DeadlineExceeded("Deadline passed while queued for scoring"))
+                else:
+                    live.append(item)
+            if not live:
+                continue
+            self.batch_sizes.observe(len(live))
+
+            records = [record for record, _, _, _ in live]
+            try:
+                results = self.predict_batch_fn(records)
+            except Exception as e:
+                for _, future, _, _ in live:
+                    _resolve(future, error=e)
+                continue
+
+            for (_, future, _, _), result in zip(live, results):
+                _resolve(future, result)
+
+    def stats(self):
+        return {
+            "config": {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "max_queue_depth": self.max_queue_depth
+            },
+            "queue_depth": self._queue.qsize(),
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "cancelled": self.cancelled,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
@@ -2,7 +2,14 @@
 Biological validation rules and reference ranges for supported animal species.
 Includes vital sign ranges (Temperature, Heart Rate, Respiration) and logic for
 detecting abnormalities.
+
+analyze_vitals_batch() checks a whole fleet at once: species are integer
+codes into REFERENCE_TABLE (see species_codes()), vitals are float arrays
+with NaN for "not measured", and the result is per-row flag and severity
+arrays. vitals_alerts() then builds alert messages for the rows that
+alert only. analyze_vitals() is the same check for one animal.
 """
+import numpy as np
 
 # Reference Ranges for Vital Signs
 # Source: Veterinary Manuals (Merck, etc.)
@@ -96,25 +103,107 @@ VITAL_SIGNS_REFERENCE = {
     }
 }
 
-def analyze_vitals(animal_type, temp=None, hr=None, rr=None):
+# Normalize animal strings (e.g. "Cow" -> "Cattle")
+SPECIES_ALIASES = {
+    'Cow': 'Cattle',
+    'Puppy': 'Dog',
+    'Kitten': 'Cat',
+    'Calf': 'Cattle',
+    'Foal': 'Horse'
+}
+
+# Species code -> species; REFERENCE_TABLE has one row per code
+SPECIES = list(VITAL_SIGNS_REFERENCE)
+SPECIES_CODES = {species: code for code, species in enumerate(SPECIES)}
+SPECIES_CODES.update({alias: SPECIES_CODES[species] for alias, species in SPECIES_ALIASES.items()})
+UNKNOWN_SPECIES = -1  # not in the table: generic mammal ranges and an INFO alert
+
+REFERENCE_COLUMNS = ('temp_min', 'temp_max', 'hr_min', 'hr_max', 'rr_min', 'rr_max')
+# One row per code, plus the generic ranges last so that UNKNOWN_SPECIES indexes them
+REFERENCE_TABLE = np.array([[ref[column] for column in REFERENCE_COLUMNS]
+                            for ref in [*VITAL_SIGNS_REFERENCE.values(), VITAL_SIGNS_REFERENCE['Unknown']]],
+                           dtype=np.float64)
+
+# Severity codes, in increasing order (an array's max is the worst alert)
+NORMAL, INFO, WARNING, CRITICAL = 0, 1, 2, 3
+SEVERITY_NAMES = ('NORMAL', 'INFO', 'WARNING', 'CRITICAL')
+
+# Per-vital flags
+LOW, HIGH = -1, 1
+
+VITAL_DECIMALS = 4  # float32 vitals are rounded to this in alert messages
+
+def species_codes(animal_types):
+    """Species codes (UNKNOWN_SPECIES when not in the table) for a sequence of animal names."""
+    return np.fromiter((SPECIES_CODES.get(a, UNKNOWN_SPECIES) for a in animal_types), dtype=np.int16,
+                       count=len(animal_types))
+
+VITALS = ('temperature', 'heart_rate', 'respiration')  # columns of the vitals matrix
+LOW_TABLE = np.ascontiguousarray(REFERENCE_TABLE[:, 0::2])  # code -> (temp_min, hr_min, rr_min)
+HIGH_TABLE = np.ascontiguousarray(REFERENCE_TABLE[:, 1::2])  # code -> (temp_max, hr_max, rr_max)
+# Out of range is a warning; hypothermia and high fever (> 1°C above range) are critical
+CRITICAL_LOW_TABLE = LOW_TABLE * [1, np.nan, np.nan]
+CRITICAL_HIGH_TABLE = HIGH_TABLE + [1.0, np.nan, np.nan]
+
+def _vital(values, n):
+    if values is None:
+        return np.full(n, np.nan)
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        values = values.astype(np.float64)  # None -> NaN
+    return values
+
+def _analyze(codes, vitals):
+    """Flags and severities for an (n, 3) matrix of temperature, heart rate and respiration."""
+    above, below = vitals > HIGH_TABLE[codes], vitals < LOW_TABLE[codes]  # NaN compares False
+    flags = above.view(np.int8) - below.view(np.int8)
+    severities = (above | below).view(np.int8) * np.int8(WARNING)
+    severities[(vitals < CRITICAL_LOW_TABLE[codes]) | (vitals > CRITICAL_HIGH_TABLE[codes])] = CRITICAL
+    severity = severities.max(axis=1, initial=NORMAL)
+    severity[(codes == UNKNOWN_SPECIES) & (severity == NORMAL)] = INFO
+    return flags, severities, severity
+
+def analyze_vitals_batch(codes, temps=None, hrs=None, rrs=None):
     """
-    Analyze vital signs against species-specific reference ranges.
-    Returns a list of alerts (if any).
+    Check many animals' vitals at once. `codes` are species codes (from
+    species_codes()); temps, hrs and rrs are equal-length arrays, or None
+    when that vital is not measured (NaN skips one row's check).
+
+    Returns a dict of arrays: the inputs ('species', 'temperature',
+    'heart_rate', 'respiration'), per-vital flags ('temp_flag', 'hr_flag',
+    'rr_flag': LOW, 0 or HIGH) and severities ('temp_severity',
+    'hr_severity', 'rr_severity'), and 'severity', the worst per row
+    (INFO for an unknown species with normal vitals).
     """
-    alerts = []
-    
-    # Normalize animal string (e.g. "Cow" -> "Cattle")
-    species_map = {
-        'Cow': 'Cattle',
-        'Puppy': 'Dog',
-        'Kitten': 'Cat',
-        'Calf': 'Cattle',
-        'Foal': 'Horse'
+    codes = np.asarray(codes)
+    n = len(codes)
+    temps, hrs, rrs = _vital(temps, n), _vital(hrs, n), _vital(rrs, n)
+    flags, severities, severity = _analyze(codes, np.stack([temps, hrs, rrs], axis=1).astype(np.float64, copy=False))
+    return {
+        'species': codes,
+        'temperature': temps,
+        'heart_rate': hrs,
+        'respiration': rrs,
+        'temp_flag': flags[:, 0],
+        'hr_flag': flags[:, 1],
+        'rr_flag': flags[:, 2],
+        'temp_severity': severities[:, 0],
+        'hr_severity': severities[:, 1],
+        'rr_severity': severities[:, 2],
+        'severity': severity,
     }
-    animal_key = species_map.get(animal_type, animal_type)
-    
-    # Fallback if species not found
-    if animal_key not in VITAL_SIGNS_REFERENCE:
+
+def _printable(values):
+    """Python floats for messages (float32 sensor values rounded, so 38.9 is not 38.900001525878906)."""
+    if values.dtype == np.float32:
+        values = np.round(values.astype(np.float64), VITAL_DECIMALS)
+    return values.tolist()
+
+def _row_alerts(result, i, animal_type, temp, hr, rr):
+    """Alert dicts for row i of analyze_vitals_batch(); temp, hr and rr are the values to print."""
+    code = result['species'][i]
+    alerts = []
+    if code == UNKNOWN_SPECIES:
         ref = VITAL_SIGNS_REFERENCE['Unknown']
         alerts.append({
             'severity': 'INFO',
@@ -122,41 +211,72 @@ def analyze_vitals(animal_type, temp=None, hr=None, rr=None):
             'param': 'Species'
         })
     else:
-        ref = VITAL_SIGNS_REFERENCE[animal_key]
-
-    # Check Temperature
-    if temp is not None:
-        if temp < ref['temp_min']:
-            alerts.append({
-                'severity': 'CRITICAL',
-                'message': f"Hypothermia Risk: {temp}°C is below normal range ({ref['temp_min']}-{ref['temp_max']}) for {animal_type}",
-                'param': 'Temperature'
-            })
-        elif temp > ref['temp_max']:
-            severity = 'CRITICAL' if temp > ref['temp_max'] + 1.0 else 'WARNING'
-            alerts.append({
-                'severity': severity,
-                'message': f"Fever Detected: {temp}°C is above normal range ({ref['temp_min']}-{ref['temp_max']}) for {animal_type}",
-                'param': 'Temperature'
-            })
-
-    # Check Heart Rate
-    if hr is not None:
-        if hr < ref['hr_min']:
-            alerts.append({
-                'severity': 'WARNING',
-                'message': f"Bradycardia (Low HR): {hr} bpm is below normal ({ref['hr_min']}-{ref['hr_max']})",
-                'param': 'Heart Rate'
-            })
-        elif hr > ref['hr_max']:
-            alerts.append({
-                'severity': 'WARNING',
-                'message': f"Tachycardia (High HR): {hr} bpm is above normal ({ref['hr_min']}-{ref['hr_max']})",
-                'param': 'Heart Rate'
-            })
+        ref = VITAL_SIGNS_REFERENCE[SPECIES[code]]
+
+    # Temperature
+    flag = result['temp_flag'][i]
+    if flag:
+        if flag == LOW:
+            message = f"Hypothermia Risk: {temp}°C is below normal range ({ref['temp_min']}-{ref['temp_max']}) for {animal_type}"
+        else:
+            message = f"Fever Detected: {temp}°C is above normal range ({ref['temp_min']}-{ref['temp_max']}) for {animal_type}"
+        alerts.append({'severity': SEVERITY_NAMES[result['temp_severity'][i]], 'message': message,
+                       'param': 'Temperature'})
 
+    # Heart Rate
+    flag = result['hr_flag'][i]
+    if flag:
+        if flag == LOW:
+            message = f"Bradycardia (Low HR): {hr} bpm is below normal ({ref['hr_min']}-{ref['hr_max']})"
+        else:
+            message = f"Tachycardia (High HR): {hr} bpm is above normal ({ref['hr_min']}-{ref['hr_max']})"
+        alerts.append({'severity': 'WARNING', 'message': message, 'param': 'Heart Rate'})
+
+    # Respiration
+    flag = result['rr_flag'][i]
+    if flag:
+        if flag == LOW:
+            message = f"Bradypnea (Low RR): {rr} breaths/min is below normal ({ref['rr_min']}-{ref['rr_max']})"
+        else:
+            message = f"Tachypnea (High RR): {rr} breaths/min is above normal ({ref['rr_min']}-{ref['rr_max']})"
+        alerts.append({'severity': 'WARNING', 'message': message, 'param': 'Respiration'})
+
+    return alerts
+
+def vitals_alerts(result, animal_types=None):
+    """
+    {row: [alert, ...]} for the rows of analyze_vitals_batch() that alert;
+    normal rows are skipped without formatting anything. `animal_types`
+    (the names the codes came from) are used in messages.
+    """
+    rows = np.flatnonzero(result['severity'])
+    values = zip(*(_printable(result[vital][rows]) for vital in VITALS))
+    alerts = {}
+    for i, (temp, hr, rr) in zip(rows.tolist(), values):
+        if animal_types is not None:
+            animal_type = animal_types[i]
+        else:
+            code = result['species'][i]
+            animal_type = 'Unknown' if code == UNKNOWN_SPECIES else SPECIES[code]
+        alerts[i] = _row_alerts(result, i, animal_type, temp, hr, rr)
+    return alerts
+
+def analyze_vitals(animal_type, temp=None, hr=None, rr=None):
+    """
+    Analyze vital signs against species-specific reference ranges.
+    Returns a list of alerts (if any).
+    """
+    code = SPECIES_CODES.get(animal_type, UNKNOWN_SPECIES)
+    codes = np.array([code])
+    flags, severities, severity = _analyze(codes, np.array([[temp, hr, rr]], dtype=np.float64))
+    if severity[0]:
+        result = {'species': codes, 'temp_flag': flags[:, 0], 'hr_flag': flags[:, 1], 'rr_flag': flags[:, 2],
+                  'temp_severity': severities[:, 0]}
+        alerts = _row_alerts(result, 0, animal_type, temp, hr, rr)
+    else:
+        alerts = []
     return {
-        'species': animal_key,
+        'species': SPECIES_ALIASES.get(animal_type, animal_type),
         'alerts': alerts,
-        'reference_used': ref
+        'reference_used': VITAL_SIGNS_REFERENCE['Unknown' if code == UNKNOWN_SPECIES else SPECIES[code]]
     }
@@ -0,0 +1,298 @@
+"""
+Compiled XGBoost Pipelines
+Extracts imputation values, scaler parameters and one-hot vocabularies from a
+fitted `preprocessor -> XGBClassifier` Pipeline (the Stage 1 and Stage 2
+layout built by scripts/retrain_models.py) so records can be encoded straight into a NumPy
+array and scored by the booster without pandas or sklearn in the hot path.
+
+The trees themselves are evaluated by xgboost (default) or, with
+VETNET_TREE_BACKEND=native, by the flat-array evaluator in
+src/forest_compiler.py, which lets the Booster objects be released.
+"""
+import os
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from src.forest_compiler import CompiledForest
+
+# Tree evaluation backend: 'xgboost' (Booster.inplace_predict) or 'native'
+TREE_BACKEND = os.environ.get('VETNET_TREE_BACKEND', 'xgboost')
+
+class _NumericBlock:
+    """SimpleImputer(mean/median/...) -> StandardScaler on numeric columns."""
+    def __init__(self, columns, steps, out_slice):
+        self.out_slice = out_slice
+        columns = list(columns)
+        fill = np.full(len(columns), np.nan)
+        mean = np.zeros(len(columns))
+        scale = np.ones(len(columns))
+        keep = np.ones(len(columns), dtype=bool)
+
+        for step in steps:
+            if isinstance(step, SimpleImputer):
+                _check_nan_missing(step)
+                fill = np.asarray(step.statistics_, dtype=np.float64)
+                # Columns that were all-NaN at fit time are dropped by the imputer
+                if not getattr(step, 'keep_empty_features', False):
+                    keep = ~np.isnan(fill)
+            elif isinstance(step, StandardScaler):
+                if step.with_mean and step.mean_ is not None:
+                    mean = np.asarray(step.mean_, dtype=np.float64)
+                if step.with_std and step.scale_ is not None:
+                    scale = np.asarray(step.scale_, dtype=np.float64)
+            else:
+                raise NotImplementedError(f"Unsupported numeric step: {type(step).__name__}")
+
+        self.columns = [c for c, k in zip(columns, keep) if k]
+        self.fill = fill[keep]
+        # Scaler parameters were fitted on the imputer output (kept columns only)
+        self.mean = mean if len(mean) == len(self.columns) else mean[keep]
+        self.scale = scale if len(scale) == len(self.columns) else scale[keep]
+
+    def export_state(self):
+        meta = {"kind": "numeric", "columns": self.columns,
+                "out_slice": [self.out_slice.start, self.out_slice.stop]}
+        return meta, {"fill": self.fill, "mean": self.mean, "scale": self.scale}
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        block = cls.__new__(cls)
+        block.out_slice = slice(*meta["out_slice"])
+        block.columns = list(meta["columns"])
+        block.fill, block.mean, block.scale = arrays["fill"], arrays["mean"], arrays["scale"]
+        return block
+
+    def encode(self, records, out, errors):
+        values = np.empty((len(records), len(self.columns)), dtype=np.float64)
+        for i, record in enumerate(records):
+            try:
+                for j, col in enumerate(self.columns):
+                    v = record.get(col)
+                    values[i, j] = np.nan if v is None else float(v)
+            except (TypeError, ValueError) as e:
+                errors[i] = str(e)
+                values[i] = self.fill
+
+        # Same operation order as SimpleImputer + StandardScaler
+        missing = np.isnan(values)
+        if missing.any():
+            values[missing] = np.broadcast_to(self.fill, values.shape)[missing]
+        values -= self.mean
+        values /= self.scale
+        out[:, self.out_slice] = values
+
+class _CategoricalBlock:
+    """SimpleImputer(constant) -> OneHotEncoder(handle_unknown='ignore')."""
+    def __init__(self, columns, steps, out_slice):
+        self.out_slice = out_slice
+        self.columns = list(columns)
+        self.fill = [None] * len(self.columns)
+        self.vocab = []
+
+        for step in steps:
+            if isinstance(step, SimpleImputer):
+                _check_nan_missing(step)
+                self.fill = list(step.statistics_)
+            elif isinstance(step, OneHotEncoder):
+                if step.handle_unknown != 'ignore' or step.drop is not None:
+                    raise NotImplementedError("Only OneHotEncoder(handle_unknown='ignore', drop=None) is supported")
+                offset = 0
+                for categories in step.categories_:
+                    self.vocab.append({value: offset + k for k, value in enumerate(categories)})
+                    offset += len(categories)
+                self.width = offset
+            else:
+                raise NotImplementedError(f"Unsupported categorical step: {type(step).__name__}")
+
+        if not self.vocab:
+            raise NotImplementedError("Categorical block without OneHotEncoder")
+
+    def export_state(self):
+        categories = [sorted(vocab, key=vocab.get) for vocab in self.vocab]
+        if not all(isinstance(v, str) for values in categories for v in values) or \
+                not all(isinstance(f, str) for f in self.fill if f is not None):
+            raise NotImplementedError("Only string categories can be exported")
+        meta = {"kind": "categorical", "columns": self.columns, "fill": self.fill,
+                "categories": categories, "out_slice": [self.out_slice.start, self.out_slice.stop]}
+        return meta, {}
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        block = cls.__new__(cls)
+        block.out_slice = slice(*meta["out_slice"])
+        block.columns = list(meta["columns"])
+        block.fill = list(meta["fill"])
+        block.vocab, offset = [], 0
+        for categories in meta["categories"]:
+            block.vocab.append({value: offset + k for k, value in enumerate(categories)})
+            offset += len(categories)
+        block.width = offset
+        return block
+
+    def encode(self, records, out, errors):
+        start = self.out_slice.start
+        for i, record in enumerate(records):
+            for col, fill, vocab in zip(self.columns, self.fill, self.vocab):
+                v = record.get(col)
+                # SimpleImputer on object columns only treats NaN (not None) as missing
+                if isinstance(v, float) and v != v:
+                    v = fill
+                k = vocab.get(v)
+                if k is not None:
+                    out[i, start + k] = 1.0
+
+def _check_nan_missing(imputer):
+    mv = imputer.missing_values
+    if not (isinstance(mv, float) and np.isnan(mv)):
+        raise NotImplementedError("Only missing_values=np.nan imputers are supported")
+
+def _step_list(transformer):
+    if isinstance(transformer, Pipeline):
+        return [step for _, step in transformer.steps if step not in (None, 'passthrough')]
+    return [transformer]
+
+class CompiledPipeline:
+    """
+    Drop-in replacement for a fitted Pipeline's predict_proba on
+    lists of input dicts. Numerically equivalent to
+    `pipeline.predict_proba(pd.DataFrame(records))`.
+    """
+    def __init__(self, pipeline, backend=None):
+        preprocessor = pipeline.named_steps.get('preprocessor')
+        model = pipeline.named_steps.get('model')
+        if not isinstance(preprocessor, ColumnTransformer) or model is None:
+            raise NotImplementedError("Expected a 'preprocessor' ColumnTransformer and a 'model' step")
+
+        self.blocks = []
+        self.n_features = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == 'drop':
+                continue
+            out_slice = preprocessor.output_indices_[name]
+            if out_slice.stop == out_slice.start:
+                continue
+            steps = _step_list(transformer)
+            if any(isinstance(s, OneHotEncoder) for s in steps):
+                block = _CategoricalBlock(columns, steps, out_slice)
+            else:
+                block = _NumericBlock(columns, steps, out_slice)
+            self.blocks.append(block)
+            self.n_features = max(self.n_features, out_slice.stop)
+
+        self.required_columns = set()
+        for block in self.blocks:
+            self.required_columns.update(block.columns)
+
+        if model.objective == 'multi:softmax':
+            raise NotImplementedError("multi:softmax boosters do not output probabilities")
+        self.objective = model.objective
+        self.n_classes = model.n_classes_
+        self.missing = model.missing
+        best_iteration = getattr(model, 'best_iteration', None)
+        self.iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        self.classes_ = np.asarray(pipeline.classes_)
+
+        self.backend = backend or TREE_BACKEND
+        if self.backend == 'native':
+            if not (isinstance(self.missing, float) and np.isnan(self.missing)):
+                raise NotImplementedError("Native backend requires missing=np.nan")
+            self.forest = CompiledForest.from_booster(model.get_booster(), self.iteration_range)
+            self.booster = None
+        elif self.backend == 'xgboost':
+            self.forest = None
+            self.booster = model.get_booster()
+        else:
+            raise ValueError(f"Unknown tree backend: {self.backend}")
+
+    def export_state(self):
+        """
+        Split into a JSON-able meta dict and named arrays (see src/model_bundle.py).
+        Only the native backend can be exported, since its trees are plain arrays.
+        """
+        if self.forest is None:
+            raise NotImplementedError("Only native-backend pipelines can be exported")
+        meta = {
+            "n_features": self.n_features,
+            "required_columns": sorted(self.required_columns),
+            "objective": self.objective,
+            "n_classes": int(self.n_classes),
+            "classes": [int(c) for c in self.classes_],
+            "blocks": [],
+        }
+        arrays = {}
+        for i, block in enumerate(self.blocks):
+            block_meta, block_arrays = block.export_state()
+            meta["blocks"].append(block_meta)
+            for name, a in block_arrays.items():
+                arrays[f"block{i}/{name}"] = a
+        forest_meta, forest_arrays = self.forest.export_state()
+        meta["forest"] = forest_meta
+        for name, a in forest_arrays.items():
+            arrays[f"forest/{name}"] = a
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        """Rebuild a native-backend pipeline from `export_state()` output."""
+        compiled = cls.__new__(cls)
+        compiled.blocks = []
+        for i, block_meta in enumerate(meta["blocks"]):
+            prefix = f"block{i}/"
+            block_arrays = {k[len(prefix):]: a for k, a in arrays.items() if k.startswith(prefix)}
+            block_cls = _CategoricalBlock if block_meta["kind"] == "categorical" else _NumericBlock
+            compiled.blocks.append(block_cls.from_state(block_meta, block_arrays))
+        compiled.n_features = meta["n_features"]
+        compiled.required_columns = set(meta["required_columns"])
+        compiled.objective = meta["objective"]
+        compiled.n_classes = meta["n_classes"]
+        compiled.missing = np.nan
+        compiled.iteration_range = (0, 0)
+        compiled.classes_ = np.asarray(meta["classes"])
+        compiled.backend = 'native'
+        forest_arrays = {k[len("forest/"):]: a for k, a in arrays.items() if k.startswith("forest/")}
+        compiled.forest = CompiledForest.from_state(meta["forest"], forest_arrays)
+        compiled.booster = None
+        return compiled
+
+    def transform(self, records):
+        """
+        Encode records into the model's feature matrix.
+
+        Returns (X, errors) where `errors` maps row index -> message for
+        records whose values could not be converted.
+        """
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        errors = {}
+        for i, record in enumerate(records):
+            missing = self.required_columns.difference(record)
+            if missing:
+                errors[i] = f"columns are missing: {missing}"
+        for block in self.blocks:
+            block.encode(records, X, errors)
+        return X, errors
+
+    def predict_proba_matrix(self, X):
+        if self.forest is not None:
+            return self.forest.predict_proba(X)
+        probs = self.booster.inplace_predict(X, iteration_range=self.iteration_range, missing=self.missing)
+        if probs.ndim == 1:
+            # binary:logistic returns P(class 1) only
+            probs = np.vstack([1.0 - probs, probs]).T
+        return probs
+
+    def predict_proba(self, records):
+        X, errors = self.transform(records)
+        if errors:
+            i, message = next(iter(errors.items()))
+            raise ValueError(f"Record {i}: {message}")
+        return self.predict_proba_matrix(X)
+
+def compile_pipeline(pipeline, backend=None):
+    """Compile a fitted Pipeline, or return None if its layout is unsupported."""
+    try:
+        return CompiledPipeline(pipeline, backend)
+    except (NotImplementedError, AttributeError, KeyError) as e:
+        print(f"⚠️ Pipeline not compiled ({e}); using sklearn path")
+        return None
@@ -13,6 +13,58 @@ import os
 
 DEVICE = torch.device('cuda' if torch.cuda.is_available() else "cpu")
 
+def load_test_split(scaler, species_encoder, category_encoder, data_path='data/enhanced_training_data.csv'):
+    """
+    Rebuild the held-out split used by train_nn.py.
+
+    Returns (X_num_test_scaled, X_cat_test, y_test).
+    """
+    df = pd.read_csv(data_path)
+    print(f"✅ Loaded {len(df)} samples for evaluation")
+    
+    # Prepare inputs (Reconstruct logic from training)
+    numeric_cols = ['Age', 'WBC', 'RBC', 'Hemoglobin', 'Platelets', 'Glucose', 'ALT', 'AST', 'Urea', 'Creatinine']
+    extra_cols = ['WBC_RBC_Ratio', 'ALT_AST_Ratio', 'Urea_Creat_Ratio']
+    for col in extra_cols:
+        if col in df.columns:
+            numeric_cols.append(col)
+            
+    symptom_cols = [c for c in df.columns if c.startswith('Symptom_')]
+    
+    numeric_data = df[numeric_cols + symptom_cols].values
+    species_encoded = species_encoder.transform(df['Animal'])
+    y_encoded = category_encoder.transform(df['Category'])
+    
+    # Train/Test Split (Same random state as training)
+    # We only care about X_test and y_test
+    _, X_num_test, _, X_cat_test, _, y_test = train_test_split(
+        numeric_data, species_encoded, y_encoded, test_size=0.2, stratify=y_encoded, random_state=42
+    )
+    
+    # Impute (as in training) and scale numeric
+    if os.path.exists('models/vetnet_imputer.pkl'):
+        X_num_test = joblib.load('models/vetnet_imputer.pkl').transform(X_num_test)
+    X_num_test_scaled = scaler.transform(X_num_test)
+    return X_num_test_scaled, X_cat_test, y_test
+
+def predict_categories(model, X_num, X_cat, batch_size=32, device=DEVICE):
+    """Category index predictions for any VetNet variant (eager, frozen or int8)."""
+    predictions = []
+    
+    with torch.no_grad():
+        for i in range(0, len(X_num), batch_size):
+            batch_num = X_num[i:i+batch_size]
+            batch_cat = X_cat[i:i+batch_size]
+            
+            t_num = torch.tensor(batch_num, dtype=torch.float32).to(device)
+            t_cat = torch.tensor(batch_cat, dtype=torch.long).to(device)
+            
+            logits = model(t_num, t_cat)
+            _, preds = torch.max(logits, 1)
+            predictions.extend(preds.cpu().numpy())
+            
+    return np.array(predictions)
+
 def evaluate_vetnet():
     print("\n" + "="*60)
     print("EVALUATING VETNET (PYTORCH)")
@@ -48,50 +100,11 @@ def evaluate_vetnet():
     model.eval()
     
     # 2. Load Data for Evaluation
-    data_path = 'data/enhanced_training_data.csv'
-    df = pd.read_csv(data_path)
-    print(f"✅ Loaded {len(df)} samples for evaluation")
-    
-    # Prepare inputs (Reconstruct logic from training)
-    numeric_cols = ['Age', 'WBC', 'RBC', 'Hemoglobin', 'Platelets', 'Glucose', 'ALT', 'AST', 'Urea', 'Creatinine']
-    extra_cols = ['WBC_RBC_Ratio', 'ALT_AST_Ratio', 'Urea_Creat_Ratio']
-    for col in extra_cols:
-        if col in df.columns:
-            numeric_cols.append(col)
-            
-    symptom_cols = [c for c in df.columns if c.startswith('Symptom_')]
-    
-    numeric_data = df[numeric_cols + symptom_cols].values
-    species_encoded = species_encoder.transform(df['Animal'])
-    y_encoded = category_encoder.transform(df['Category'])
-    
-    # Train/Test Split (Same random state as training)
-    # We only care about X_test and y_test
-    _, X_num_test, _, X_cat_test, _, y_test = train_test_split(
-        numeric_data, species_encoded, y_encoded, test_size=0.2, stratify=y_encoded, random_state=42
-    )
-    
-    # Scale Numeric
-    X_num_test_scaled = scaler.transform(X_num_test)
+    X_num_test_scaled, X_cat_test, y_test = load_test_split(scaler, species_encoder, category_encoder)
     
     # 3. Inference
     print("🚀 Running Inference on Test Set...")
-    batch_size = 32
-    predictions = []
-    
-    with torch.no_grad():
-        for i in range(0, len(X_num_test_scaled), batch_size):
-            batch_num = X_num_test_scaled[i:i+batch_size]
-            batch_cat = X_cat_test[i:i+batch_size]
-            
-            t_num = torch.tensor(batch_num, dtype=torch.float32).to(DEVICE)
-            t_cat = torch.tensor(batch_cat, dtype=torch.long).to(DEVICE)
-            
-            logits = model(t_num, t_cat)
-            _, preds = torch.max(logits, 1)
-            predictions.extend(preds.cpu().numpy())
-            
-    y_pred = np.array(predictions)
+    y_pred = predict_categories(model, X_num_test_scaled, X_cat_test)
     
     # 4. Metrics
     accuracy = accuracy_score(y_test, y_pred)
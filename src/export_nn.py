@@ -0,0 +1,172 @@
+"""
+Export VetNet for CPU Serving
+Folds every BatchNorm1d into the Linear layer before it, drops the Dropout
+layers (identity at inference time) and saves a scripted + frozen TorchScript
+artifact next to models/vetnet_best_state.pth.
+
+The int8 variant additionally applies dynamic quantization to the Linear
+layers and is only written if its held-out category accuracy is within
+--max-accuracy-drop percentage points of the float model.
+
+Usage:
+    python src/export_nn.py                  # writes models/vetnet_frozen.pt
+    python src/export_nn.py --variant int8   # writes models/vetnet_int8.pt (gated)
+"""
+import sys
+import os
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import joblib
+from src.models.neural_network import VetNet
+
+STATE_PATH = 'models/vetnet_best_state.pth'
+FROZEN_PATH = 'models/vetnet_frozen.pt'
+INT8_PATH = 'models/vetnet_int8.pt'
+
+# Largest held-out category accuracy loss (percentage points) allowed for int8
+MAX_ACCURACY_DROP = float(os.environ.get('VETNET_INT8_MAX_ACCURACY_DROP', 0.5))
+
+# Max allowed |eager - frozen| on the logits before an export is rejected
+EXPORT_ATOL = 1e-4
+
+def fold_linear_bn(linear, bn):
+    """Return a Linear equivalent to bn(linear(x)) with the BatchNorm in eval mode."""
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    bias = linear.bias if linear.bias is not None else torch.zeros_like(bn.running_mean)
+
+    fused = nn.Linear(linear.in_features, linear.out_features)
+    with torch.no_grad():
+        fused.weight.copy_(linear.weight * scale[:, None])
+        fused.bias.copy_((bias - bn.running_mean) * scale + bn.bias)
+    return fused
+
+class FrozenVetNet(nn.Module):
+    """VetNet's eval-mode forward pass with BatchNorm folded and Dropout removed."""
+    def __init__(self, model):
+        super(FrozenVetNet, self).__init__()
+        self.embedding_dim = model.embedding_dim
+        self.fc_num1 = fold_linear_bn(model.fc_num1, model.bn_num1)
+        self.species_embed = model.species_embed
+        self.fc1 = fold_linear_bn(model.fc1, model.bn1)
+        self.fc2 = fold_linear_bn(model.fc2, model.bn2)
+        self.output = model.output
+
+    def forward(self, x_num, x_cat):
+        x_n = F.relu(self.fc_num1(x_num))
+        x_c = self.species_embed(x_cat).view(-1, self.embedding_dim)
+        x = torch.cat((x_n, x_c), dim=1)
+        x = F.relu(self.fc1(x))
+        x = F.relu(self.fc2(x))
+        return self.output(x)
+
+def load_eager_vetnet(state_path=STATE_PATH):
+    """Rebuild the trained eager VetNet on CPU (dims come from the saved encoders/scaler)."""
+    scaler = joblib.load('models/vetnet_scaler.pkl')
+    species_encoder = joblib.load('models/species_encoder.pkl')
+    category_encoder = joblib.load('models/category_encoder.pkl')
+
+    model = VetNet(len(category_encoder.classes_), len(species_encoder.classes_),
+                   numeric_dim=scaler.n_features_in_)
+    model.load_state_dict(torch.load(state_path, map_location='cpu'))
+    model.eval()
+    return model
+
+def freeze_vetnet(model):
+    """Script and freeze a folded copy of `model` (returns a torch.jit.ScriptModule)."""
+    model.eval()
+    folded = FrozenVetNet(model).eval()
+    return torch.jit.freeze(torch.jit.script(folded))
+
+def quantize_vetnet(model):
+    """Folded VetNet with int8 dynamically quantized Linear layers, scripted and frozen."""
+    model.eval()
+    folded = FrozenVetNet(model).eval()
+    quantized = torch.ao.quantization.quantize_dynamic(folded, {nn.Linear}, dtype=torch.qint8)
+    return torch.jit.freeze(torch.jit.script(quantized))
+
+def max_logit_diff(model_a, model_b, numeric_dim, n_species, n_rows=256):
+    """Largest absolute logit difference between two models on random inputs."""
+    generator = torch.Generator().manual_seed(0)
+    x_num = torch.randn(n_rows, numeric_dim, generator=generator) * 2
+    x_cat = torch.randint(0, n_species, (n_rows,), generator=generator)
+    with torch.no_grad():
+        return (model_a(x_num, x_cat) - model_b(x_num, x_cat)).abs().max().item()
+
+def export_frozen_vetnet(state_path=STATE_PATH, output_path=FROZEN_PATH):
+    """Fold, script, freeze and save VetNet. Refuses to write a mismatching artifact."""
+    print("\n" + "="*60)
+    print("EXPORTING VETNET (FOLDED + FROZEN)")
+    print("="*60)
+
+    model = load_eager_vetnet(state_path)
+    frozen = freeze_vetnet(model)
+
+    diff = max_logit_diff(model, frozen, model.numeric_dim, model.n_species)
+    if diff > EXPORT_ATOL:
+        raise RuntimeError(f"Frozen VetNet differs from eager model (max logit diff {diff:.2e})")
+    print(f"✅ Frozen model matches eager model (max logit diff {diff:.2e})")
+
+    torch.jit.save(frozen, output_path)
+    print(f"✅ Saved frozen VetNet to {output_path}")
+    return output_path
+
+def export_int8_vetnet(state_path=STATE_PATH, output_path=INT8_PATH, max_accuracy_drop=MAX_ACCURACY_DROP):
+    """
+    Quantize VetNet to int8 and save it only if it passes the accuracy gate.
+
+    Returns the output path, or None if the gate refused the artifact.
+    """
+    from src.evaluate_nn import load_test_split, predict_categories
+
+    print("\n" + "="*60)
+    print("EXPORTING VETNET (INT8 DYNAMIC QUANTIZATION)")
+    print("="*60)
+
+    model = load_eager_vetnet(state_path)
+    quantized = quantize_vetnet(model)
+
+    # Accuracy gate on the held-out split from train_nn.py
+    X_num, X_cat, y_test = load_test_split(joblib.load('models/vetnet_scaler.pkl'),
+                                           joblib.load('models/species_encoder.pkl'),
+                                           joblib.load('models/category_encoder.pkl'))
+    fp32_acc = (predict_categories(model, X_num, X_cat, device='cpu') == y_test).mean() * 100
+    int8_acc = (predict_categories(quantized, X_num, X_cat, device='cpu') == y_test).mean() * 100
+    drop = fp32_acc - int8_acc
+    print(f"📊 Category accuracy: fp32 {fp32_acc:.2f}% | int8 {int8_acc:.2f}% | drop {drop:.2f} pts "
+          f"(max {max_accuracy_drop:.2f})")
+
+    if drop > max_accuracy_drop:
+        print(f"❌ int8 model refused: accuracy drop {drop:.2f} pts exceeds {max_accuracy_drop:.2f}; "
+              f"{output_path} not written")
+        return None
+
+    torch.jit.save(quantized, output_path)
+    size_kb = os.path.getsize(output_path) / 1024
+    print(f"✅ Saved int8 VetNet to {output_path} ({size_kb:.0f} KB)")
+    return output_path
+
+def main(argv=None):
+    """Command line entry point; returns the process exit code (1 if the int8 gate refused)."""
+    parser = argparse.ArgumentParser(description="Export VetNet as a folded, frozen TorchScript artifact")
+    parser.add_argument('--variant', choices=['frozen', 'int8'], default='frozen',
+                        help="frozen: folded fp32 model; int8: dynamically quantized Linear layers")
+    parser.add_argument('--state', default=STATE_PATH, help="Trained VetNet state_dict")
+    parser.add_argument('--output', default=None, help="Where to write the TorchScript artifact")
+    parser.add_argument('--max-accuracy-drop', type=float, default=MAX_ACCURACY_DROP,
+                        help="int8 only: allowed category accuracy loss in percentage points")
+    args = parser.parse_args(argv)
+
+    if args.variant == 'int8':
+        if export_int8_vetnet(args.state, args.output or INT8_PATH, args.max_accuracy_drop) is None:
+            return 1
+    else:
+        export_frozen_vetnet(args.state, args.output or FROZEN_PATH)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
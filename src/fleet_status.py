@@ -0,0 +1,162 @@
+"""
+Fleet Status Index
+One dashboard record per device, updated once when its reading arrives, so
+/iot/dashboard/summary no longer walks every device and re-runs vitals
+analysis on each poll.
+
+- update() replaces a device's record (latest reading, status, alert
+  messages) and bumps version counters: one for the fleet, one per status
+  and one per species the record moved out of or into.
+- summary() filters the records by status, species and staleness and
+  pages them in first-seen order.
+- render() caches the JSON of each query together with the versions its
+  filters depend on. A poll that no update could have changed gets the
+  cached body and ETag back (and a 304 with a matching If-None-Match).
+  Entries are rebuilt after SUMMARY_MAX_AGE_S anyway, since seconds_ago
+  and staleness move with the clock. The ETag covers the query, its
+  versions and which listed devices are stale, not the clock-driven
+  fields, so a rebuild that changed nothing keeps it.
+
+Updates come from the event loop; the lock keeps readers in other threads
+(metrics collectors) consistent.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+STATUSES = ("HEALTHY", "WARNING", "CRITICAL")
+DEVICE_STALE_S = float(os.environ.get('VETNET_DEVICE_STALE_S', 300))  # no reading for this long = stale
+SUMMARY_MAX_AGE_S = float(os.environ.get('VETNET_FLEET_SUMMARY_MAX_AGE_S', 5))
+SUMMARY_CACHE_SIZE = int(os.environ.get('VETNET_FLEET_SUMMARY_CACHE', 64))  # cached queries
+
+def dashboard_status(alerts):
+    """HEALTHY, WARNING or CRITICAL from a reading's vitals alerts (INFO alone is healthy)."""
+    severities = {alert['severity'] for alert in alerts}
+    if 'CRITICAL' in severities:
+        return "CRITICAL"
+    return "WARNING" if 'WARNING' in severities else "HEALTHY"
+
+class FleetStatusIndex:
+    """Latest status per device, with versioned, cached summary queries."""
+    def __init__(self, max_age_s=SUMMARY_MAX_AGE_S, cache_size=SUMMARY_CACHE_SIZE):
+        self.max_age_s = max_age_s
+        self.cache_size = cache_size
+        self._records = {}  # device_id -> record, in first-seen order
+        self.version = 0
+        self._status_versions = dict.fromkeys(STATUSES, 0)
+        self._species_versions = {}
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self._cache = OrderedDict()  # query -> (versions, built_at, etag, body)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, device_id, animal_id, species, timestamp, status, temperature=None, heart_rate=None,
+               activity=None, battery=None, alerts=()):
+        """Replace a device's record with its newest reading; O(1)."""
+        record = {
+            "device_id": device_id,
+            "animal_id": animal_id,
+            "species": species,
+            "last_seen": timestamp,
+            "status": status,
+            "temperature": temperature,
+            "heart_rate": heart_rate,
+            "activity": activity,
+            "battery": battery,
+            "alerts": list(alerts),
+        }
+        with self._lock:
+            old = self._records.get(device_id)
+            self._records[device_id] = record
+            self.version += 1
+            if old is not None:
+                self.counts[old["status"]] -= 1
+                self._bump(old["status"], old["species"])
+            self.counts[status] += 1
+            if old is None or (old["status"], old["species"]) != (status, species):
+                self._bump(status, species)
+
+    def _bump(self, status, species):
+        self._status_versions[status] += 1
+        self._species_versions[species] = self._species_versions.get(species, 0) + 1
+
+    def _versions(self, statuses, species):
+        """Versions a query's result depends on (any update that could change it bumps one)."""
+        if not statuses and not species:
+            return (self.version,)
+        return (tuple(self._status_versions[s] for s in statuses or ()),
+                tuple(self._species_versions.get(s, 0) for s in species or ()))
+
+    def summary(self, statuses=None, species=None, stale=None, stale_after_s=DEVICE_STALE_S, offset=0,
+                limit=None, now=None):
+        """
+        Devices matching every given filter, first seen first: `statuses` and
+        `species` are collections to match, `stale` True/False keeps only
+        devices silent for more / no more than `stale_after_s` seconds.
+        Returns one page of `limit` devices from `offset` and the total.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            records = list(self._records.values())
+        devices = []
+        total = 0
+        end = None if limit is None else offset + limit
+        for record in records:
+            if statuses and record["status"] not in statuses:
+                continue
+            if species and record["species"] not in species:
+                continue
+            age = now - record["last_seen"]
+            is_stale = age > stale_after_s
+            if stale is not None and is_stale != stale:
+                continue
+            if total >= offset and (end is None or total < end):
+                devices.append(dict(record, seconds_ago=int(age), stale=is_stale))
+            total += 1
+        return {"devices": devices, "count": len(devices), "total": total, "offset": offset, "limit": limit,
+                "generated_at": now}
+
+    def render(self, statuses=None, species=None, stale=None, stale_after_s=DEVICE_STALE_S, offset=0, limit=None):
+        """(etag, JSON bytes) of summary(), from the cache when nothing it depends on changed."""
+        statuses = tuple(sorted(statuses)) if statuses else None
+        species = tuple(sorted(species)) if species else None
+        key = (statuses, species, stale, stale_after_s, offset, limit)
+        now = time.time()
+        with self._lock:
+            versions = self._versions(statuses, species)
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == versions and now - entry[1] < self.max_age_s:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[2], entry[3]
+            self.misses += 1
+
+        summary = self.summary(statuses, species, stale, stale_after_s, offset, limit, now=now)
+        body = json.dumps(summary).encode()
+        state = (key, versions, summary["total"], [(d["device_id"], d["stale"]) for d in summary["devices"]])
+        etag = '"' + hashlib.blake2b(repr(state).encode(), digest_size=12).hexdigest() + '"'
+        with self._lock:
+            self._cache[key] = (versions, now, etag, body)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return etag, body
+
+    def __len__(self):
+        return len(self._records)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "devices": len(self._records),
+                "status_counts": dict(self.counts),
+                "version": self.version,
+                "cached_queries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,220 @@
+"""
+Native XGBoost Forest Evaluator
+Converts a trained XGBoost booster into a flat array-of-nodes layout and
+evaluates it with a numba kernel (or a vectorized NumPy fallback), so the
+serving process does not need to keep xgboost Booster objects resident.
+
+Layout (one entry per node, all trees concatenated):
+    feature    int32    split feature index, -1 for leaves
+    threshold  float32  split condition (go left if x < threshold);
+                        for leaves, the leaf value
+    left/right int32    global child node index; leaves point to themselves
+    default_left uint8  branch taken when the feature value is missing (NaN)
+"""
+import json
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+SUPPORTED_OBJECTIVES = ('multi:softprob', 'binary:logistic')
+
+# Rows pushed through each tree together by the numba kernel, so a tree's
+# nodes stay in cache while a block of rows is evaluated
+ROW_BLOCK = 64
+
+def _margin_kernel_impl(X, feature, threshold, left, right, default_left, roots, tree_group, out):
+    # Accumulates leaf values tree by tree in float32, in the booster's
+    # tree order, which reproduces xgboost's margins exactly.
+    n_rows = X.shape[0]
+    n_trees = roots.shape[0]
+    for r0 in range(0, n_rows, ROW_BLOCK):
+        r1 = min(r0 + ROW_BLOCK, n_rows)
+        for t in range(n_trees):
+            root = roots[t]
+            group = tree_group[t]
+            for i in range(r0, r1):
+                node = root
+                while feature[node] >= 0:
+                    x = X[i, feature[node]]
+                    if x != x:
+                        node = left[node] if default_left[node] else right[node]
+                    elif x < threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                out[i, group] += threshold[node]
+
+if NUMBA_AVAILABLE:
+    # nogil lets concurrent request threads evaluate forests in parallel
+    _margin_kernel = njit(nogil=True, cache=True)(_margin_kernel_impl)
+
+# Rows evaluated together by the NumPy kernel (bounds the (rows x trees) scratch arrays)
+_NUMPY_BLOCK_ELEMENTS = 1 << 21
+
+# Constructor arrays, in order, as stored by export_state()
+_STATE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'default_left', 'roots', 'tree_group', 'base_margin')
+
+class CompiledForest:
+    """
+    Flat, read-only representation of a gbtree booster.
+
+    Use `from_booster` to build one; `predict_proba` matches the booster's
+    `inplace_predict` output for the supported objectives.
+    """
+    def __init__(self, feature, threshold, left, right, default_left, roots, tree_group,
+                 base_margin, objective, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.roots = roots
+        self.tree_group = tree_group
+        self.base_margin = base_margin
+        self.objective = objective
+        self.max_depth = max_depth
+        self.n_groups = len(base_margin)
+        self._group_order = np.argsort(tree_group, kind='stable')
+        self._group_starts = np.searchsorted(tree_group[self._group_order], np.arange(self.n_groups))
+
+    @classmethod
+    def from_booster(cls, booster, iteration_range=(0, 0)):
+        model = json.loads(booster.save_raw('json'))
+        learner = model['learner']
+        objective = learner['objective']['name']
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise NotImplementedError(f"Unsupported objective: {objective}")
+
+        gbm = learner['gradient_booster']
+        if gbm['name'] != 'gbtree':
+            raise NotImplementedError(f"Unsupported booster: {gbm['name']}")
+        trees = gbm['model']['trees']
+        tree_info = gbm['model']['tree_info']
+
+        # Honour best_iteration style ranges (iteration_indptr maps rounds -> trees)
+        begin, end = iteration_range
+        if end:
+            indptr = gbm['model']['iteration_indptr']
+            trees = trees[indptr[begin]:indptr[end]]
+            tree_info = tree_info[indptr[begin]:indptr[end]]
+
+        n_nodes = sum(len(t['left_children']) for t in trees)
+        feature = np.empty(n_nodes, dtype=np.int32)
+        threshold = np.empty(n_nodes, dtype=np.float32)
+        left = np.empty(n_nodes, dtype=np.int32)
+        right = np.empty(n_nodes, dtype=np.int32)
+        default_left = np.empty(n_nodes, dtype=np.uint8)
+        roots = np.empty(len(trees), dtype=np.int32)
+
+        offset = 0
+        max_depth = 0
+        for t_idx, tree in enumerate(trees):
+            if any(tree['split_type']):
+                raise NotImplementedError("Categorical splits are not supported")
+            lc = np.asarray(tree['left_children'], dtype=np.int32)
+            rc = np.asarray(tree['right_children'], dtype=np.int32)
+            size = len(lc)
+            ids = np.arange(offset, offset + size, dtype=np.int32)
+            is_leaf = lc == -1
+
+            feature[offset:offset + size] = np.where(is_leaf, -1, tree['split_indices'])
+            threshold[offset:offset + size] = tree['split_conditions']
+            left[offset:offset + size] = np.where(is_leaf, ids, lc + offset)
+            right[offset:offset + size] = np.where(is_leaf, ids, rc + offset)
+            default_left[offset:offset + size] = tree['default_left']
+            roots[t_idx] = offset
+            max_depth = max(max_depth, _tree_depth(lc, rc))
+            offset += size
+
+        n_groups = int(learner['learner_model_param'].get('num_class', '0')) or 1
+        base_score = np.atleast_1d(np.asarray(
+            json.loads(learner['learner_model_param']['base_score']), dtype=np.float32))
+        if objective == 'binary:logistic':
+            # Stored as a probability; trees start from its logit
+            base_score = np.log(base_score / (1 - base_score)).astype(np.float32)
+        base_margin = np.broadcast_to(base_score, (n_groups,)).copy()
+
+        forest = cls(feature, threshold, left, right, default_left, roots,
+                     np.asarray(tree_info, dtype=np.int32), base_margin, objective, max_depth)
+        forest._check_against(booster, iteration_range)
+        return forest
+
+    def _check_against(self, booster, iteration_range):
+        """Refuse to serve a layout that does not reproduce the booster."""
+        n_features = booster.num_features()
+        rng = np.random.default_rng(0)
+        probe = rng.normal(0, 2, size=(8, n_features)).astype(np.float32)
+        probe[0] = np.nan
+        expected = booster.inplace_predict(probe, iteration_range=iteration_range, predict_type='margin')
+        actual = self.predict_margin(probe)
+        if not np.allclose(actual.reshape(expected.shape), expected, rtol=1e-5, atol=1e-5):
+            raise NotImplementedError("Compiled forest does not reproduce booster margins")
+
+    def export_state(self):
+        meta = {"objective": self.objective, "max_depth": int(self.max_depth)}
+        arrays = {name: getattr(self, name) for name in _STATE_ARRAYS}
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        """Rebuild from `export_state()` output; arrays may be read-only views (mmap)."""
+        return cls(*(arrays[name] for name in _STATE_ARRAYS), meta["objective"], meta["max_depth"])
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right,
+                                      self.default_left, self.roots, self.tree_group))
+
+    def predict_margin(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty((X.shape[0], self.n_groups), dtype=np.float32)
+        out[:] = self.base_margin
+        if NUMBA_AVAILABLE:
+            _margin_kernel(X, self.feature, self.threshold, self.left, self.right,
+                           self.default_left, self.roots, self.tree_group, out)
+        else:
+            self._numpy_margin(X, out)
+        return out
+
+    def _numpy_margin(self, X, out):
+        n_trees = len(self.roots)
+        block = max(1, _NUMPY_BLOCK_ELEMENTS // max(n_trees, 1))
+        for start in range(0, X.shape[0], block):
+            Xb = X[start:start + block]
+            rows = np.arange(Xb.shape[0])[:, None]
+            node = np.broadcast_to(self.roots, (Xb.shape[0], n_trees)).copy()
+            # Every root-to-leaf path has at most max_depth splits; leaves self-loop
+            for _ in range(self.max_depth):
+                x = Xb[rows, self.feature[node]]
+                go_left = (x < self.threshold[node]) | (np.isnan(x) & (self.default_left[node] == 1))
+                node = np.where(go_left, self.left[node], self.right[node])
+            leaf_values = self.threshold[node].astype(np.float64)
+            # Sum leaves per output group (trees pre-sorted by group)
+            margins = np.add.reduceat(leaf_values[:, self._group_order], self._group_starts, axis=1)
+            out[start:start + block] += margins.astype(np.float32)
+
+    def predict_proba(self, X):
+        margin = self.predict_margin(X)
+        if self.objective == 'binary:logistic':
+            p = 1.0 / (1.0 + np.exp(-margin[:, 0]))
+            return np.column_stack([1.0 - p, p]).astype(np.float32)
+        # multi:softprob
+        margin = margin - margin.max(axis=1, keepdims=True)
+        np.exp(margin, out=margin)
+        margin /= margin.sum(axis=1, keepdims=True)
+        return margin
+
+def _tree_depth(left_children, right_children):
+    depth, frontier = 0, [0]
+    while True:
+        children = [c for n in frontier for c in (left_children[n], right_children[n]) if c != -1]
+        if not children:
+            return depth
+        depth += 1
+        frontier = children
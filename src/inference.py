@@ -7,6 +7,7 @@ Includes biological validation.
 import pandas as pd
 import numpy as np
 from src.model_compatibility import load_compatible_models, suppress_sklearn_warnings
+from src.compiled_pipeline import TREE_BACKEND, compile_pipeline
 from src.biological_validation import (
     validate_prediction,
     get_disease_prevalence,
@@ -21,12 +22,37 @@ suppress_sklearn_warnings()
 try:
     print("Loading models with compatibility fixes...")
     stage1_pipeline, stage2_models, category_encoder, disease_encoders = load_compatible_models()
+
+    # VETNET_TREE_BACKEND=native: evaluate the forests from flat arrays and
+    # release the xgboost Boosters (pipelines that fail to compile are kept)
+    stage1_compiled = None
+    stage2_compiled = {}
+    if TREE_BACKEND == 'native':
+        stage1_compiled = compile_pipeline(stage1_pipeline)
+        if stage1_compiled is not None:
+            stage1_pipeline = None
+        for cat, pipe in stage2_models.items():
+            stage2_compiled[cat] = compile_pipeline(pipe)
+            if stage2_compiled[cat] is not None:
+                stage2_models[cat] = None
+        n_compiled = (stage1_compiled is not None) + sum(1 for c in stage2_compiled.values() if c)
+        print(f"🌲 Native tree backend: {n_compiled}/{1 + len(stage2_compiled)} forests compiled")
     print("✅ Models loaded successfully")
     MODELS_LOADED = True
 except Exception as e:
     print(f"❌ Failed to load models: {e}")
     MODELS_LOADED = False
 
+def _predict_with(compiled, pipeline, input_dict, input_df):
+    """Return (label, confidence) from a compiled forest or the sklearn pipeline."""
+    if compiled is not None:
+        proba = compiled.predict_proba([input_dict])[0]
+        idx = int(np.argmax(proba))
+        return compiled.classes_[idx], float(proba[idx])
+    pred = pipeline.predict(input_df)[0]
+    proba = pipeline.predict_proba(input_df)[0]
+    return pred, float(proba[pred])
+
 def predict_disease(input_dict):
     """
     Predict disease from input features with biological validation.
@@ -49,17 +75,13 @@ def predict_disease(input_dict):
         animal = input_dict.get('Animal', 'Unknown')
         
         # Stage 1: Predict category
-        category_pred = stage1_pipeline.predict(input_df)[0]
-        category_proba = stage1_pipeline.predict_proba(input_df)[0]
+        category_pred, category_confidence = _predict_with(stage1_compiled, stage1_pipeline, input_dict, input_df)
         category_name = category_encoder.inverse_transform([category_pred])[0]
-        category_confidence = float(category_proba[category_pred])
         
         # Stage 2: Predict disease
-        stage2_model = stage2_models[category_name]
-        disease_pred = stage2_model.predict(input_df)[0]
-        disease_proba = stage2_model.predict_proba(input_df)[0]
+        disease_pred, disease_confidence = _predict_with(
+            stage2_compiled.get(category_name), stage2_models[category_name], input_dict, input_df)
         disease_name = disease_encoders[category_name].inverse_transform([disease_pred])[0]
-        disease_confidence = float(disease_proba[disease_pred])
         
         # Biological validation
         validation = validate_prediction(animal, disease_name, category_name)
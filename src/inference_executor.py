@@ -0,0 +1,140 @@
+"""
+Bounded Inference Executor
+Runs CPU-bound model calls on a dedicated thread pool so async request
+handlers (and the IoT telemetry routes sharing their event loop) never wait
+behind a prediction.
+
+The pool has a fixed number of threads plus a bounded backlog. When both
+are full, submit() raises QueueFullError straight away and the API answers
+503 instead of letting requests pile up.
+
+Torch's intra-op pool is per process but every calling thread fans out over
+it, so the thread count is pinned to the cores available divided by the
+number of inference threads.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.batching import DeadlineExceeded, Histogram, QueueFullError, QUEUE_WAIT_MS_BUCKETS
+from src.monitoring import register_stats_source
+
+# Configuration (overridable through the environment)
+INFERENCE_THREADS = int(os.environ.get('VETNET_INFERENCE_THREADS', 4))
+INFERENCE_QUEUE_DEPTH = int(os.environ.get('VETNET_INFERENCE_QUEUE_DEPTH', 64))
+TORCH_THREADS = int(os.environ.get('VETNET_TORCH_THREADS', 0))  # 0 = derive from cores
+
+# Cores this process may use; pre-fork workers lower it to their share
+CPU_CORES = os.cpu_count() or 1
+
+RUN_MS_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+def torch_threads_for(pool_threads, cpu_cores=None):
+    """Intra-op torch threads per process so pool_threads callers fit the cores."""
+    if TORCH_THREADS > 0:
+        return TORCH_THREADS
+    return max(1, (cpu_cores or CPU_CORES) // max(1, pool_threads))
+
+def pin_torch_threads(pool_threads=INFERENCE_THREADS, cpu_cores=None):
+    import torch
+    n = torch_threads_for(pool_threads, cpu_cores)
+    if torch.get_num_threads() != n:
+        torch.set_num_threads(n)
+    return n
+
+class InferenceExecutor:
+    """
+    Fixed-size thread pool with a bounded backlog.
+
+    At most `max_workers` calls run at once and `max_queue_depth` more may
+    wait; anything beyond that is rejected with QueueFullError.
+    """
+    def __init__(self, max_workers=INFERENCE_THREADS, max_queue_depth=INFERENCE_QUEUE_DEPTH):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = 0  # running + waiting
+
+        self.torch_threads = None
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self.run_ms = Histogram(RUN_MS_BUCKETS)
+
+    def start(self):
+        with self._lock:
+            if self._pool is None:
+                self.torch_threads = pin_torch_threads(self.max_workers)
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="vetnet-inference")
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def submit(self, fn, *args, deadline=None):
+        """
+        Queue fn(*args). Returns a concurrent Future; raises QueueFullError when saturated.
+        If `deadline` (time.monotonic()) passes before a thread picks the call
+        up, fn is not run and the Future raises DeadlineExceeded.
+        """
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue_depth:
+                self.rejected += 1
+                raise QueueFullError(f"Inference executor saturated ({self._pending} calls pending)")
+            self._pending += 1
+        enqueued = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            self.queue_wait_ms.observe((started - enqueued) * 1000)
+            try:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self.expired += 1
+                    raise DeadlineExceeded("Deadline passed while queued for inference")
+                return fn(*args)
+            finally:
+                self.run_ms.observe((time.perf_counter() - started) * 1000)
+                with self._lock:
+                    self._pending -= 1
+                    self.completed += 1
+
+        try:
+            return self._pool.submit(task)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    async def run(self, fn, *args, deadline=None):
+        """Await fn(*args) on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, deadline=deadline))
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending
+        return {
+            "config": {
+                "threads": self.max_workers,
+                "max_queue_depth": self.max_queue_depth,
+                "torch_threads": self.torch_threads
+            },
+            "running": min(pending, self.max_workers),
+            "queued": max(0, pending - self.max_workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "run_ms": self.run_ms.snapshot()
+        }
+
+# Global Instance (shared by /predict and the IoT router)
+inference_executor = InferenceExecutor()
+register_stats_source('inference_executor', inference_executor.stats)
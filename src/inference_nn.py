@@ -7,200 +7,674 @@ import numpy as np
 import pandas as pd
 import joblib
 import os
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from src.models.neural_network import VetNet
+from src.monitoring import record_stage_timings, register_stats_source
+from src.prediction_cache import PredictionCache, cache_key
+from src.compiled_pipeline import TREE_BACKEND, CompiledPipeline, compile_pipeline
+from src.model_bundle import (BUNDLE_PATH, BundleSchemaError, BundleImputer, BundleLabelEncoder,
+                              BundleScaler, read_bundle)
+from src.export_nn import freeze_vetnet
 from src.biological_validation import validate_prediction, get_disease_prevalence, create_medical_disclaimer
 
 # Configuration
 DEVICE = torch.device('cuda' if torch.cuda.is_available() else "cpu")
 MODEL_PATH = 'models/vetnet_best_state.pth'
+# TorchScript exports from src/export_nn.py
+FROZEN_MODEL_PATH = 'models/vetnet_frozen.pt'
+INT8_MODEL_PATH = 'models/vetnet_int8.pt'
+
+# Which VetNet to serve: 'frozen' (default), 'int8' or 'eager'. A missing or
+# stale export falls back to the next variant: int8 -> frozen -> eager.
+MODEL_VARIANT = os.environ.get('VETNET_MODEL_VARIANT', 'frozen')
+_VARIANT_FALLBACKS = {
+    'int8': [('int8', INT8_MODEL_PATH), ('frozen', FROZEN_MODEL_PATH)],
+    'frozen': [('frozen', FROZEN_MODEL_PATH)],
+    'eager': [],
+}
+
+def _variant_device(variant):
+    # Quantized kernels are CPU-only
+    return torch.device('cpu') if variant == 'int8' else DEVICE
+
+def _select_vetnet_variant():
+    """
+    Pick the configured VetNet export.
+
+    Returns (variant, path); ('eager', MODEL_PATH) when no usable export exists.
+    """
+    if MODEL_VARIANT not in _VARIANT_FALLBACKS:
+        print(f"⚠️ Unknown VETNET_MODEL_VARIANT '{MODEL_VARIANT}'; using frozen")
+    for variant, path in _VARIANT_FALLBACKS.get(MODEL_VARIANT, _VARIANT_FALLBACKS['frozen']):
+        if not os.path.exists(path):
+            continue
+        if os.path.getmtime(path) < os.path.getmtime(MODEL_PATH):
+            print(f"⚠️ {path} is older than {MODEL_PATH}; re-run src/export_nn.py --variant {variant}")
+            continue
+        return variant, path
+    return 'eager', MODEL_PATH
+
+def _read_vetnet(variant, path):
+    """TorchScript module for exported variants, state_dict for eager."""
+    if variant == 'eager':
+        return torch.load(path, map_location=DEVICE)
+    return torch.jit.load(path, map_location=_variant_device(variant))
+
+# Artifacts read concurrently by the loader (none depends on another)
+JOBLIB_ARTIFACTS = {
+    'scaler': 'models/vetnet_scaler.pkl',
+    'imputer': 'models/vetnet_imputer.pkl',
+    'species_encoder': 'models/species_encoder.pkl',
+    'category_encoder': 'models/category_encoder.pkl',
+    'stage2_models': 'models/stage2_models.pkl',
+    'disease_encoders': 'models/disease_encoders.pkl',
+}
+LOADER_THREADS = int(os.environ.get('VETNET_LOADER_THREADS', 4))
+# How long a prediction call waits for an in-progress background load
+LOAD_WAIT_S = float(os.environ.get('VETNET_LOAD_WAIT_S', 60))
+
+def _artifact_fingerprint(paths):
+    """Short hash of artifact paths, sizes and modification times."""
+    h = hashlib.blake2b(digest_size=6)
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+# Results of identical inputs are served from here; keys include MODEL_VERSION
+prediction_cache = PredictionCache()
+register_stats_source('prediction_cache', prediction_cache.stats)
+MODEL_VERSION = None
+
+# Loader state: 'not_started' -> 'loading' -> 'ready' | 'failed'
+MODELS_LOADED = False
+LOAD_STATE = 'not_started'
+LOAD_ERROR = None
+load_timings = {}  # artifact -> milliseconds, plus 'total'
+vetnet_variant = None
+_load_lock = threading.Lock()
+_load_thread = None
+_load_done = threading.Event()
+
+def _load_legacy_artifacts(timings):
+    """Separate pickles + VetNet weights from models/ (no bundle present)."""
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    variant, vetnet_path = _select_vetnet_variant()
+    with ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix='vetnet-loader') as pool:
+        futures = {name: pool.submit(timed, os.path.basename(path), joblib.load, path)
+                   for name, path in JOBLIB_ARTIFACTS.items()}
+        vetnet_future = pool.submit(timed, os.path.basename(vetnet_path), _read_vetnet, variant, vetnet_path)
+
+        # Stage 2 (XGBoost) models are reused for disease prediction once the
+        # category is known. Extract imputation/scaling/one-hot parameters once
+        # so scoring skips the per-request pandas DataFrame + ColumnTransformer
+        # overhead; categories whose layout is unsupported keep the sklearn path.
+        stage2 = futures['stage2_models'].result()
+        compile_start = time.perf_counter()
+        compiled_futures = {cat: pool.submit(compile_pipeline, pipe) for cat, pipe in stage2.items()}
+        compiled = {cat: f.result() for cat, f in compiled_futures.items()}
+        timings['stage2_compile'] = round((time.perf_counter() - compile_start) * 1000, 1)
+
+        loaded = {name: f.result() for name, f in futures.items()}
+        vetnet_artifact = vetnet_future.result()
+
+    if TREE_BACKEND == 'native':
+        # Trees now live in flat arrays; release the Booster-holding pipelines
+        # (keys are kept so category lookups still work)
+        stage2 = {cat: (None if compiled[cat] else pipe) for cat, pipe in stage2.items()}
+        print(f"🌲 Native tree backend: {sum(1 for c in compiled.values() if c)}/{len(compiled)} Stage 2 forests compiled")
+
+    if variant == 'eager':
+        model = VetNet(len(loaded['category_encoder'].classes_), len(loaded['species_encoder'].classes_),
+                       numeric_dim=loaded['scaler'].n_features_in_).to(DEVICE)
+        model.load_state_dict(vetnet_artifact)
+        model.eval()
+    else:
+        model = vetnet_artifact
+    print(f"Using {variant} VetNet from {vetnet_path}")
+
+    fingerprint_paths = list(JOBLIB_ARTIFACTS.values()) + [MODEL_PATH]
+    if vetnet_path != MODEL_PATH:
+        fingerprint_paths.append(vetnet_path)
+    loaded.update(stage2_models=stage2, stage2_compiled=compiled, vetnet_model=model, variant=variant,
+                  version=_artifact_fingerprint(fingerprint_paths) + f"-{variant}-{TREE_BACKEND}")
+    return loaded
+
+def _check_bundle_schema(manifest):
+    """Refuse bundles whose feature layout differs from what this code builds."""
+    schema = manifest["feature_schema"]
+    expected = BASE_NUMERIC_COLS + RATIO_COLS + SYMPTOM_LIST
+    if schema["vetnet_numeric"] != expected:
+        raise BundleSchemaError(f"VetNet numeric columns {schema['vetnet_numeric']} do not match "
+                                f"the inference layout {expected}")
+    if manifest["vetnet"]["numeric_dim"] != len(expected):
+        raise BundleSchemaError(f"VetNet expects {manifest['vetnet']['numeric_dim']} numeric inputs, "
+                                f"inference builds {len(expected)}")
+    missing = set(schema["categories"]) - set(schema["stage2"])
+    if missing:
+        raise BundleSchemaError(f"No Stage 2 model for VetNet categories {sorted(missing)}")
+
+def _load_bundle_artifacts(timings):
+    """Everything from the single mmap-ed bundle (Stage 2 always uses native forests)."""
+    start = time.perf_counter()
+    bundle = read_bundle(BUNDLE_PATH)
+    timings[os.path.basename(BUNDLE_PATH)] = round((time.perf_counter() - start) * 1000, 1)
+    manifest = bundle.manifest
+    _check_bundle_schema(manifest)
+    schema = manifest["feature_schema"]
+
+    start = time.perf_counter()
+    compiled, disease = {}, {}
+    for category, meta in manifest["stage2"].items():
+        compiled[category] = CompiledPipeline.from_state(meta, bundle.group(f"stage2/{category}"))
+        disease[category] = BundleLabelEncoder(meta["disease_classes"])
+    timings['stage2_compile'] = round((time.perf_counter() - start) * 1000, 1)
+
+    start = time.perf_counter()
+    dims = manifest["vetnet"]
+    eager = VetNet(dims["n_categories"], dims["n_species"], numeric_dim=dims["numeric_dim"])
+    eager.load_state_dict({name: torch.tensor(a) for name, a in bundle.group("vetnet/weights").items()})
+    eager.eval()
+    variant, model = MODEL_VARIANT, None
+    if variant == 'int8':
+        # Quantized weights are only published after the accuracy gate
+        if os.path.exists(INT8_MODEL_PATH) and os.path.getmtime(INT8_MODEL_PATH) >= os.path.getmtime(BUNDLE_PATH):
+            model = torch.jit.load(INT8_MODEL_PATH, map_location=_variant_device('int8'))
+        else:
+            print(f"⚠️ No int8 export newer than {BUNDLE_PATH}; run src/export_nn.py --variant int8. Using frozen")
+            variant = 'frozen'
+    if variant == 'eager':
+        model = eager.to(DEVICE)
+    elif model is None:
+        variant = 'frozen'
+        model = freeze_vetnet(eager).to(DEVICE)
+    timings['vetnet_model'] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"Using {variant} VetNet from {BUNDLE_PATH} (bundle {bundle.version})")
+
+    vetnet_arrays = bundle.group("vetnet")
+    return {
+        'scaler': BundleScaler(vetnet_arrays['scaler_mean'], vetnet_arrays['scaler_scale']),
+        'imputer': BundleImputer(vetnet_arrays['imputer_fill']),
+        'species_encoder': BundleLabelEncoder(schema["species"]),
+        'category_encoder': BundleLabelEncoder(schema["categories"]),
+        'stage2_models': {category: None for category in compiled},
+        'disease_encoders': disease,
+        'stage2_compiled': compiled,
+        'vetnet_model': model,
+        'variant': variant,
+        'version': f"{bundle.version}-{variant}-native",
+    }
+
+def load_models():
+    """
+    Load every artifact and swap them in together.
+
+    With a bundle (models/vetnet.bundle, see src/model_bundle.py) everything
+    comes from one mmap and its schema is checked against this module's
+    feature layout. Otherwise the separate pickles are read in parallel on a
+    thread pool (unpickling the xgboost boosters and reading torch weights
+    release the GIL for much of their time).
+
+    Module globals are only replaced once the whole set has loaded, and
+    MODEL_VERSION changes last, so a cached result is never keyed with a
+    version whose models did not produce it.
+    """
+    global scaler, imputer, species_encoder, category_encoder, stage2_models, disease_encoders
+    global stage2_compiled, n_categories, n_species, numeric_dim
+    global vetnet_model, vetnet_variant, vetnet_device, _species_index, MODELS_LOADED, MODEL_VERSION
+    global load_timings
 
-# Load Artifacts globally to avoid reloading on every request
-try:
     print("Loading VetNet Neural Network...")
-    scaler = joblib.load('models/vetnet_scaler.pkl')
-    imputer = joblib.load('models/vetnet_imputer.pkl')
-    species_encoder = joblib.load('models/species_encoder.pkl')
-    category_encoder = joblib.load('models/category_encoder.pkl')
-    
-    # Load Stage 2 Models (Still XGBoost for now, or could be replaced later)
-    # The plan Priority 1 was to replace Stage 1 with DL. Stage 2 is still good (90%).
-    # We will reuse the existing stage 2 models for disease prediction once category is found.
-    stage2_models = joblib.load('models/stage2_models.pkl')
-    disease_encoders = joblib.load('models/disease_encoders.pkl')
-    
-    # Initialize VetNet
+    load_start = time.perf_counter()
+    timings = {}
+    if os.path.exists(BUNDLE_PATH):
+        newer = [p for p in JOBLIB_ARTIFACTS.values() if os.path.exists(p)
+                 and os.path.getmtime(p) > os.path.getmtime(BUNDLE_PATH)]
+        if newer:
+            print(f"⚠️ {newer} are newer than {BUNDLE_PATH}; rebuild it with src/model_bundle.py")
+        loaded = _load_bundle_artifacts(timings)
+    else:
+        print(f"⚠️ {BUNDLE_PATH} not found; loading separate artifacts (run src/model_bundle.py)")
+        loaded = _load_legacy_artifacts(timings)
+
+    scaler, imputer = loaded['scaler'], loaded['imputer']
+    species_encoder, category_encoder = loaded['species_encoder'], loaded['category_encoder']
+    stage2_models, disease_encoders = loaded['stage2_models'], loaded['disease_encoders']
+    stage2_compiled = loaded['stage2_compiled']
     n_categories = len(category_encoder.classes_)
     n_species = len(species_encoder.classes_)
     numeric_dim = scaler.n_features_in_
-    
-    vetnet_model = VetNet(n_categories, n_species, numeric_dim=numeric_dim).to(DEVICE)
-    vetnet_model.load_state_dict(torch.load(MODEL_PATH, map_location=DEVICE))
-    vetnet_model.eval()
-    
-    print("✅ VetNet Logic Loaded Successfully")
+    vetnet_model, vetnet_variant = loaded['vetnet_model'], loaded['variant']
+    vetnet_device = _variant_device(vetnet_variant)
+    # Species name -> encoder index, so batches avoid per-row LabelEncoder calls
+    _species_index = {name: i for i, name in enumerate(species_encoder.classes_)}
     MODELS_LOADED = True
-except Exception as e:
-    print(f"❌ Failed to load VetNet models: {e}")
-    MODELS_LOADED = False
+    MODEL_VERSION = loaded['version']
 
-def predict_disease_nn(input_dict):
+    timings['total'] = round((time.perf_counter() - load_start) * 1000, 1)
+    load_timings = timings
+    breakdown = ", ".join(f"{name} {ms:.0f}ms" for name, ms in timings.items() if name != 'total')
+    print(f"✅ VetNet Logic Loaded Successfully in {timings['total']:.0f}ms "
+          f"(model version {MODEL_VERSION}; {breakdown})")
+
+def _background_load():
+    global LOAD_STATE, LOAD_ERROR
+    try:
+        load_models()
+        LOAD_STATE = 'ready'
+    except Exception as e:
+        print(f"❌ Failed to load VetNet models: {e}")
+        LOAD_ERROR = str(e)
+        LOAD_STATE = 'failed'
+    finally:
+        _load_done.set()
+
+def start_loading():
+    """Start loading the models on a background thread (idempotent)."""
+    global _load_thread, LOAD_STATE
+    with _load_lock:
+        if _load_thread is None:
+            LOAD_STATE = 'loading'
+            _load_thread = threading.Thread(target=_background_load, name="vetnet-model-loader", daemon=True)
+            _load_thread.start()
+    return _load_thread
+
+def wait_until_ready(timeout=None):
+    """Block until the background load finishes. Returns True if models are usable."""
+    start_loading()
+    _load_done.wait(timeout)
+    return MODELS_LOADED
+
+def reload_models():
+    """Reload all artifacts (e.g. after a retrain) and invalidate cached results."""
+    global LOAD_STATE, LOAD_ERROR
+    wait_until_ready()
+    load_models()
+    LOAD_STATE, LOAD_ERROR = 'ready', None
+    prediction_cache.clear()
+    return MODEL_VERSION
+
+def warm_up():
     """
-    Predict disease using VetNet (Stage 1) + XGBoost (Stage 2)
+    Score one synthetic record (uncached) so lazy work - numba kernel
+    compilation, TorchScript profiling runs - happens now rather than on the
+    first request. The prefork server calls this before forking its workers.
     """
-    if not MODELS_LOADED:
-        return {"error": "Models not loaded"}
-    
-    try:
-        # 1. Prepare Features
-        # Extract numeric columns in correct order expected by Scaler
-        # Note: Scaler expects specifics. We need to match training columns.
-        # Ideally we saved feature names. Let's assume the standard order from training script.
-        # 'Age', 'WBC', 'RBC', 'Hemoglobin', 'Platelets', 'Glucose', 'ALT', 'AST', 'Urea', 'Creatinine'
-        # + Ratios if calculated
-        
-        # Calculate Feature Engineering Ratios
-        wbc = float(input_dict.get('WBC', 0))
-        rbc = float(input_dict.get('RBC', 1)) # Avoid div by zero
-        alt = float(input_dict.get('ALT', 0))
-        ast = float(input_dict.get('AST', 1))
-        urea = float(input_dict.get('Urea', 0))
-        creat = float(input_dict.get('Creatinine', 1))
-        
-        ratios = [
-            wbc / rbc if rbc > 0 else 0,
-            alt / ast if ast > 0 else 0,
-            urea / creat if creat > 0 else 0
-        ]
-        
-        base_numeric = [
-            input_dict.get('Age', 0),
-            wbc, rbc, 
-            input_dict.get('Hemoglobin', 0),
-            input_dict.get('Platelets', 0),
-            input_dict.get('Glucose', 0),
-            alt, ast, urea, creat
-        ]
-        
-        # Symptoms
-        symptom_keys = [k for k in input_dict.keys() if k.startswith('Symptom_')]
-        # We need to ensure we use ALL symptoms the model trained on, in correct order.
-        # This is tricky without the saved column list.
-        # For now, let's assume the standard list or rely on `input_dict` containing them.
-        
-        # Hack: The scaler knows the dimension. 
-        # Base (10) + Ratios (3) = 13 numeric features? 
-        # Wait, training included symptoms in "numeric_data".
-        # 'Symptom_Fever', etc.
-        # Let's check `models/vetnet_checkpoint.pth` for column names if possible.
-        # Or hardcode standard symptom list.
-        symptom_list = ['Symptom_Fever', 'Symptom_Lethargy', 'Symptom_Vomiting', 'Symptom_Diarrhea', 
-                        'Symptom_WeightLoss', 'Symptom_SkinLesion', 'Symptom_Coughing', 'Symptom_Lameness',
-                        'Symptom_NasalDischarge', 'Symptom_EyeDischarge', 'Symptom_Drooling', 'Symptom_Blisters']
-        
-        numeric_vals = base_numeric + ratios + [float(input_dict.get(s, 0)) for s in symptom_list]
-        
-        # 2. Imputation and Preprocessing
-        X_num = np.array([numeric_vals], dtype=np.float32)
-        X_num_imputed = imputer.transform(X_num)
-        X_num_scaled = scaler.transform(X_num_imputed)
-        
-        # 0. Ensure all required columns exist in input_dict for XGBoost stage
-        required_categorical = ['Animal', 'Gender', 'Breed']
-        for col in required_categorical:
-            if col not in input_dict:
-                input_dict[col] = "Mixed" if col == 'Breed' else ("Male" if col == 'Gender' else "Dog")
-        
-        # Ensure age is present
-        if 'Age' not in input_dict:
-            input_dict['Age'] = 5.0
-
-        animal = input_dict.get('Animal', 'Dog')
+    if not wait_until_ready(LOAD_WAIT_S):
+        return False
+    start = time.perf_counter()
+    _predict_batch_uncached([{'Animal': str(species_encoder.classes_[0])}])
+    print(f"🔥 Warm-up prediction took {(time.perf_counter() - start) * 1000:.0f}ms")
+    return True
+
+def load_status():
+    """Readiness details for the /ready endpoint."""
+    return {
+        "ready": MODELS_LOADED,
+        "state": LOAD_STATE,
+        "error": LOAD_ERROR,
+        "model_version": MODEL_VERSION,
+        "model_variant": vetnet_variant,
+        "load_timings_ms": load_timings
+    }
+
+# Feature layout shared by the single-record and batch paths.
+# Must match the column order used in train_nn.py (checked against the
+# bundle's feature schema at load time):
+# numeric_cols (10) + ratio columns (3) + symptom_cols (12)
+BASE_NUMERIC_COLS = ['Age', 'WBC', 'RBC', 'Hemoglobin', 'Platelets', 'Glucose', 'ALT', 'AST', 'Urea', 'Creatinine']
+RATIO_COLS = ['WBC_RBC_Ratio', 'ALT_AST_Ratio', 'Urea_Creat_Ratio']
+SYMPTOM_LIST = ['Symptom_Fever', 'Symptom_Lethargy', 'Symptom_Vomiting', 'Symptom_Diarrhea',
+                'Symptom_WeightLoss', 'Symptom_SkinLesion', 'Symptom_Coughing', 'Symptom_Lameness',
+                'Symptom_NasalDischarge', 'Symptom_EyeDischarge', 'Symptom_Drooling', 'Symptom_Blisters']
+
+# Defaults used when a lab value is absent. RBC/AST/Creatinine default to 1
+# because they are the denominators of the engineered ratios.
+_NUMERIC_DEFAULTS = {'RBC': 1, 'AST': 1, 'Creatinine': 1}
+_RATIO_INPUTS = ('WBC', 'RBC', 'ALT', 'AST', 'Urea', 'Creatinine')
+
+def _fill_required_fields(input_dict):
+    """Ensure the categorical/demographic columns the Stage 2 pipelines need exist."""
+    required_categorical = ['Animal', 'Gender', 'Breed']
+    for col in required_categorical:
+        if col not in input_dict:
+            input_dict[col] = "Mixed" if col == 'Breed' else ("Male" if col == 'Gender' else "Dog")
+    if 'Age' not in input_dict:
+        input_dict['Age'] = 5.0
+
+def _raw_numeric_row(input_dict):
+    """
+    Collect base lab values + symptoms for one record (ratios are added vectorized).
+
+    Every value is coerced here, so a non-numeric one fails only its own
+    record; None stays missing (NaN) for the imputer.
+    """
+    row = []
+    for col in BASE_NUMERIC_COLS:
+        value = input_dict.get(col, _NUMERIC_DEFAULTS.get(col, 0))
+        row.append(np.nan if value is None else float(value))
+    row.extend(float(input_dict.get(s, 0)) for s in SYMPTOM_LIST)
+    return row
+
+def build_feature_matrix(raw_rows):
+    """
+    Build the VetNet numeric input matrix for many records in one NumPy pass.
+
+    Args:
+        raw_rows: list of rows from `_raw_numeric_row` (10 base values + 12 symptoms)
+
+    Returns:
+        float32 array of shape (n, 25): base (10) + ratios (3) + symptoms (12)
+    """
+    n_base = len(BASE_NUMERIC_COLS)
+    raw = np.array(raw_rows, dtype=np.float64).reshape(len(raw_rows), n_base + len(SYMPTOM_LIST))
+    base, symptoms = raw[:, :n_base], raw[:, n_base:]
+
+    def safe_ratio(num, den):
+        # x / y if y > 0 else 0 (NaN denominators also map to 0)
+        out = np.zeros(len(num), dtype=np.float64)
+        np.divide(num, den, out=out, where=den > 0)
+        return out
+
+    wbc, rbc, alt, ast, urea, creat = (base[:, BASE_NUMERIC_COLS.index(c)] for c in _RATIO_INPUTS)
+    with np.errstate(invalid='ignore'):
+        ratios = np.column_stack([
+            safe_ratio(wbc, rbc),
+            safe_ratio(alt, ast),
+            safe_ratio(urea, creat),
+        ])
+    return np.hstack([base, ratios, symptoms]).astype(np.float32)
+
+def _encode_species(animals):
+    """Vectorized species_encoder.transform; unknown species map to index 0."""
+    return np.array([_species_index.get(a, 0) for a in animals], dtype=np.int64)
+
+def _elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+def _predict_categories(X_num, X_cat, stage_ms=None):
+    """Run imputer, scaler and VetNet once for the whole batch."""
+    stage_ms = {} if stage_ms is None else stage_ms
+    start = time.perf_counter()
+    X_num_imputed = imputer.transform(X_num)
+    X_num_scaled = scaler.transform(X_num_imputed)
+    stage_ms['impute_scale'] = _elapsed_ms(start)
+    start = time.perf_counter()
+    with torch.no_grad():
+        t_num = torch.tensor(X_num_scaled).to(vetnet_device)
+        t_cat = torch.tensor(X_cat).to(vetnet_device)
+        logits = vetnet_model(t_num, t_cat)
+        probs = torch.softmax(logits, dim=1)
+        conf, idx = torch.max(probs, dim=1)
+    idx, conf = idx.cpu().numpy(), conf.cpu().numpy()
+    stage_ms['vetnet_forward'] = _elapsed_ms(start)
+    return idx, conf
+
+def _stage2_required_columns(category):
+    """Input columns the Stage 2 ColumnTransformer selects."""
+    compiled = stage2_compiled.get(category)
+    if compiled is not None:
+        return compiled.required_columns
+    preprocessor = stage2_models[category].named_steps['preprocessor']
+    columns = set()
+    for _, transformer, cols in preprocessor.transformers_:
+        if transformer != 'drop' and isinstance(cols, (list, tuple)):
+            columns.update(cols)
+    return columns
+
+def _score_stage2(category, records, stage_ms=None):
+    """
+    Score every record predicted as `category` with a single predict_proba call.
+
+    Returns (disease_names, confidences, errors) where names and confidences
+    are aligned with `records` and `errors` maps the index of any record whose
+    values could not be encoded to its error message. Time spent encoding
+    and in the trees is added to `stage_ms` (milliseconds for the group).
+    """
+    stage_ms = {} if stage_ms is None else stage_ms
+    start = time.perf_counter()
+    group = []
+    for record in records:
+        full_input = record.copy()
+        # Ensure all symptoms are in the dict for the DataFrame
+        for s in SYMPTOM_LIST:
+            if s not in full_input:
+                full_input[s] = 0.0
+        group.append(full_input)
+
+    compiled = stage2_compiled.get(category)
+    if compiled is not None:
+        X, errors = compiled.transform(group)
+        stage_ms['stage2_preprocess'] = _elapsed_ms(start)
+        start = time.perf_counter()
+        disease_probs = compiled.predict_proba_matrix(X)
+        classes = compiled.classes_
+    else:
+        # The sklearn pipeline encodes inside predict_proba: only the frame
+        # build counts as preprocessing here
+        stage2_pipeline = stage2_models[category]
+        errors = {}
+        frame = pd.DataFrame(group)
+        stage_ms['stage2_preprocess'] = _elapsed_ms(start)
+        start = time.perf_counter()
+        disease_probs = stage2_pipeline.predict_proba(frame)
+        classes = np.asarray(stage2_pipeline.classes_)
+    stage_ms['stage2_trees'] = _elapsed_ms(start)
+
+    class_idx = np.argmax(disease_probs, axis=1)
+    disease_names = disease_encoders[category].inverse_transform(classes[class_idx])
+    confidences = disease_probs[np.arange(len(records)), class_idx]
+    return disease_names, confidences, errors
+
+def _build_response(animal, category_pred, disease_name, cat_conf, disease_conf, stage_ms=None):
+    from src.treatment_db import get_treatment
+
+    # Validation & Treatment Recommendation
+    start = time.perf_counter()
+    validation = validate_prediction(animal, disease_name, category_pred)
+    validated = time.perf_counter()
+    treatment_info = get_treatment(disease_name, category_pred)
+    if stage_ms is not None:
+        stage_ms['bio_validation'] = (validated - start) * 1000
+        stage_ms['treatment_lookup'] = _elapsed_ms(validated)
+
+    return {
+        'predicted_category': category_pred,
+        'predicted_disease': disease_name,
+        'category_confidence': round(float(cat_conf), 3),
+        'disease_confidence': round(float(disease_conf), 3),
+        'confidence': round(float(disease_conf), 3), # Matching frontend expected key
+        'method': "VetNet (Deep Learning)",
+        'biological_validation': validation,
+        'treatment': treatment_info,
+        'success': True
+    }
+
+def predict_disease_nn_batch(records):
+    """
+    Predict diseases for many records using VetNet (Stage 1) + XGBoost (Stage 2).
+
+    Records whose normalized inputs were scored recently by the same model
+    version are answered from the prediction cache. For the rest, features
+    are assembled in one NumPy pass, the imputer, scaler and VetNet run once,
+    and each Stage 2 pipeline scores its group of records in a single
+    predict_proba call.
+
+    Args:
+        records: list of input dicts (same format as predict_disease_nn)
+
+    Returns:
+        List of result dicts aligned with `records`. A record that fails
+        gets {"error": ..., "success": False} without affecting the others.
+    """
+    if not MODELS_LOADED and not wait_until_ready(LOAD_WAIT_S):
+        return [{"error": "Models not loaded"} for _ in records]
+    if not prediction_cache.enabled:
+        return _predict_batch_uncached(records)
+
+    # Snapshot the version before scoring: a reload mid-batch then only
+    # stores results under the old version, which is never looked up again
+    version = MODEL_VERSION
+    results = [None] * len(records)
+    keys, rows, miss_idx = {}, {}, []
+    for i, record in enumerate(records):
         try:
-            X_cat = species_encoder.transform([animal])
-        except:
-            # Handle unknown species
-            X_cat = np.array([0]) 
-            
-        # 3. VetNet Prediction (Stage 1)
-        with torch.no_grad():
-            t_num = torch.tensor(X_num_scaled).to(DEVICE)
-            t_cat = torch.tensor(X_cat).to(DEVICE)
-            logits = vetnet_model(t_num, t_cat)
-            probs = torch.softmax(logits, dim=1)
-            cat_idx = torch.argmax(probs).item()
-            cat_conf = probs[0][cat_idx].item()
-            
-        category_pred = category_encoder.inverse_transform([cat_idx])[0]
-        
-        # 4. XGBoost Prediction (Stage 2)
-        # We use the predicted category to select the specialized model
-        if category_pred in stage2_models:
-            # Create a clean DataFrame with ALL expected columns for the pipeline
-            # The pipeline uses categorical and numeric features defined in retrain_models
-            full_input = input_dict.copy()
-            
-            # Ensure all symptoms are in the dict for the DataFrame
-            for s in symptom_list:
-                if s not in full_input:
-                    full_input[s] = 0.0
-            
-            input_df = pd.DataFrame([full_input])
-            
-            stage2_pipeline = stage2_models[category_pred]
-            
-            # Note: Stage 2 models were trained on the OLD data structure (without ratios?).
-            # If we retrained everything, stage 2 is also fresh.
-            # But I only ran `retrain_models.py` (which uses `training_data.csv`).
-            # `generate_enhanced_data.py` created `enhanced_training_data.csv`.
-            # I trained VetNet on ENHANCED data.
-            # Did I retrain Stage 2 on ENHANCED data? NO.
-            # So Stage 2 models might be slightly out of sync with Enhanced Data features if passed directly?
-            # But Stage 2 pipelines have their own column transformers.
-            # As long as `input_df` has the columns they expect, it works.
-            
-            disease_pred_idx = stage2_pipeline.predict(input_df)[0]
-            disease_probs = stage2_pipeline.predict_proba(input_df)[0]
-            
-            # Decode
-            disease_encoder = disease_encoders[category_pred]
-            disease_pred = disease_encoder.inverse_transform([disease_pred_idx])[0]
-            # disease_conf = disease_probs[disease_pred_idx] # Wait, XGBoost predict returns label or index?
-            # Pipeline predict returns label usually if Classifier. 
-            # If it returns integer, inverse transform works.
-            # Let's assume it returns label directly if it was trained with label encoder inside?
-            # In `retrain_models.py`, we fit on `y_cat_encoded`. So it returns integer.
-            
-            # Find index of predicted class in probability array
-            class_idx = list(stage2_pipeline.classes_).index(disease_pred_idx)
-            disease_conf = float(disease_probs[class_idx])
-            
-            disease_name = disease_pred # It's actually the integer, mapped back
-            # Wait, `disease_pred` above is `disease_encoder.inverse_transform(...)`. So it is the string name.
-            
-        else:
-            return {"error": "Category model not found"}
-
-        # 5. Validation & Response
-        validation = validate_prediction(animal, disease_name, category_pred)
-        
-        # 6. Treatment Recommendation
-        from src.treatment_db import get_treatment
-        treatment_info = get_treatment(disease_name, category_pred)
-        
-        return {
-            'predicted_category': category_pred,
-            'predicted_disease': disease_name,
-            'category_confidence': round(cat_conf, 3),
-            'disease_confidence': round(disease_conf, 3),
-            'confidence': round(disease_conf, 3), # Matching frontend expected key
-            'method': "VetNet (Deep Learning)",
-            'biological_validation': validation,
-            'treatment': treatment_info,
-            'success': True
-        }
-        
+            rows[i] = _prepare_record(record)
+        except Exception as e:
+            results[i] = {"error": str(e), "success": False}
+            continue
+        # Keyed on exactly what both stages see (see _prepare_record)
+        keys[i] = cache_key(dict(record, _vetnet_row=rows[i]), version)
+        results[i] = prediction_cache.get(keys[i])
+        if results[i] is None:
+            miss_idx.append(i)
+
+    if miss_idx:
+        scored = _predict_batch_uncached([records[i] for i in miss_idx], [rows[i] for i in miss_idx])
+        for i, result in zip(miss_idx, scored):
+            results[i] = result
+            # Only successful predictions are cached; errors are retried
+            if result.get('success'):
+                prediction_cache.put(keys[i], result)
+    return results
+
+def _add_stage_times(stage_totals, key, row_ms):
+    """Sum one scored record's stage times under its (species, category)."""
+    entry = stage_totals.get(key)
+    if entry is None:
+        entry = stage_totals[key] = [0, {}]
+    entry[0] += 1
+    totals = entry[1]
+    for stage, ms in row_ms.items():
+        totals[stage] = totals.get(stage, 0.0) + ms
+
+def _record_stage_totals(stage_totals):
+    # One sketch update per (species, category) and stage, not per record
+    for (animal, category), (n, totals) in stage_totals.items():
+        record_stage_timings(animal, category, {stage: ms / n for stage, ms in totals.items()}, n)
+
+def _prepare_record(record):
+    """
+    Normalize one record for scoring: returns its VetNet row and fills the
+    Stage 2 fields in place. The row is taken before the fill, so a missing
+    Age reaches VetNet as 0 but Stage 2 as 5.0; the cache key covers both.
+    """
+    row = _raw_numeric_row(record)
+    _fill_required_fields(record)
+    return row
+
+def _predict_batch_uncached(records, raw_rows=None):
+    """
+    Score records that missed the cache. `raw_rows` are given when the
+    caller already ran _prepare_record on every record. Each stage's time is
+    recorded per species and category (see src/monitoring.record_stage_timings);
+    stages that run once for the batch or a Stage 2 group count an amortized
+    share per record.
+    """
+    started = time.perf_counter()
+    results = [None] * len(records)
+
+    # 1. Prepare Features (per-record coercion errors are isolated)
+    if raw_rows is not None:
+        valid_idx = list(range(len(records)))
+    else:
+        valid_idx, raw_rows = [], []
+        for i, record in enumerate(records):
+            try:
+                raw_rows.append(_prepare_record(record))
+                valid_idx.append(i)
+            except Exception as e:
+                results[i] = {"error": str(e), "success": False}
+
+    if not valid_idx:
+        return results
+
+    try:
+        # 2. Imputation, Scaling and VetNet Prediction (Stage 1)
+        X_num = build_feature_matrix(raw_rows)
+        animals = [records[i].get('Animal', 'Dog') for i in valid_idx]
+        X_cat = _encode_species(animals)
+        batch_ms = {'feature_build': _elapsed_ms(started)}
+        cat_idx, cat_conf = _predict_categories(X_num, X_cat, batch_ms)
+        category_preds = category_encoder.inverse_transform(cat_idx)
+        batch_share = {stage: ms / len(valid_idx) for stage, ms in batch_ms.items()}
+        stage_totals = {}  # (species, category) -> [records, {stage: ms}]
+
+        # 3. Group by predicted category for Stage 2
+        groups = {}
+        for pos, category in enumerate(category_preds):
+            groups.setdefault(category, []).append(pos)
+
+        for category, positions in groups.items():
+            if category not in stage2_models:
+                for pos in positions:
+                    results[valid_idx[pos]] = {"error": "Category model not found"}
+                continue
+
+            # A record missing a Stage 2 input column fails alone, as it would
+            # in a single-row DataFrame (the batch frame would fill it with NaN)
+            required = _stage2_required_columns(category)
+            complete = []
+            for pos in positions:
+                missing = required - set(records[valid_idx[pos]]) - set(SYMPTOM_LIST)
+                if missing:
+                    results[valid_idx[pos]] = {"error": f"columns are missing: {missing}", "success": False}
+                else:
+                    complete.append(pos)
+            positions = complete
+            if not positions:
+                continue
+
+            try:
+                group_records = [records[valid_idx[pos]] for pos in positions]
+                group_ms = {}
+                disease_names, disease_confs, errors = _score_stage2(category, group_records, group_ms)
+                group_share = {stage: ms / len(positions) for stage, ms in group_ms.items()}
+            except Exception as e:
+                for pos in positions:
+                    results[valid_idx[pos]] = {"error": str(e), "success": False}
+                continue
+
+            # 4. Validation & Response
+            for j, (pos, disease_name, disease_conf) in enumerate(zip(positions, disease_names, disease_confs)):
+                i = valid_idx[pos]
+                if j in errors:
+                    results[i] = {"error": errors[j], "success": False}
+                    continue
+                try:
+                    row_ms = dict(batch_share, **group_share)
+                    results[i] = _build_response(animals[pos], category, disease_name,
+                                                 cat_conf[pos], disease_conf, row_ms)
+                    _add_stage_times(stage_totals, (animals[pos], category), row_ms)
+                except Exception as e:
+                    results[i] = {"error": str(e), "success": False}
+
+        _record_stage_totals(stage_totals)
+
     except Exception as e:
-        return {"error": str(e), "success": False}
+        for i in valid_idx:
+            if results[i] is None:
+                results[i] = {"error": str(e), "success": False}
+
+    return results
+
+def predict_disease_nn(input_dict):
+    """
+    Predict disease using VetNet (Stage 1) + XGBoost (Stage 2)
+    """
+    return predict_disease_nn_batch([input_dict])[0]
 
 def prepare_stage2_input(input_dict):
     pass # Not used currently
+
+# Artifacts load in the background so importers (the API) start immediately;
+# prediction calls wait for the load, /ready reports when it has finished.
+start_loading()
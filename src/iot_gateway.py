@@ -1,11 +1,25 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import List, Optional
+import json
+import os
 import time
-from .biological_rules import analyze_vitals
+from .biological_rules import analyze_vitals, analyze_vitals_batch, species_codes, vitals_alerts
+from .fleet_status import DEVICE_STALE_S, STATUSES, FleetStatusIndex, dashboard_status
+from .batching import DeadlineExceeded, QueueFullError
+from .admission import current_deadline
+from .inference_executor import inference_executor
+from .telemetry_buffer import TelemetryRingBuffer
+from .telemetry_store import MAX_HISTORY_ROWS, TELEMETRY_STORE, TelemetryStore
+from . import metrics
 
 router = APIRouter()
 
+# Prometheus counters (exposed at /metrics; in memory only)
+readings_ingested = metrics.registry.counter("iot_readings", "Telemetry readings ingested", ("species",))
+alerts_raised = metrics.registry.counter("iot_alerts", "Vitals alerts raised on ingestion", ("species", "severity"))
+
 # Data Models
 class TelemetryData(BaseModel):
     device_id: str
@@ -22,6 +36,15 @@ class AlertResponse(BaseModel):
     alerts: List[dict]
     actions: List[str]
 
+# Bulk ingestion: readings per POST /iot/telemetry/batch
+MAX_TELEMETRY_BATCH = int(os.environ.get('VETNET_TELEMETRY_BATCH_MAX', 10000))
+# Body size cap, checked before any parsing (a reading is ~100-250 bytes of JSON)
+MAX_TELEMETRY_BATCH_BYTES = int(os.environ.get('VETNET_TELEMETRY_BATCH_MAX_BYTES', MAX_TELEMETRY_BATCH * 1024))
+_telemetry_batch = TypeAdapter(List[TelemetryData])  # validates a whole JSON array in one pydantic-core call
+
+# Worst first wins when a device has several readings in one batch
+STATUS_RANK = {"NORMAL": 0, "WARNING": 1, "ALERT": 2, "CRITICAL": 3}
+
 # In-memory registry for device-to-animal mapping
 # Format: { device_id: { "animal_id": str, "species": str, "name": str, "age": float, "breed": str, "gender": str } }
 device_registry = {
@@ -31,8 +54,35 @@ device_registry = {
 }
 
 # In-memory store for demo purposes (In prod, use Redis/DB)
-# Format: { device_id: [TelemetryData, ...] }
-device_stream_buffer = {}
+# Last VETNET_TELEMETRY_HISTORY readings per device, in typed ring-buffer columns
+device_stream_buffer = TelemetryRingBuffer()
+# Dashboard status of every device, updated as readings arrive
+fleet_status = FleetStatusIndex()
+# Persistent readings and 1-minute / 1-hour rollups (VETNET_TELEMETRY_DB; None when disabled)
+telemetry_store = TelemetryStore() if TELEMETRY_STORE else None
+
+def collect_iot_metrics():
+    """Device buffer sizes, dashboard status counts and telemetry store backlog, read at scrape time."""
+    stats = device_stream_buffer.stats()
+    store = telemetry_store.stats() if telemetry_store is not None else {"queued": 0, "dropped": 0}
+    return [metrics.gauge("vetnet_iot_devices", "Devices with a telemetry buffer", stats["devices"]),
+            metrics.gauge("vetnet_iot_registered_devices", "Devices in the registry", len(device_registry)),
+            metrics.gauge("vetnet_iot_buffered_readings", "Readings held in device buffers", stats["buffered_readings"]),
+            metrics.gauge("vetnet_iot_device_buffer_max", "Readings in the fullest device buffer", stats["max_buffer"]),
+            metrics.gauge("vetnet_iot_buffer_bytes", "Memory held by the device buffer columns", stats["column_bytes"]),
+            metrics.gauge("vetnet_iot_store_queued", "Readings waiting to be written to the telemetry store",
+                          store["queued"]),
+            metrics.gauge("vetnet_iot_store_dropped", "Readings dropped because the telemetry store queue was full",
+                          store["dropped"]),
+            _fleet_gauge()]
+
+def _fleet_gauge():
+    gauge = metrics.Gauge("vetnet_iot_fleet_devices", "Devices by dashboard status", ("status",))
+    for status, n in fleet_status.stats()["status_counts"].items():
+        gauge.labels(status).set(n)
+    return gauge
+
+metrics.registry.register_collector(collect_iot_metrics)
 
 class DeviceRegistration(BaseModel):
     device_id: str
@@ -48,127 +98,269 @@ async def register_device(reg: DeviceRegistration):
     """Register a physical device to an animal profile"""
     device_registry[reg.device_id] = reg.dict()
     # Initialize buffer if not exists
-    if reg.device_id not in device_stream_buffer:
-        device_stream_buffer[reg.device_id] = []
+    device_stream_buffer.add_device(reg.device_id, reg.animal_id, reg.species)
     return {"status": "success", "message": f"Device {reg.device_id} registered to {reg.name}"}
 
-@router.post("/telemetry", response_model=AlertResponse)
-async def ingest_telemetry(data: TelemetryData):
-    """
-    Ingest real-time telemetry from IoT Collars/Tags.
-    """
-    # 1. Store Data (Simulated persistence)
-    if data.device_id not in device_stream_buffer:
-        device_stream_buffer[data.device_id] = []
-    
-    # Keep last 50 readings
-    device_stream_buffer[data.device_id].append(data)
-    if len(device_stream_buffer[data.device_id]) > 50:
-        device_stream_buffer[data.device_id].pop(0)
-
-    # 2. Analyze Vitals immediately (Edge Computing Pattern)
-    analysis = analyze_vitals(
-        animal_type=data.species,
-        temp=data.temperature,
-        hr=data.heart_rate
-    )
-
-    # 3. Formulate Response/Actions
+def _assess_reading(data, analysis):
+    """(status, alerts, actions) for one reading, given analyze_vitals() of it."""
+    alerts = list(analysis['alerts'])
     actions = []
     status = "NORMAL"
 
-    if analysis['alerts']:
+    if alerts:
         status = "ALERT"
         # Simple logical rules for actions
-        for alert in analysis['alerts']:
+        for alert in alerts:
             if alert['severity'] == 'CRITICAL':
                 status = "CRITICAL"
                 actions.append(f"IMMEDIATE ATTENTION: Check {data.animal_id} for {alert['param']}")
             elif alert['severity'] == 'WARNING':
                 actions.append(f"Monitor: {data.animal_id} showing signs of {alert['param']} stress")
 
-    # 4. Check Activity Levels (Simple logic)
+    # Check Activity Levels (Simple logic)
     if data.activity_level is not None:
         # Example: Cow with very low activity -> Lethargy/Illness
         if data.species == 'Cattle' and data.activity_level < 10.0:
             status = "WARNING" if status == "NORMAL" else status
-            analysis['alerts'].append({
+            alerts.append({
                 'severity': 'WARNING',
                 'message': 'Low Activity: Possible lethargy or lameness',
                 'param': 'Activity'
             })
             actions.append("Check for lameness or isolate animal")
 
+    return status, alerts, actions
+
+def _store_readings(device_id, readings):
+    """Append readings (oldest first) to a device's ring buffer and queue them for the telemetry store."""
+    if telemetry_store is not None:
+        telemetry_store.append([(r.device_id, r.timestamp, r.animal_id, r.species, r.temperature, r.heart_rate,
+                                 r.activity_level, r.battery_level) for r in readings])
+    latest = readings[-1]
+    if len(readings) == 1:
+        device_stream_buffer.append(device_id, latest.animal_id, latest.species, latest.timestamp,
+                                    latest.temperature, latest.heart_rate, latest.activity_level,
+                                    latest.battery_level)
+        return
+    device_stream_buffer.extend(device_id, latest.animal_id, latest.species, {
+        "timestamp": [r.timestamp for r in readings],
+        "temperature": [r.temperature for r in readings],
+        "heart_rate": [r.heart_rate for r in readings],
+        "activity_level": [r.activity_level for r in readings],
+        "battery_level": [r.battery_level for r in readings],
+    })
+
+def _update_fleet_status(data, analysis):
+    """Refresh a device's dashboard record from its newest reading and analyze_vitals() of it."""
+    alerts = analysis['alerts']
+    fleet_status.update(data.device_id, data.animal_id, data.species, data.timestamp, dashboard_status(alerts),
+                        temperature=data.temperature, heart_rate=data.heart_rate, activity=data.activity_level,
+                        battery=data.battery_level, alerts=[a['message'] for a in alerts])
+
+@router.post("/telemetry", response_model=AlertResponse)
+async def ingest_telemetry(data: TelemetryData):
+    """
+    Ingest real-time telemetry from IoT Collars/Tags.
+    """
+    # 1. Store Data (Simulated persistence)
+    _store_readings(data.device_id, [data])
+
+    # 2. Analyze Vitals immediately (Edge Computing Pattern)
+    analysis = analyze_vitals(
+        animal_type=data.species,
+        temp=data.temperature,
+        hr=data.heart_rate
+    )
+
+    # 3. Formulate Response/Actions (4. activity check included)
+    status, alerts, actions = _assess_reading(data, analysis)
+    _update_fleet_status(data, analysis)
+
+    readings_ingested.labels(data.species).inc()
+    for alert in alerts:
+        alerts_raised.labels(data.species, alert['severity']).inc()
+
     return {
         "status": status,
-        "alerts": analysis['alerts'],
+        "alerts": alerts,
         "actions": list(set(actions))
     }
 
+def _analyze_batch(readings):
+    """
+    analyze_vitals() for every reading, as one vectorized check; alert
+    messages are built only for the readings that alert.
+    """
+    species = [data.species for data in readings]
+    result = analyze_vitals_batch(species_codes(species),
+                                  temps=[data.temperature for data in readings],
+                                  hrs=[data.heart_rate for data in readings])
+    alerts = vitals_alerts(result, species)
+    return [{'alerts': alerts.get(i, [])} for i in range(len(readings))]
+
+def _validate_batch(body):
+    """(readings, rejected): valid TelemetryData in order, and {"index", "error"} for the rest."""
+    try:
+        return _telemetry_batch.validate_json(body), []
+    except ValidationError:
+        pass
+    # Some readings are invalid: validate one by one to keep the good ones
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of telemetry readings")
+    if len(items) > MAX_TELEMETRY_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_TELEMETRY_BATCH} readings)")
+    readings, rejected = [], []
+    for index, item in enumerate(items):
+        try:
+            readings.append(TelemetryData.model_validate(item))
+        except ValidationError as e:
+            rejected.append({"index": index, "error": e.errors(include_url=False, include_context=False)})
+    return readings, rejected
+
+async def _read_batch_body(request):
+    """The request body, or a 413 as soon as it is known to exceed MAX_TELEMETRY_BATCH_BYTES."""
+    too_large = HTTPException(status_code=413, detail=f"Batch too large (max {MAX_TELEMETRY_BATCH_BYTES} bytes)")
+    length = request.headers.get('content-length')
+    if length is not None and length.isdigit() and int(length) > MAX_TELEMETRY_BATCH_BYTES:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():  # chunked bodies have no Content-Length
+        size += len(chunk)
+        if size > MAX_TELEMETRY_BATCH_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _assess_batch(body):
+    """
+    Validate, analyze and assess a batch body (CPU only, no shared state:
+    runs in the threadpool). Returns (readings, rejected, devices, newest,
+    species_counts, alert_counts) for ingest_telemetry_batch to apply.
+    """
+    readings, rejected = _validate_batch(body)
+    if len(readings) + len(rejected) > MAX_TELEMETRY_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_TELEMETRY_BATCH} readings)")
+
+    devices = {}
+    newest = {}  # device_id -> (reading, analysis) of its last reading
+    species_counts, alert_counts = {}, {}
+    for data, analysis in zip(readings, _analyze_batch(readings)):
+        newest[data.device_id] = (data, analysis)
+        status, alerts, actions = _assess_reading(data, analysis)
+        result = devices.get(data.device_id)
+        if result is None:
+            result = devices[data.device_id] = {"device_id": data.device_id, "animal_id": data.animal_id,
+                                                "readings": 0, "status": "NORMAL", "alerts": [], "actions": set()}
+        result["readings"] += 1
+        if STATUS_RANK[status] > STATUS_RANK[result["status"]]:
+            result["status"] = status
+        for alert in alerts:
+            result["alerts"].append(dict(alert, timestamp=data.timestamp))
+            alert_counts[(data.species, alert['severity'])] = alert_counts.get((data.species, alert['severity']), 0) + 1
+        result["actions"].update(actions)
+        species_counts[data.species] = species_counts.get(data.species, 0) + 1
+
+    for result in devices.values():
+        result["actions"] = sorted(result["actions"])
+    return readings, rejected, devices, newest, species_counts, alert_counts
+
+@router.post("/telemetry/batch")
+async def ingest_telemetry_batch(request: Request):
+    """
+    Ingest many readings (e.g. buffered by a farm gateway) in one request.
+    Body: a JSON array of TelemetryData objects, oldest first per device.
+    Invalid readings are reported by index and skipped; the rest are stored
+    and analyzed, and the response has one alert result per device.
+    """
+    body = await _read_batch_body(request)
+    # Parsing and analysis run in the threadpool; only the (event-loop owned)
+    # buffers, fleet index and metrics are updated here
+    readings, rejected, devices, newest, species_counts, alert_counts = await run_in_threadpool(_assess_batch, body)
+
+    by_device = {}
+    for data in readings:
+        by_device.setdefault(data.device_id, []).append(data)
+    for device_id, device_readings in by_device.items():
+        _store_readings(device_id, device_readings)
+
+    for species, n in species_counts.items():
+        readings_ingested.labels(species).inc(n)
+    for (species, severity), n in alert_counts.items():
+        alerts_raised.labels(species, severity).inc(n)
+    for data, analysis in newest.values():
+        _update_fleet_status(data, analysis)
+
+    return {
+        "accepted": len(readings),
+        "rejected": rejected,
+        "devices": list(devices.values())
+    }
+
 @router.get("/device/{device_id}/history")
-async def get_device_history(device_id: str):
-    """Retrieve history for a specific device"""
-    if device_id not in device_stream_buffer:
-        return {"history": []}
-    return {"history": device_stream_buffer[device_id]}
+async def get_device_history(device_id: str, start: Optional[float] = None, end: Optional[float] = None,
+                             resolution: Optional[float] = None, limit: int = MAX_HISTORY_ROWS):
+    """
+    Retrieve history for a specific device.
+    Without parameters: its latest readings, from memory. With `start` /
+    `end` (epoch seconds; default the last hour) or `resolution` (seconds
+    per point): from the telemetry store, as raw readings or 1-minute /
+    1-hour rollups, whichever is coarsest within `resolution`.
+    """
+    if start is None and end is None and resolution is None:
+        return {"history": device_stream_buffer.readings(device_id)}
+    if telemetry_store is None:
+        raise HTTPException(status_code=503, detail="Telemetry store is disabled (VETNET_TELEMETRY_STORE=0)")
+    end = time.time() if end is None else end
+    start = end - 3600 if start is None else start
+    if start >= end or limit <= 0 or (resolution is not None and resolution < 0):
+        raise HTTPException(status_code=400, detail="start must be before end, limit > 0 and resolution >= 0")
+    result = await run_in_threadpool(telemetry_store.query, device_id, start, end, resolution, limit)
+    return {"device_id": device_id, "start": start, "end": end, "resolution": result["resolution"],
+            "history": result["points"]}
+
+def _split(values):
+    return {v.strip() for v in values.split(",") if v.strip()} if values else None
 
 @router.get("/dashboard/summary")
-async def get_dashboard_summary():
+async def get_dashboard_summary(request: Request, status: Optional[str] = None, species: Optional[str] = None,
+                                stale: Optional[bool] = None, stale_after_s: float = DEVICE_STALE_S,
+                                offset: int = 0, limit: Optional[int] = None):
     """
     Get a summary of all active devices and their current status.
     Ideal for the main dashboard view.
+
+    Served from the fleet status index. Filters: `status` and `species`
+    (comma-separated), `stale` (no reading for more than `stale_after_s`
+    seconds); `offset`/`limit` page the devices. Answers 304 when the
+    If-None-Match ETag is still current.
     """
-    summary = []
-    current_time = time.time()
-    
-    for device_id, history in device_stream_buffer.items():
-        if not history:
-            continue
-            
-        last_reading = history[-1]
-        
-        # Analyze vitals (re-run logic to ensure we have latest status)
-        analysis = analyze_vitals(
-            animal_type=last_reading.species,
-            temp=last_reading.temperature,
-            hr=last_reading.heart_rate
-        )
-        
-        status = "HEALTHY"
-        # Determine overall status
-        for alert in analysis['alerts']:
-            if alert['severity'] == 'CRITICAL':
-                status = "CRITICAL"
-                break
-            elif alert['severity'] == 'WARNING' and status != "CRITICAL":
-                status = "WARNING"
-        
-        summary.append({
-            "device_id": device_id,
-            "animal_id": last_reading.animal_id,
-            "species": last_reading.species,
-            "last_seen": last_reading.timestamp,
-            "seconds_ago": int(current_time - last_reading.timestamp),
-            "status": status,
-            "temperature": last_reading.temperature,
-            "heart_rate": last_reading.heart_rate,
-            "activity": last_reading.activity_level,
-            "battery": last_reading.battery_level,
-            "alerts": [a['message'] for a in analysis['alerts']]
-        })
-        
-    return {"devices": summary, "count": len(summary)}
+    statuses = _split(status)
+    if statuses and not statuses <= set(STATUSES):
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(STATUSES)}")
+    if offset < 0 or (limit is not None and limit <= 0) or stale_after_s < 0:
+        raise HTTPException(status_code=400, detail="offset and stale_after_s must be >= 0 and limit > 0")
+
+    etag, body = fleet_status.render(statuses, _split(species), stale, stale_after_s, offset, limit)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("/diagnose/{device_id}")
 async def diagnose_device_telemetry(device_id: str):
     """
     Run the full AI Disease Prediction Model on the latest telemetry data for a device.
     """
-    if device_id not in device_stream_buffer or not device_stream_buffer[device_id]:
+    latest = device_stream_buffer.latest(device_id)
+    if latest is None:
         raise HTTPException(status_code=404, detail="Device not found or no data")
 
     # Get latest reading
-    reading = device_stream_buffer[device_id][-1]
+    reading = TelemetryData.model_construct(**latest)
     
     # Map Telemetry -> AI Input Features
     # Note: We infer symptoms based on vital signs for the AI
@@ -257,8 +449,14 @@ async def diagnose_device_telemetry(device_id: str):
     
     # Dynamic Import to avoid circular deps and allow safe failure
     try:
-        from inference_nn import predict_disease_nn
-        result = predict_disease_nn(ai_input)
+        from src.inference_nn import predict_disease_nn
+        # Model work runs on the bounded inference pool so telemetry
+        # ingestion on this event loop is never stuck behind a diagnosis
+        result = await inference_executor.run(predict_disease_nn, ai_input, deadline=current_deadline())
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         import traceback
         print(f"❌ AI Diagnosis Error for {device_id}: {e}")
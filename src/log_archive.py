@@ -0,0 +1,220 @@
+"""
+Log Rotation & Partitioned Archives
+Rotates the active JSONL logs (logs/prediction_log.jsonl,
+logs/system_metrics.jsonl) into gzip-compressed, day-partitioned segments:
+
+    logs/predictions/date=YYYY-MM-DD/part-00000.jsonl.gz
+    logs/predictions/_manifest.json
+
+The manifest lists every segment with its first/last timestamp and row
+count, so a time-range read opens only the partitions that overlap the
+range ("last 7 days" reads 7 days of segments, not the whole history).
+
+The BufferedLogWriter in src/monitoring.py rotates when the active file
+would exceed VETNET_LOG_ROTATE_MB or when an entry from a new day arrives. Several worker processes append to
+the same active file, so rotation is coordinated with flock on
+<log>.lock: writers hold it shared while appending (and reopen the file if
+it was rotated underneath them); the rotating process holds it exclusive
+while renaming the file away.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from glob import glob
+
+try:
+    import fcntl
+    FLOCK_AVAILABLE = True
+except ImportError:
+    # No cross-process coordination (single-process use only)
+    FLOCK_AVAILABLE = False
+
+COMPRESS_LEVEL = 5
+MANIFEST_NAME = "_manifest.json"
+
+# Active log file name -> archive directory name (next to the log)
+ARCHIVE_NAMES = {
+    "prediction_log.jsonl": "predictions",
+    "system_metrics.jsonl": "metrics",
+}
+
+_TIMESTAMP_RE = re.compile(rb'"timestamp": "([^"]+)"')
+
+def archive_dir_for(log_path):
+    name = os.path.basename(log_path)
+    archive = ARCHIVE_NAMES.get(name, os.path.splitext(name)[0] + "_archive")
+    return os.path.join(os.path.dirname(log_path), archive)
+
+def entry_date(timestamp):
+    """'YYYY-MM-DD' partition of an ISO timestamp string."""
+    return str(timestamp)[:10]
+
+@contextmanager
+def file_lock(log_path, exclusive=False):
+    """flock on <log>.lock (shared for appends, exclusive for rotation)."""
+    if not FLOCK_AVAILABLE:
+        yield
+        return
+    fd = os.open(log_path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)  # also releases the lock
+
+def first_entry_date(log_path):
+    """Partition date of the first line of a log file, or None if it is empty."""
+    try:
+        with open(log_path, 'rb') as f:
+            match = _TIMESTAMP_RE.search(f.readline())
+    except OSError:
+        return None
+    return entry_date(match.group(1).decode()) if match else None
+
+class LogArchive:
+    """The partitioned segments and manifest of one log."""
+    def __init__(self, log_path):
+        self.log_path = log_path
+        self.root = archive_dir_for(log_path)
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+
+    # -- writing ---------------------------------------------------------
+
+    def rotate(self, should_rotate):
+        """
+        Move the active file aside and archive it, if `should_rotate(date, size)`
+        still holds once the exclusive lock is held (another process may have
+        rotated first). Returns the new segment's manifest entry, or None.
+        """
+        with file_lock(self.log_path, exclusive=True):
+            try:
+                size = os.path.getsize(self.log_path)
+            except OSError:
+                return None
+            date = first_entry_date(self.log_path)
+            if size == 0 or date is None or not should_rotate(date, size):
+                return None
+            staged = f"{self.log_path}.rotating-{os.getpid()}-{time.time_ns()}"
+            os.rename(self.log_path, staged)
+            # Recreate the active file right away so readers never miss it
+            open(self.log_path, 'ab').close()
+        return self.archive_file(staged, date)
+
+    def archive_staged(self):
+        """Archive files left staged by a process that died mid-rotation."""
+        for staged in sorted(glob(glob_escape(self.log_path) + ".rotating-*")):
+            if _owner_alive(staged):
+                continue  # still being archived by its owner
+            date = first_entry_date(staged)
+            if date is None:
+                os.remove(staged)
+            else:
+                self.archive_file(staged, date)
+
+    def archive_file(self, staged, date):
+        """Compress a staged file into the date partition and add it to the manifest."""
+        partition = os.path.join(self.root, f"date={date}")
+        os.makedirs(partition, exist_ok=True)
+        segment = self._reserve_part(partition)
+
+        rows, first_ts, last_ts = 0, None, None
+        with open(staged, 'rb') as src, gzip.open(segment, 'wb', compresslevel=COMPRESS_LEVEL) as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                dst.write(line if line.endswith(b"\n") else line + b"\n")
+                rows += 1
+                match = _TIMESTAMP_RE.search(line)
+                if match:
+                    ts = match.group(1).decode()
+                    first_ts = ts if first_ts is None or ts < first_ts else first_ts
+                    last_ts = ts if last_ts is None or ts > last_ts else last_ts
+        entry = {
+            "path": os.path.relpath(segment, self.root),
+            "date": date,
+            "start": first_ts,
+            "end": last_ts,
+            "rows": rows,
+            "bytes": os.path.getsize(segment),
+            "raw_bytes": os.path.getsize(staged),
+        }
+        self._update_manifest(lambda segments: segments + [entry])
+        os.remove(staged)
+        return entry
+
+    def annotate(self, segment_path, **fields):
+        """Add fields (e.g. the columnar copy's path) to one manifest entry."""
+        self._update_manifest(lambda segments: [dict(s, **fields) if s["path"] == segment_path else s
+                                                for s in segments])
+
+    def _reserve_part(self, partition):
+        n = len(glob(os.path.join(glob_escape(partition), "part-*.jsonl.gz")))
+        while True:
+            path = os.path.join(partition, f"part-{n:05d}.jsonl.gz")
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                return path
+            except FileExistsError:
+                n += 1
+
+    def _update_manifest(self, change):
+        os.makedirs(self.root, exist_ok=True)
+        with file_lock(self.manifest_path, exclusive=True):
+            manifest = self.read_manifest()
+            manifest["segments"] = sorted(change(manifest["segments"]), key=lambda s: (s["start"] or "", s["path"]))
+            tmp = self.manifest_path + f".tmp-{os.getpid()}"
+            with open(tmp, 'w') as f:
+                json.dump(manifest, f, indent=1)
+            os.replace(tmp, self.manifest_path)
+
+    # -- reading ---------------------------------------------------------
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"log": os.path.basename(self.log_path), "segments": []}
+
+    def segments(self, start=None, end=None):
+        """Manifest entries overlapping [start, end) (ISO strings; None = open)."""
+        selected = []
+        for segment in self.read_manifest()["segments"]:
+            if start is not None and segment["end"] is not None and segment["end"] < start:
+                continue
+            if end is not None and segment["start"] is not None and segment["start"] >= end:
+                continue
+            selected.append(segment)
+        return selected
+
+    def read_segment(self, segment):
+        """Raw lines (bytes) of one segment."""
+        with gzip.open(os.path.join(self.root, segment["path"]), 'rb') as f:
+            return [line.rstrip(b"\n") for line in f if line.strip()]
+
+def _owner_alive(staged):
+    """Whether the process that staged <log>.rotating-<pid>-<ns> is still running."""
+    try:
+        pid = int(staged.rsplit(".rotating-", 1)[1].split("-")[0])
+    except (IndexError, ValueError):
+        return False
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def glob_escape(path):
+    return re.sub(r'([*?\[])', r'[\1]', path)
+
+def remove_archive(log_path):
+    """Delete a log's archive directory (tests / manual cleanup)."""
+    shutil.rmtree(archive_dir_for(log_path), ignore_errors=True)
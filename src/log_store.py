@@ -0,0 +1,184 @@
+"""
+Columnar Prediction Log Store
+Compacts archived prediction log segments (see src/log_archive.py) into
+Parquet files next to their gzip JSONL originals:
+
+    logs/predictions/date=YYYY-MM-DD/part-00000.jsonl.gz
+    logs/predictions/date=YYYY-MM-DD/part-00000.parquet
+
+The files are sorted by timestamp and written in row groups with min/max
+statistics; animal, category, disease and status are dictionary-encoded
+(they load into pandas as Categorical columns). query() opens only the
+manifest segments overlapping the requested time range and pushes the
+time-range and species filters down to the Parquet row groups, so
+analytics pages read a few columns of the matching rows instead of
+re-parsing JSON.
+
+Requires pyarrow; without it PYARROW_AVAILABLE is False and callers fall
+back to the JSON readers in src/monitoring.py.
+"""
+import functools
+import gzip
+import io
+import json
+import operator
+import os
+
+import pandas as pd
+
+from src.log_archive import LogArchive, first_entry_date
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DICTIONARY_COLUMNS = ("animal", "category", "disease", "status")
+ROW_GROUP_SIZE = 64 * 1024
+COMPRESSION = "zstd"
+
+if PYARROW_AVAILABLE:
+    # Mirrors monitoring.PREDICTION_DTYPES; other fields are not kept in the columnar copy
+    PREDICTION_SCHEMA = pa.schema([
+        ("timestamp", pa.timestamp("us")),
+        ("animal", pa.string()),
+        ("category", pa.string()),
+        ("disease", pa.string()),
+        ("category_confidence", pa.float64()),
+        ("disease_confidence", pa.float64()),
+        ("latency_ms", pa.float64()),
+        ("status", pa.string()),
+        ("error_msg", pa.string()),
+        ("batch_size", pa.float64()),
+    ])
+    # Active log file name -> schema of its columnar copy
+    COLUMNAR_SCHEMAS = {"prediction_log.jsonl": PREDICTION_SCHEMA}
+else:
+    PREDICTION_SCHEMA = None
+    COLUMNAR_SCHEMAS = {}
+
+def schema_for(log_path):
+    """Columnar schema of a log, or None if it is not compacted."""
+    return COLUMNAR_SCHEMAS.get(os.path.basename(log_path))
+
+def read_jsonl(data, schema):
+    """Arrow table of JSONL bytes with the given schema (unknown fields are ignored)."""
+    data = data[:data.rfind(b"\n") + 1]  # drop a partial last line
+    if not data.strip():
+        return schema.empty_table()
+    options = pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior='ignore')
+    try:
+        return pa_json.read_json(io.BytesIO(data), parse_options=options)
+    except (pa.ArrowInvalid, ValueError):
+        # A corrupt line: keep the lines that parse instead of failing the page
+        valid = []
+        for line in data.split(b"\n"):
+            try:
+                if line.strip():
+                    json.loads(line)
+                    valid.append(line)
+            except ValueError:
+                continue
+        if not valid:
+            return schema.empty_table()
+        return pa_json.read_json(io.BytesIO(b"\n".join(valid) + b"\n"), parse_options=options)
+
+def encode_dictionaries(table):
+    for name in DICTIONARY_COLUMNS:
+        i = table.schema.get_field_index(name)
+        if i >= 0 and not pa.types.is_dictionary(table.schema.field(i).type):
+            table = table.set_column(i, name, table.column(i).dictionary_encode())
+    return table
+
+def columnar_path(segment):
+    return segment["path"].replace(".jsonl.gz", ".parquet")
+
+def compact_segment(archive, segment, schema):
+    """Write the Parquet copy of one archived segment and record it in the manifest."""
+    with gzip.open(os.path.join(archive.root, segment["path"]), 'rb') as f:
+        data = f.read()
+    table = encode_dictionaries(read_jsonl(data, schema)).sort_by("timestamp")
+
+    path = columnar_path(segment)
+    full_path = os.path.join(archive.root, path)
+    tmp = full_path + f".tmp-{os.getpid()}"
+    pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE, compression=COMPRESSION,
+                   use_dictionary=list(DICTIONARY_COLUMNS))
+    os.replace(tmp, full_path)
+    archive.annotate(segment["path"], columnar=path, columnar_bytes=os.path.getsize(full_path))
+    return path
+
+def compact_archive(log_path):
+    """Compact every archived segment of a log that has no columnar copy yet."""
+    schema = schema_for(log_path)
+    if schema is None or not PYARROW_AVAILABLE:
+        return 0
+    archive = LogArchive(log_path)
+    compacted = 0
+    for segment in archive.segments():
+        if not segment.get("columnar"):
+            compact_segment(archive, segment, schema)
+            compacted += 1
+    return compacted
+
+def _timestamp(value):
+    return pa.scalar(pd.Timestamp(value).to_pydatetime(), pa.timestamp("us"))
+
+def _filter(start, end, species):
+    """Arrow filter expression for the query, or None for everything."""
+    conditions = []
+    if start is not None:
+        conditions.append(pa_dataset.field("timestamp") >= _timestamp(start))
+    if end is not None:
+        conditions.append(pa_dataset.field("timestamp") < _timestamp(end))
+    if species:
+        conditions.append(pa_dataset.field("animal").isin(list(species)))
+    return functools.reduce(operator.and_, conditions) if conditions else None
+
+def _iso(value):
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def query(log_path, start=None, end=None, species=None, columns=None):
+    """
+    Rows of a log with start <= timestamp < end (and animal in `species`),
+    as a pandas DataFrame sorted by timestamp. `columns` limits the columns
+    read. Archived segments come from their Parquet copy when there is one;
+    the active file (and anything not yet compacted) is parsed from JSON.
+    """
+    schema = schema_for(log_path)
+    expression = _filter(start, end, species)
+    # Filter columns must be read too; dropped again at the end
+    wanted = list(columns) if columns else schema.names
+    read_columns = list(dict.fromkeys(wanted + ["timestamp"] + (["animal"] if species else [])))
+
+    archive = LogArchive(log_path)
+    tables = []
+    for segment in archive.segments(_iso(start), _iso(end)):
+        if segment.get("columnar"):
+            table = pq.read_table(os.path.join(archive.root, segment["columnar"]),
+                                  columns=read_columns, filters=expression)
+        else:
+            lines = archive.read_segment(segment)
+            table = read_jsonl(b"\n".join(lines) + b"\n", schema)
+            table = table.filter(expression) if expression is not None else table
+        tables.append(encode_dictionaries(table.select(read_columns)))
+
+    first_date = first_entry_date(log_path)
+    if first_date is not None and (end is None or first_date <= _iso(end)):
+        with open(log_path, 'rb') as f:
+            table = read_jsonl(f.read(), schema)
+        table = table.filter(expression) if expression is not None else table
+        tables.append(encode_dictionaries(table.select(read_columns)))
+
+    if not tables:
+        table = encode_dictionaries(schema.empty_table().select(read_columns))
+    else:
+        table = pa.concat_tables(tables, promote_options="permissive").unify_dictionaries()
+    table = table.sort_by("timestamp").select(wanted)
+    return table.to_pandas()
@@ -0,0 +1,301 @@
+"""
+Prometheus Metrics
+In-process metric registry rendered in the Prometheus text exposition
+format (version 0.0.4, which OpenMetrics scrapers also accept) at /metrics.
+
+- Counters and histograms are updated in memory on the request path (a
+  dict lookup, a bisect and a lock; no file I/O).
+- Everything that already exists as state (prediction cache counters, log
+  writer queues, IoT buffers, process CPU/memory) is read by collectors
+  only when /metrics is scraped.
+
+Each process keeps its own registry. With VETNET_WORKERS > 1 a scrape is
+answered by one worker (like /ready), so scrape each worker's port or run a
+single worker per target.
+"""
+import bisect
+import math
+import threading
+import time
+
+import psutil
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+NAMESPACE = "vetnet"
+
+# Histogram bucket upper bounds, in seconds
+REQUEST_SECONDS_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+STAGE_SECONDS_BUCKETS = [0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1]
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """A metric family: one value (or histogram) per combination of label values."""
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}  # label values -> child
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The child for these label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+            self._children[values] = child  # also cache under the caller's raw values
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def header(self, name=None):
+        name = name or self.name
+        documentation = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        return [f"# HELP {name} {documentation}", f"# TYPE {name} {self.type}"]
+
+    def _items(self):
+        # Children are cached under raw and str()-ed label values: emit each once
+        seen, items = set(), []
+        for values, child in list(self._children.items()):
+            if id(child) not in seen:
+                seen.add(id(child))
+                items.append((tuple(str(v) for v in values), child))
+        return sorted(items, key=lambda item: item[0])
+
+    def render(self):
+        return self.header() + self.samples()
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+class Counter(Metric):
+    """Monotonic count; exposed as <name>_total."""
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def header(self, name=None):
+        # The 0.0.4 text format names counter families after their samples
+        return super().header(name or f"{self.name}_total")
+
+    def samples(self):
+        return [f"{self.name}_total{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._items()]
+
+class Gauge(Metric):
+    """A value that can go up and down."""
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def samples(self):
+        return [f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._items()]
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value, n=1):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += n
+            self.sum += value * n
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; exposed with cumulative <name>_bucket{le=...}, _sum and _count."""
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=REQUEST_SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(float(b) for b in buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value, n=1):
+        self.labels().observe(value, n)
+
+    def samples(self):
+        lines = []
+        for values, child in self._items():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + [math.inf], counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, ('le', _format_value(bound)))} "
+                             f"{cumulative}")
+            labels = _label_text(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics plus collectors that produce metrics at scrape time."""
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules re-imported (tests, reloads) get the live metric back
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(f"{NAMESPACE}_{name}", documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(f"{NAMESPACE}_{name}", documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=REQUEST_SECONDS_BUCKETS):
+        return self._add(Histogram(f"{NAMESPACE}_{name}", documentation, labelnames, buckets))
+
+    def register_collector(self, collect_fn):
+        """`collect_fn()` returns an iterable of Metric objects built fresh for each scrape."""
+        if collect_fn not in self._collectors:
+            self._collectors.append(collect_fn)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collect_fn in list(self._collectors):
+            try:
+                for metric in collect_fn():
+                    lines.extend(metric.render())
+            except Exception as e:
+                print(f"⚠️ Metrics collector {getattr(collect_fn, '__name__', collect_fn)} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+# Global Instance
+registry = MetricsRegistry()
+
+def gauge(name, documentation, value, labelnames=(), labels=()):
+    """A one-sample gauge for collectors (not registered)."""
+    metric = Gauge(name, documentation, labelnames)
+    metric.labels(*labels).set(value)
+    return metric
+
+def collect_process():
+    """CPU, memory, threads and open files of this process (standard process_* names)."""
+    process = psutil.Process()
+    with process.oneshot():
+        cpu = process.cpu_times()
+        memory = process.memory_info()
+        threads = process.num_threads()
+        created = process.create_time()
+        fds = process.num_fds() if hasattr(process, 'num_fds') else None
+    cpu_seconds = Counter("process_cpu_seconds", "Total user and system CPU time spent in seconds.")
+    cpu_seconds.inc(cpu.user + cpu.system)
+    metrics = [cpu_seconds,
+               gauge("process_resident_memory_bytes", "Resident memory size in bytes.", memory.rss),
+               gauge("process_virtual_memory_bytes", "Virtual memory size in bytes.", memory.vms),
+               gauge("process_start_time_seconds", "Start time of the process since unix epoch in seconds.", created),
+               gauge("process_threads", "Number of OS threads in the process.", threads)]
+    if fds is not None:
+        metrics.append(gauge("process_open_fds", "Number of open file descriptors.", fds))
+    return metrics
+
+registry.register_collector(collect_process)
+
+def _route_label(scope):
+    route = getattr(scope.get('route'), 'path', None)
+    if route is None:
+        return "unmatched"
+    # Routes of routers included with a prefix may report only their own
+    # path (/telemetry): take the prefix segments from the request path
+    path = scope.get('path', '')
+    extra = path.count('/') - route.count('/')
+    if extra > 0 and ':path}' not in route:
+        return '/'.join(path.split('/')[:extra + 1]) + route
+    return route
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware counting requests and timing them per route. The
+    route is the matched path template (/iot/device/{device_id}/history), so
+    label cardinality stays bounded; unmatched paths share one label.
+    """
+    def __init__(self, app, registry=registry):
+        self.app = app
+        self.requests = registry.counter("http_requests", "HTTP requests by route, method and status",
+                                         ("route", "method", "status"))
+        self.latency = registry.histogram("http_request_duration_seconds", "HTTP request latency by route",
+                                          ("route", "method"), REQUEST_SECONDS_BUCKETS)
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being handled")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status = 500  # if the app raises before starting a response
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        in_flight = self.in_flight.labels()
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.inc(-1)
+            route = _route_label(scope)
+            method = scope.get('method', '')
+            self.requests.labels(route, method, status).inc()
+            self.latency.labels(route, method).observe(elapsed)
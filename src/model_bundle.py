@@ -0,0 +1,268 @@
+"""
+Versioned Model Bundle
+Packs everything inference needs (VetNet weights, its imputer/scaler
+parameters, label vocabularies and the compiled Stage 2 forests) into one
+file that is loaded with a single mmap.
+
+File layout:
+    8 bytes   magic b'VETBNDL1'
+    8 bytes   little-endian uint64 header length
+    header    UTF-8 JSON manifest (format version, bundle version, feature
+              schema, metadata and an index of every array: dtype, shape, offset)
+    arrays    raw little-endian array data, each aligned to 64 bytes
+
+Arrays are returned as read-only views into the mapping, so worker
+processes that open the same bundle share its pages.
+
+Usage:
+    python src/model_bundle.py            # build models/vetnet.bundle from the training artifacts
+    python src/model_bundle.py --inspect  # print the manifest of an existing bundle
+"""
+import sys
+import os
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+from datetime import datetime
+
+import numpy as np
+
+BUNDLE_PATH = os.environ.get('VETNET_BUNDLE', 'models/vetnet.bundle')
+FORMAT_VERSION = 1
+MAGIC = b'VETBNDL1'
+ALIGNMENT = 64
+
+class BundleSchemaError(Exception):
+    """The bundle's format or feature schema does not match this code."""
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def write_bundle(path, manifest, arrays):
+    """
+    Write `arrays` (name -> ndarray) and the JSON-able `manifest` to `path`.
+
+    The bundle version is a hash of the manifest and every array's bytes.
+    The file is written next to `path` and renamed into place, so readers
+    never see a partial bundle.
+    """
+    index, offset = {}, 0
+    digest = hashlib.sha256()
+    arrays = {name: np.ascontiguousarray(a) for name, a in sorted(arrays.items())}
+    for name, a in arrays.items():
+        if a.dtype.byteorder == '>':
+            a = arrays[name] = a.astype(a.dtype.newbyteorder('<'))
+        offset = _align(offset)
+        index[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += a.nbytes
+        digest.update(name.encode())
+        digest.update(a.tobytes())
+
+    manifest = dict(manifest)
+    digest.update(json.dumps(manifest, sort_keys=True, default=str).encode())
+    manifest.update({
+        "format_version": FORMAT_VERSION,
+        "bundle_version": digest.hexdigest()[:16],
+        "created_at": datetime.now().isoformat(),
+        "arrays": index
+    })
+
+    header = json.dumps(manifest, default=str).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, a in arrays.items():
+            f.seek(data_start + index[name]["offset"])
+            f.write(a.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return manifest
+
+class ModelBundle:
+    """A mapped bundle: `manifest` dict plus zero-copy read-only `arrays`."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise BundleSchemaError(f"{path} is not a VetNet bundle")
+        (header_len,) = struct.unpack('<Q', self._mmap[len(MAGIC):len(MAGIC) + 8])
+        header_start = len(MAGIC) + 8
+        self.manifest = json.loads(self._mmap[header_start:header_start + header_len].decode())
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise BundleSchemaError(f"Bundle format {self.manifest.get('format_version')} "
+                                    f"is not supported (expected {FORMAT_VERSION})")
+
+        data_start = _align(header_start + header_len)
+        self.arrays = {}
+        for name, spec in self.manifest["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            self.arrays[name] = np.frombuffer(self._mmap, dtype=dtype, count=count,
+                                              offset=data_start + spec["offset"]).reshape(spec["shape"])
+
+    @property
+    def version(self):
+        return self.manifest["bundle_version"]
+
+    def group(self, prefix):
+        """Arrays under `prefix/`, keyed by the rest of their name."""
+        prefix = prefix + '/'
+        return {name[len(prefix):]: a for name, a in self.arrays.items() if name.startswith(prefix)}
+
+def read_bundle(path=BUNDLE_PATH):
+    return ModelBundle(path)
+
+# Array-backed stand-ins for the fitted sklearn objects, with the same
+# transform arithmetic (and therefore bit-identical outputs)
+
+class BundleImputer:
+    """SimpleImputer.transform: NaNs replaced by the fitted column statistics."""
+    def __init__(self, fill):
+        self.statistics_ = fill
+
+    def transform(self, X):
+        X = np.array(X, copy=True)
+        missing = np.isnan(X)
+        if missing.any():
+            X[missing] = np.broadcast_to(self.statistics_, X.shape)[missing]
+        return X
+
+class BundleScaler:
+    """StandardScaler.transform (parameters cast to the input dtype, as sklearn does)."""
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+
+    def transform(self, X):
+        X = np.array(X, copy=True)
+        X -= self.mean_.astype(X.dtype)
+        X /= self.scale_.astype(X.dtype)
+        return X
+
+class BundleLabelEncoder:
+    """LabelEncoder.inverse_transform over a stored class list."""
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.int64)]
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def build_bundle(models_dir='models', output_path=BUNDLE_PATH, data_path='data/enhanced_training_data.csv'):
+    """
+    Build a bundle from the artifacts written by src/train_nn.py (VetNet) and
+    scripts/retrain_models.py (Stage 2).
+
+    Stage 2 forests are stored in the flat layout of src/forest_compiler.py,
+    so serving from a bundle does not need xgboost Boosters.
+    """
+    import joblib
+    import torch
+    from src.compiled_pipeline import CompiledPipeline
+
+    print("\n" + "="*60)
+    print("BUILDING MODEL BUNDLE")
+    print("="*60)
+
+    path = lambda name: os.path.join(models_dir, name)
+    checkpoint = torch.load(path('vetnet_checkpoint.pth'), map_location='cpu', weights_only=False)
+    state_dict = torch.load(path('vetnet_best_state.pth'), map_location='cpu')
+    imputer = joblib.load(path('vetnet_imputer.pkl'))
+    scaler = joblib.load(path('vetnet_scaler.pkl'))
+    species_encoder = joblib.load(path('species_encoder.pkl'))
+    category_encoder = joblib.load(path('category_encoder.pkl'))
+    stage2_models = joblib.load(path('stage2_models.pkl'))
+    disease_encoders = joblib.load(path('disease_encoders.pkl'))
+
+    if imputer.strategy not in ('mean', 'median', 'most_frequent', 'constant') or imputer.add_indicator:
+        raise NotImplementedError("Unsupported VetNet imputer configuration")
+    if np.isnan(imputer.statistics_).any():
+        raise NotImplementedError("VetNet imputer drops all-NaN columns; retrain before bundling")
+
+    arrays = {
+        "vetnet/imputer_fill": np.asarray(imputer.statistics_, dtype=np.float64),
+        "vetnet/scaler_mean": np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_), dtype=np.float64),
+        "vetnet/scaler_scale": np.asarray(scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_), dtype=np.float64),
+    }
+    for name, tensor in state_dict.items():
+        arrays[f"vetnet/weights/{name}"] = tensor.detach().cpu().numpy()
+
+    numeric_columns = list(checkpoint['numeric_cols']) + list(checkpoint['symptom_cols'])
+    if len(numeric_columns) != scaler.n_features_in_:
+        raise BundleSchemaError(f"Checkpoint lists {len(numeric_columns)} numeric columns, "
+                                f"scaler expects {scaler.n_features_in_}")
+
+    stage2_meta = {}
+    for category, pipeline in stage2_models.items():
+        compiled = CompiledPipeline(pipeline, backend='native')
+        meta, category_arrays = compiled.export_state()
+        meta["disease_classes"] = [str(c) for c in disease_encoders[category].classes_]
+        stage2_meta[category] = meta
+        for name, a in category_arrays.items():
+            arrays[f"stage2/{category}/{name}"] = a
+
+    sources = ['vetnet_checkpoint.pth', 'vetnet_best_state.pth', 'vetnet_imputer.pkl', 'vetnet_scaler.pkl',
+               'species_encoder.pkl', 'category_encoder.pkl', 'stage2_models.pkl', 'disease_encoders.pkl']
+    manifest = {
+        "feature_schema": {
+            "vetnet_numeric": numeric_columns,
+            "species": [str(s) for s in species_encoder.classes_],
+            "categories": [str(c) for c in category_encoder.classes_],
+            "stage2": {cat: meta["required_columns"] for cat, meta in stage2_meta.items()},
+        },
+        "vetnet": {
+            "n_categories": int(checkpoint['n_categories']),
+            "n_species": int(checkpoint['n_species']),
+            "numeric_dim": int(scaler.n_features_in_),
+        },
+        "stage2": stage2_meta,
+        "sources": {name: _file_sha256(path(name)) for name in sources},
+        "training_data": {"path": data_path, "sha256": _file_sha256(data_path) if os.path.exists(data_path) else None},
+    }
+
+    manifest = write_bundle(output_path, manifest, arrays)
+    size_mb = os.path.getsize(output_path) / 1e6
+    print(f"✅ Saved bundle {manifest['bundle_version']} to {output_path} ({size_mb:.1f} MB, "
+          f"{len(arrays)} arrays, {len(stage2_meta)} Stage 2 models)")
+    return output_path
+
+def try_build_bundle(models_dir='models', output_path=BUNDLE_PATH):
+    """build_bundle() for the training scripts: a missing half is a warning, not an error."""
+    try:
+        return build_bundle(models_dir, output_path)
+    except FileNotFoundError as e:
+        print(f"⚠️ Model bundle not built (missing artifact: {e.filename}); "
+              f"run both src/train_nn.py and scripts/retrain_models.py")
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the VetNet model bundle")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--output', default=BUNDLE_PATH)
+    parser.add_argument('--inspect', action='store_true', help="Print the manifest of --output and exit")
+    args = parser.parse_args()
+
+    if args.inspect:
+        bundle = read_bundle(args.output)
+        manifest = {k: v for k, v in bundle.manifest.items() if k not in ('arrays', 'stage2')}
+        print(json.dumps(manifest, indent=2))
+        print(f"{len(bundle.arrays)} arrays, {sum(a.nbytes for a in bundle.arrays.values()) / 1e6:.1f} MB")
+    else:
+        build_bundle(args.models_dir, args.output)
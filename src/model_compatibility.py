@@ -12,7 +12,8 @@ import sklearn
 import os
 
 # --- NUCLEAR COMPATIBILITY PATCHES ---
-# These run on import to ensure all scikit-learn components are fixed globally
+# Applied by load_compatible_models() (or explicitly by callers), not on
+# import, so importing this module stays cheap and side-effect free
 
 def apply_global_patches():
     """Apply global monkey-patches to scikit-learn classes."""
@@ -129,9 +130,6 @@ def apply_global_patches():
     except Exception as e:
         print(f"Warning: Failed to apply some global patches: {e}")
 
-# Apply patches immediately on module load
-apply_global_patches()
-
 def patch_simpleimputer():
     """Redundant stub for backward compatibility."""
     apply_global_patches()
@@ -140,6 +138,8 @@ def patch_xgboost_classifier():
     """Monkey-patch XGBClassifier and XGBModel to handle deprecated parameters."""
     try:
         from xgboost import XGBClassifier, XGBModel
+        if getattr(XGBModel, '_compat_patched', False):
+            return
         
         def create_patched_get_params(original_class, class_name):
             original_get_params = original_class.get_params
@@ -210,6 +210,7 @@ def patch_xgboost_classifier():
         create_patched_get_params(XGBModel, "XGBModel")
         create_patched_predict(XGBClassifier)
         create_patched_predict(XGBModel)
+        XGBModel._compat_patched = True
         
     except Exception as e:
         print(f"Failed to patch XGBoost classes: {e}")
@@ -6,15 +6,332 @@ import time
 import psutil
 import pandas as pd
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import threading
+import queue
+import atexit
+import numpy as np
+
+from src import log_store, metrics
+from src.aggregates import AggregatePublisher, RollingAggregates, StageLatency, load_published
+from src.log_archive import LogArchive, entry_date, file_lock, first_entry_date
 
 LOG_FILE = "logs/prediction_log.jsonl"
 METRICS_FILE = "logs/system_metrics.jsonl"
+AGGREGATES_DIR = "logs/aggregates"
+STAGE_AGGREGATES_DIR = "logs/aggregates/stages"
+
+# Buffered log writer (overridable through the environment)
+LOG_QUEUE_SIZE = int(os.environ.get('VETNET_LOG_QUEUE_SIZE', 100000))  # entries; beyond this they are dropped
+LOG_FLUSH_LINES = int(os.environ.get('VETNET_LOG_FLUSH_LINES', 512))
+LOG_FLUSH_INTERVAL_S = float(os.environ.get('VETNET_LOG_FLUSH_INTERVAL_S', 1.0))
+_MAX_WRITE_BYTES = 1 << 20  # one append per chunk; chunks end on a line boundary
+# Rotation into logs/<predictions|metrics>/date=YYYY-MM-DD/part-N.jsonl.gz
+LOG_ROTATE = os.environ.get('VETNET_LOG_ROTATE', '1') != '0'  # by day, and by size below
+LOG_ROTATE_BYTES = int(float(os.environ.get('VETNET_LOG_ROTATE_MB', 64)) * 1024 * 1024)  # 0 = daily only
+# Also write a Parquet copy of each rotated prediction segment (needs pyarrow)
+LOG_COLUMNAR = os.environ.get('VETNET_LOG_COLUMNAR', '1') != '0'
 
 os.makedirs("logs", exist_ok=True)
 
+# In-process components (prediction cache, ...) register a callable returning
+# a dict of counters; they are exposed through SystemMonitor.get_runtime_stats()
+# and sampled into the system metrics log.
+_stats_sources = {}
+
+def register_stats_source(name, stats_fn):
+    _stats_sources[name] = stats_fn
+
+def collect_runtime_metrics():
+    """/metrics view of the registered stats sources and this process's prediction counts."""
+    runtime = metrics.Gauge("vetnet_runtime_stat", "Numeric counters of in-process components", ("source", "stat"))
+    hit_ratio = metrics.Gauge("vetnet_cache_hit_ratio", "Share of cache lookups that were hits", ("source",))
+    lookups = metrics.Counter("vetnet_cache_lookups", "Cache lookups by result", ("source", "result"))
+    for name, stats_fn in list(_stats_sources.items()):
+        try:
+            stats = stats_fn()
+        except Exception:
+            continue
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                runtime.labels(name, key).set(value)
+        if isinstance(stats.get("hits"), int) and isinstance(stats.get("misses"), int):
+            lookups.labels(name, "hit").inc(stats["hits"])
+            lookups.labels(name, "miss").inc(stats["misses"])
+            total = stats["hits"] + stats["misses"]
+            hit_ratio.labels(name).set(stats["hits"] / total if total else 0.0)
+
+    predictions = metrics.Counter("vetnet_predictions", "Predictions logged by this process", ("species",))
+    errors = metrics.Counter("vetnet_prediction_errors", "Failed predictions logged by this process")
+    with prediction_aggregates._lock:
+        species = dict(prediction_aggregates.all_time.species)
+        errors.inc(prediction_aggregates.all_time.errors)
+    for animal, count in species.items():
+        predictions.labels(animal).inc(count)
+    return [runtime, hit_ratio, lookups, predictions, errors]
+
+metrics.registry.register_collector(collect_runtime_metrics)
+
+class _FlushMarker:
+    def __init__(self):
+        self.done = threading.Event()
+
+class BufferedLogWriter:
+    """
+    Appends JSON entries to a JSONL file from a background thread.
+
+    Callers only enqueue the entry dict (serialization and disk I/O happen on
+    the writer thread), and never block: when the queue is full the entry is
+    dropped and counted. The writer keeps one unbuffered O_APPEND handle open
+    and writes each batch - flushed every `flush_lines` entries or
+    `flush_interval_s` seconds - with as few write() calls as possible, each
+    ending on a line boundary, so lines from concurrent worker processes
+    never interleave.
+
+    With `rotate` on, the active file is archived (see src/log_archive.py)
+    before a write that would take it past `rotate_bytes` or that starts a
+    new day. Appends hold a shared flock and rotation an exclusive one, so
+    worker processes sharing the file never write into a rotated segment.
+    Logs with a columnar schema (src/log_store.py) get each rotated segment
+    compacted to Parquet as well.
+    """
+    def __init__(self, path, max_queue=LOG_QUEUE_SIZE, flush_lines=LOG_FLUSH_LINES,
+                 flush_interval_s=LOG_FLUSH_INTERVAL_S, rotate=LOG_ROTATE, rotate_bytes=LOG_ROTATE_BYTES,
+                 columnar=LOG_COLUMNAR):
+        self.path = path
+        self.flush_lines = flush_lines
+        self.flush_interval_s = flush_interval_s
+        self.rotate = rotate
+        self.rotate_bytes = rotate_bytes
+        self.archive = LogArchive(path)
+        self.columnar = columnar and log_store.PYARROW_AVAILABLE and log_store.schema_for(path) is not None
+        self._active = (None, None)  # (inode, first entry date) of the active file
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file = None
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.rotations = 0
+        self.compactions = 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, daemon=True,
+                                                    name=f"log-writer-{os.path.basename(self.path)}")
+                    self._thread.start()
+
+    def write(self, entries):
+        """Queue one entry dict or a list of them."""
+        if isinstance(entries, dict):
+            entries = [entries]
+        self._ensure_thread()
+        for entry in entries:
+            try:
+                self._queue.put_nowait(entry)
+                self.enqueued += 1
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is on disk. Returns False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def _run(self):
+        if self.rotate:
+            try:
+                self.archive.archive_staged()
+            except Exception as e:
+                print(f"⚠️ Could not archive leftover segments of {self.path}: {e}")
+        batch, markers = [], []
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            if markers or len(batch) >= self.flush_lines or time.monotonic() >= deadline:
+                if batch:
+                    self._write_batch(batch)
+                    batch = []
+                for marker in markers:
+                    marker.done.set()
+                markers = []
+                deadline = time.monotonic() + self.flush_interval_s
+
+    def _write_batch(self, batch):
+        try:
+            # Entries of one day go together, so a day change can rotate in between
+            runs = []
+            for entry in batch:
+                date = entry_date(entry.get("timestamp", ""))
+                if runs and runs[-1][0] == date:
+                    runs[-1][1].append(json.dumps(entry) + "\n")
+                else:
+                    runs.append((date, [json.dumps(entry) + "\n"]))
+            for date, lines in runs:
+                data = "".join(lines).encode()
+                if self.rotate:
+                    self._maybe_rotate(date, len(data))
+                with file_lock(self.path):
+                    self._append(data)
+                self.written += len(lines)
+            self.batches += 1
+        except Exception as e:
+            self.write_errors += 1
+            print(f"⚠️ Log writer for {self.path} failed: {e}")
+            self._close_file()
+
+    def _append(self, data):
+        # Another process may have rotated the file since we opened it
+        if self._file is not None:
+            try:
+                if os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino:
+                    self._close_file()
+            except OSError:
+                self._close_file()
+        if self._file is None:
+            self._file = open(self.path, 'ab', buffering=0)
+        view = memoryview(data)
+        while view:
+            chunk = view[:_MAX_WRITE_BYTES]
+            if len(view) > _MAX_WRITE_BYTES:
+                chunk = view[:bytes(chunk).rfind(b"\n") + 1] or chunk
+            written = self._file.write(chunk)
+            view = view[written:]
+
+    def _maybe_rotate(self, date, incoming_bytes):
+        """Archive the active file first if it belongs to an earlier day or would grow too big."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        if st.st_size == 0:
+            return
+        if self._active[0] != st.st_ino:
+            self._active = (st.st_ino, first_entry_date(self.path))
+
+        def should_rotate(first_date, size):
+            new_day = bool(date) and first_date < date
+            too_big = self.rotate_bytes > 0 and size + incoming_bytes > self.rotate_bytes
+            return new_day or too_big
+
+        # Cheap check without the lock; rotate() re-checks under the exclusive lock
+        if self._active[1] is None or not should_rotate(self._active[1], st.st_size):
+            return
+        segment = self.archive.rotate(should_rotate)
+        if segment is not None:
+            self.rotations += 1
+            self._active = (None, None)
+            if self.columnar:
+                self._compact(segment)
+
+    def _compact(self, segment):
+        try:
+            log_store.compact_segment(self.archive, segment, log_store.schema_for(self.path))
+            self.compactions += 1
+        except Exception as e:
+            # The gzip segment is complete; the Parquet copy can be rebuilt later
+            print(f"⚠️ Columnar compaction of {segment['path']} failed: {e}")
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "rotations": self.rotations,
+            "compactions": self.compactions
+        }
+
+# One writer per log file, shared by every SystemMonitor in the process
+_writers = {}
+_writers_lock = threading.Lock()
+
+def _writer_for(path):
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = BufferedLogWriter(path)
+            register_stats_source(f"{os.path.splitext(os.path.basename(path))[0]}_writer", writer.stats)
+        return writer
+
+# Rolling dashboard aggregates of this process's predictions (see src/aggregates.py)
+prediction_aggregates = RollingAggregates()
+_aggregate_publisher = AggregatePublisher(prediction_aggregates, AGGREGATES_DIR)
+# Per-stage inference latency (feature build, forward pass, ..., logging)
+stage_latency = StageLatency()
+_stage_publisher = AggregatePublisher(stage_latency, STAGE_AGGREGATES_DIR)
+_stage_seconds = metrics.registry.histogram("inference_stage_duration_seconds",
+                                            "Time each scored record spent in an inference stage", ("stage",),
+                                            metrics.STAGE_SECONDS_BUCKETS)
+
+def record_stage_timings(species, category, stage_ms, n=1):
+    """Record `n` predictions of one species/category that each spent stage_ms[stage] ms per stage."""
+    stage_latency.record(species, category, stage_ms, n)
+    _stage_publisher.ensure_started()
+    for stage, ms in stage_ms.items():
+        _stage_seconds.labels(stage).observe(ms / 1000, n)
+
+def flush_logs(timeout=5.0):
+    """Write out everything queued by this process (on shutdown and before reads)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    flushed = all(writer.flush(timeout) for writer in writers)
+    try:
+        _aggregate_publisher.publish()
+        _stage_publisher.publish()
+    except Exception as e:
+        print(f"⚠️ Could not publish aggregates: {e}")
+    return flushed
+
+def _reset_writers_after_fork():
+    # Writer threads do not survive fork; pre-fork workers start their own
+    global _writers_lock
+    _writers_lock = threading.Lock()
+    for writer in _writers.values():
+        writer._thread = None
+        writer._file = None
+        writer._lock = threading.Lock()
+        writer._queue = queue.Queue(maxsize=writer._queue.maxsize)
+    # Each worker counts (and publishes) only its own predictions
+    global prediction_aggregates, _aggregate_publisher, stage_latency, _stage_publisher
+    prediction_aggregates = RollingAggregates()
+    _aggregate_publisher = AggregatePublisher(prediction_aggregates, AGGREGATES_DIR)
+    stage_latency = StageLatency()
+    _stage_publisher = AggregatePublisher(stage_latency, STAGE_AGGREGATES_DIR)
+
+os.register_at_fork(after_in_child=_reset_writers_after_fork)
+atexit.register(flush_logs)
+
 class SystemMonitor:
     def __init__(self):
         self.ensure_logs_exist()
@@ -25,10 +342,9 @@ class SystemMonitor:
         if not os.path.exists(METRICS_FILE):
             with open(METRICS_FILE, 'w') as f: pass
 
-    def log_prediction(self, input_data, result, latency_ms):
-        """Log a single prediction event"""
-        entry = {
-            "timestamp": datetime.now().isoformat(),
+    def _prediction_entry(self, input_data, result, latency_ms, timestamp):
+        return {
+            "timestamp": timestamp,
             "animal": input_data.get("Animal", "Unknown"),
             "category": result.get("predicted_category"),
             "disease": result.get("predicted_disease"),
@@ -38,9 +354,47 @@ class SystemMonitor:
             "status": "success" if result.get("success") else "error",
             "error_msg": result.get("error", None)
         }
-        
-        with open(LOG_FILE, 'a') as f:
-            f.write(json.dumps(entry) + "\n")
+
+    def log_prediction(self, input_data, result, latency_ms):
+        """Log a single prediction event"""
+        started = time.perf_counter()
+        entry = self._prediction_entry(input_data, result, latency_ms, datetime.now().isoformat())
+        # Queued for the background writer; no disk I/O on the request path
+        _writer_for(LOG_FILE).write(entry)
+        self._record_aggregates([entry])
+        record_stage_timings(entry["animal"], entry["category"],
+                             {"logging": (time.perf_counter() - started) * 1000})
+
+    def log_predictions(self, inputs, results, latency_ms):
+        """
+        Log a scored batch (queued together for the background writer).
+        `latency_ms` is the wall time of the whole batch; each row records its
+        amortized share so per-prediction latency stats stay comparable.
+        """
+        if not inputs:
+            return
+        started = time.perf_counter()
+        timestamp = datetime.now().isoformat()
+        per_row_ms = latency_ms / len(inputs)
+        entries = []
+        for input_data, result in zip(inputs, results):
+            entry = self._prediction_entry(input_data, result, per_row_ms, timestamp)
+            entry["batch_size"] = len(inputs)
+            entries.append(entry)
+        _writer_for(LOG_FILE).write(entries)
+        self._record_aggregates(entries)
+        per_row_logging_ms = (time.perf_counter() - started) * 1000 / len(entries)
+        groups = {}
+        for entry in entries:
+            key = (entry["animal"], entry["category"])
+            groups[key] = groups.get(key, 0) + 1
+        for (animal, category), n in groups.items():
+            record_stage_timings(animal, category, {"logging": per_row_logging_ms}, n)
+
+    def _record_aggregates(self, entries):
+        for entry in entries:
+            prediction_aggregates.record(entry)
+        _aggregate_publisher.ensure_started()
 
     def log_system_health(self):
         """Log system resource usage (CPU, Memory)"""
@@ -50,36 +404,204 @@ class SystemMonitor:
             "memory_percent": psutil.virtual_memory().percent,
             "disk_usage": psutil.disk_usage('/').percent
         }
+        # Flatten numeric runtime counters, e.g. prediction_cache_hits
+        for name, stats in self.get_runtime_stats().items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry[f"{name}_{key}"] = value
         
-        with open(METRICS_FILE, 'a') as f:
-            f.write(json.dumps(entry) + "\n")
+        _writer_for(METRICS_FILE).write(entry)
+
+    def get_runtime_stats(self):
+        """Counters from registered in-process components, keyed by source name"""
+        stats = {}
+        for name, stats_fn in list(_stats_sources.items()):
+            try:
+                stats[name] = stats_fn()
+            except Exception as e:
+                stats[name] = {"error": str(e)}
+        return stats
 
     def get_recent_predictions(self, limit=100):
         """Get most recent logs"""
-        logs = []
-        try:
-            with open(LOG_FILE, 'r') as f:
-                # Read last N lines (inefficient for huge files, fine for demo)
-                lines = f.readlines()[-limit:]
-                for line in lines:
-                    if line.strip():
-                        logs.append(json.loads(line))
-        except Exception:
-            return []
-        return pd.DataFrame(logs)
+        # Include entries this process has queued but not yet written
+        _writer_for(LOG_FILE).flush()
+        return _records_frame(_parse_lines(recent_lines(LOG_FILE, limit)), PREDICTION_DTYPES)
 
     def get_system_metrics(self, limit=50):
         """Get recent system metrics"""
-        metrics = []
+        _writer_for(METRICS_FILE).flush()
+        return _records_frame(_parse_lines(recent_lines(METRICS_FILE, limit)), METRICS_DTYPES)
+
+    def get_predictions_between(self, start=None, end=None, days=None):
+        """
+        Predictions with start <= timestamp < end (datetimes or ISO strings),
+        or from the last `days` calendar days including today. Only archive
+        partitions overlapping the range are opened.
+        """
+        _writer_for(LOG_FILE).flush()
+        return _records_frame(range_records(LOG_FILE, start, end, days), PREDICTION_DTYPES)
+
+    def get_system_metrics_between(self, start=None, end=None, days=None):
+        """System metrics in a time range (see get_predictions_between)"""
+        _writer_for(METRICS_FILE).flush()
+        return _records_frame(range_records(METRICS_FILE, start, end, days), METRICS_DTYPES)
+
+    def get_aggregates(self):
+        """
+        Rolling aggregates of every prediction, merged across API worker
+        processes (and earlier runs). Call .snapshot() for all-time numbers
+        or .snapshot(window_minutes) for a window.
+        """
+        return load_published(AGGREGATES_DIR, live=prediction_aggregates, live_path=_aggregate_publisher.path)
+
+    def get_stage_latency(self):
+        """
+        Per-stage inference latency merged across API worker processes. Call
+        .snapshot(window_minutes, species=... | category=...) for quantiles.
+        """
+        return load_published(STAGE_AGGREGATES_DIR, live=stage_latency, live_path=_stage_publisher.path,
+                              factory=StageLatency)
+
+    def query_predictions(self, start=None, end=None, days=None, species=None, columns=None):
+        """
+        Analytics read of the prediction log: rows with start <= timestamp < end
+        (or from the last `days` days) and animal in `species`, limited to
+        `columns`. Uses the Parquet store when pyarrow is installed, where
+        animal/category/disease/status come back as Categorical columns.
+        """
+        _writer_for(LOG_FILE).flush()
+        if days is not None:
+            start = days_start(days)
+        if log_store.PYARROW_AVAILABLE:
+            return log_store.query(LOG_FILE, start, end, species, columns)
+        df = _records_frame(range_records(LOG_FILE, start, end), PREDICTION_DTYPES)
+        if species:
+            df = df[df['animal'].isin(list(species))].reset_index(drop=True)
+        return df[list(columns)] if columns else df
+
+# Column types of the log DataFrames (columns absent from the file are still
+# present, so dashboards can rely on them; extra columns are inferred)
+PREDICTION_DTYPES = {
+    "timestamp": "datetime", "animal": "object", "category": "object", "disease": "object",
+    "category_confidence": "float64", "disease_confidence": "float64", "latency_ms": "float64",
+    "status": "object", "error_msg": "object", "batch_size": "float64"
+}
+METRICS_DTYPES = {
+    "timestamp": "datetime", "cpu_percent": "float64", "memory_percent": "float64", "disk_usage": "float64"
+}
+
+def tail_lines(path, limit, block_size=1 << 16):
+    """
+    Last `limit` complete lines of a file (as bytes), reading backwards in
+    blocks, so the cost depends on `limit` and not on the file size.
+    A final line without its newline (still being written) is skipped.
+    """
+    if limit <= 0:
+        return []
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return []
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        pos, blocks, newlines = end, [], 0
+        # One more newline than lines wanted: the last byte ends the last line.
+        # Only each new block is counted, and blocks are joined once at the end.
+        while pos > 0 and newlines <= limit:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            newlines += block.count(b"\n")
+            blocks.append(block)
+    lines = b"".join(reversed(blocks)).split(b"\n")
+    lines.pop()  # after the last newline: empty, or a partial line
+    if pos > 0:
+        lines = lines[1:]  # the first piece may start mid-line
+    lines = [line for line in lines if line.strip()]
+    return lines[-limit:]
+
+def recent_lines(path, limit):
+    """Last `limit` lines of a log, continuing into its newest archived segments."""
+    lines = tail_lines(path, limit)
+    if len(lines) < limit:
+        archive = LogArchive(path)
+        for segment in reversed(archive.segments()):
+            lines = archive.read_segment(segment)[-(limit - len(lines)):] + lines
+            if len(lines) >= limit:
+                break
+    return lines
+
+def _iso(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+def days_start(days):
+    """Midnight starting the last `days` calendar days (today included)."""
+    return datetime.combine(datetime.now().date() - timedelta(days=days - 1), datetime.min.time())
+
+def range_records(path, start=None, end=None, days=None):
+    """Parsed entries of a log (archive + active file) with start <= timestamp < end."""
+    if days is not None:
+        start = days_start(days)
+    start, end = _iso(start), _iso(end)
+
+    archive = LogArchive(path)
+    lines = []
+    for segment in archive.segments(start, end):
+        lines.extend(archive.read_segment(segment))
+    # The active file only holds entries from its first line onwards
+    first_date = first_entry_date(path)
+    if first_date is not None and (end is None or first_date <= end):
         try:
-            with open(METRICS_FILE, 'r') as f:
-                lines = f.readlines()[-limit:]
-                for line in lines:
-                    if line.strip():
-                        metrics.append(json.loads(line))
-        except Exception:
-            return []
-        return pd.DataFrame(metrics)
+            with open(path, 'rb') as f:
+                lines.extend(line for line in f.read().split(b"\n") if line.strip())
+        except OSError:
+            pass
+
+    records = []
+    for record in _parse_lines(lines):
+        ts = record.get("timestamp")
+        if not isinstance(ts, str):
+            continue
+        if (start is None or ts >= start) and (end is None or ts < end):
+            records.append(record)
+    records.sort(key=lambda record: record["timestamp"])
+    return records
+
+def _parse_lines(lines):
+    if not lines:
+        return []
+    try:
+        # One parse call for the whole block
+        return json.loads(b"[" + b",".join(lines) + b"]")
+    except ValueError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # skip a corrupt line instead of failing the page
+        return records
+
+def _records_frame(records, dtypes):
+    """Build the DataFrame column by column with fixed dtypes for the known columns."""
+    columns = dict.fromkeys(dtypes)
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    data = {}
+    for col in columns:
+        values = [record.get(col) for record in records]
+        dtype = dtypes.get(col)
+        if dtype == "float64":
+            data[col] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').astype(np.float64)
+        elif dtype == "datetime":
+            data[col] = pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='ISO8601')
+        elif dtype == "object":
+            data[col] = pd.Series(values, dtype=object)
+        else:
+            data[col] = pd.Series(values)
+    return pd.DataFrame(data, columns=list(columns))
 
 # Background Metrics Collector
 def start_background_monitoring(interval=10):
@@ -0,0 +1,106 @@
+"""
+Prediction Result Cache
+Bounded LRU + TTL cache for prediction results. Keys are a canonical hash of
+the normalized input record together with the model version, so results
+computed by one set of model artifacts are never served for another.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Configuration (overridable through the environment)
+CACHE_SIZE = int(os.environ.get('VETNET_CACHE_SIZE', 4096))  # 0 disables the cache
+CACHE_TTL_S = float(os.environ.get('VETNET_CACHE_TTL_S', 300))
+
+def _canonical_value(value):
+    # Numbers are scored through float(), so 5, 5.0 and True/1 are the same input
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    return value
+
+def cache_key(record, model_version):
+    """Stable hash of a normalized input record and the model version."""
+    canonical = {k: _canonical_value(v) for k, v in record.items()}
+    payload = json.dumps([model_version, canonical], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    Values are deep-copied on the way in and out so callers can mutate the
+    result dicts they get back.
+    """
+    def __init__(self, max_size=CACHE_SIZE, ttl_s=CACHE_TTL_S):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on a miss."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (called whenever the models are reloaded)."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
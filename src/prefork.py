@@ -0,0 +1,122 @@
+"""
+Pre-fork Multi-Worker Server
+Runs several uvicorn workers that share one copy of the models.
+
+The parent process imports the API, loads the model bundle (an mmap, see
+src/model_bundle.py), warms it up and binds the listening socket. Only then
+does it fork the workers, which accept on the inherited socket. Workers
+therefore share, copy-on-write:
+  - the bundle's Stage 2 forests and preprocessing arrays (read-only mmap
+    views backed by one set of page-cache pages),
+  - the imported torch / numpy / pandas / sklearn code and the compiled
+    numba kernel,
+  - every Python object created before the fork (gc.freeze() keeps the
+    garbage collector from touching, and so copying, those pages).
+
+Each worker still has its own prediction cache, micro-batch scheduler and
+request counters. Dead workers are restarted; SIGINT/SIGTERM stop them all.
+
+Usage:
+    VETNET_WORKERS=4 python simple_api.py
+"""
+import gc
+import os
+import signal
+import socket
+import time
+
+WORKERS = int(os.environ.get('VETNET_WORKERS', 1))
+
+def bind_socket(host, port, backlog=2048):
+    # An explicit IPPROTO_TCP lets asyncio set TCP_NODELAY on accepted
+    # connections (with proto 0 small responses wait on delayed ACKs)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def worker_cpu_cores(workers):
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def _run_worker(app, sock, workers):
+    import uvicorn
+    from src import inference_executor
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    gc.enable()
+    # N workers x all-cores torch pools would oversubscribe the CPU: each
+    # worker pins its torch threads (at startup) within its share of cores
+    inference_executor.CPU_CORES = worker_cpu_cores(workers)
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    server.run(sockets=[sock])
+
+def serve(app, host="0.0.0.0", port=8002, workers=WORKERS):
+    """Load the models once, then fork `workers` uvicorn processes sharing them."""
+    from src import inference_nn
+
+    print(f"Pre-fork server: loading models once for {workers} workers...")
+    if not inference_nn.warm_up():
+        raise SystemExit(f"❌ Models failed to load: {inference_nn.LOAD_ERROR}")
+    # Results cached by the warm-up are not worth duplicating into every worker
+    inference_nn.prediction_cache.clear()
+
+    sock = bind_socket(host, port)
+    # Freeze everything allocated so far into the permanent generation, so
+    # collections in the workers do not write to (and un-share) those pages
+    gc.collect()
+    gc.disable()
+    gc.freeze()
+
+    children = {}  # pid -> start time
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, workers)
+            except BaseException as e:
+                print(f"❌ Worker {os.getpid()} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"✅ Serving on {host}:{port} with {workers} workers "
+          f"(pids {sorted(children)}, {worker_cpu_cores(workers)} cores each)")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"⚠️ Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        # Do not spin if workers die right after starting
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)
+        spawn()
+
+    sock.close()
+    print("Pre-fork server stopped")
@@ -0,0 +1,183 @@
+"""
+Telemetry Ring Buffer
+The last HISTORY_LENGTH readings of every device, held in preallocated
+typed NumPy columns (one row per device) instead of lists of pydantic
+objects.
+
+- Appends are O(1): a reading is written at the device's next slot, and
+  the oldest one is overwritten once the row is full. Memory per device is
+  fixed; rows are added by doubling as new devices appear.
+- Each row is mirrored (slot s is written at s and s + HISTORY_LENGTH), so
+  a device's history is always one contiguous, oldest-first slice and
+  history() returns NumPy views without copying. A view is valid until the
+  next append for that device.
+- Timestamps are float64; vitals are float32 (sensors report at most a
+  few decimals) with NaN for a missing value.
+
+Only the event loop thread appends; readers in other threads (metrics
+collectors) see counts that may be one reading behind.
+"""
+import os
+import threading
+
+import numpy as np
+
+HISTORY_LENGTH = int(os.environ.get('VETNET_TELEMETRY_HISTORY', 50))  # readings kept per device
+INITIAL_DEVICES = 1024
+
+# Column name -> dtype (names match TelemetryData)
+COLUMNS = {
+    "timestamp": np.float64,
+    "temperature": np.float32,
+    "heart_rate": np.float32,
+    "activity_level": np.float32,
+    "battery_level": np.float32,
+}
+VITAL_DECIMALS = 4  # float32 vitals are rounded to this when turned back into Python floats
+
+def to_python(value, column):
+    """A stored value as a JSON-friendly float (None for NaN)."""
+    if value != value:
+        return None
+    return float(value) if column == "timestamp" else round(float(value), VITAL_DECIMALS)
+
+class TelemetryRingBuffer:
+    """Fixed-length reading history per device, in typed columns."""
+    def __init__(self, history_length=HISTORY_LENGTH, initial_devices=INITIAL_DEVICES):
+        self.history_length = history_length
+        self._index = {}  # device_id -> row
+        self.device_ids = []  # row -> device_id
+        self.animal_ids = []  # row -> animal_id of the latest reading
+        self.species = []  # row -> species of the latest reading
+        self._columns = {}
+        self._next = np.zeros(0, dtype=np.int32)  # row -> slot the next reading goes to
+        self.counts = np.zeros(0, dtype=np.int32)  # row -> readings held (<= history_length)
+        self._lock = threading.Lock()
+        self._allocate(initial_devices)
+
+    def _allocate(self, rows):
+        width = 2 * self.history_length
+        for name, dtype in COLUMNS.items():
+            column = np.full((rows, width), np.nan, dtype=dtype)
+            old = self._columns.get(name)
+            if old is not None:
+                column[:len(old)] = old
+            self._columns[name] = column
+        self._next = np.concatenate([self._next, np.zeros(rows - len(self._next), dtype=np.int32)])
+        self.counts = np.concatenate([self.counts, np.zeros(rows - len(self.counts), dtype=np.int32)])
+
+    def _row(self, device_id, animal_id=None, species=None):
+        row = self._index.get(device_id)
+        if row is None:
+            with self._lock:
+                row = len(self.device_ids)
+                if row == len(self.counts):
+                    self._allocate(2 * row)
+                self.device_ids.append(device_id)
+                self.animal_ids.append(animal_id)
+                self.species.append(species)
+                self._index[device_id] = row
+        else:
+            if animal_id is not None:
+                self.animal_ids[row] = animal_id
+            if species is not None:
+                self.species[row] = species
+        return row
+
+    def add_device(self, device_id, animal_id=None, species=None):
+        """Make sure `device_id` has a (possibly empty) history."""
+        return self._row(device_id, animal_id, species)
+
+    def append(self, device_id, animal_id, species, timestamp, temperature=None, heart_rate=None,
+               activity_level=None, battery_level=None):
+        """Add one reading; O(1)."""
+        row = self._row(device_id, animal_id, species)
+        slot = self._next[row]
+        mirror = slot + self.history_length
+        for name, value in (("timestamp", timestamp), ("temperature", temperature), ("heart_rate", heart_rate),
+                            ("activity_level", activity_level), ("battery_level", battery_level)):
+            value = np.nan if value is None else value
+            column = self._columns[name]
+            column[row, slot] = value
+            column[row, mirror] = value
+        self._next[row] = (slot + 1) % self.history_length
+        if self.counts[row] < self.history_length:
+            self.counts[row] += 1
+        return row
+
+    def extend(self, device_id, animal_id, species, columns):
+        """
+        Add several readings of one device, oldest first. `columns` maps
+        column names to equal-length sequences (missing columns are NaN).
+        """
+        n = len(columns["timestamp"])
+        row = self._row(device_id, animal_id, species)
+        if n == 0:
+            return row
+        keep = min(n, self.history_length)  # older ones would be overwritten anyway
+        slots = (self._next[row] + np.arange(n - keep, n)) % self.history_length
+        for name in COLUMNS:
+            values = columns.get(name)
+            values = np.full(keep, np.nan) if values is None else \
+                np.array([np.nan if v is None else v for v in values[n - keep:]], dtype=np.float64)
+            column = self._columns[name]
+            column[row, slots] = values
+            column[row, slots + self.history_length] = values
+        self._next[row] = (self._next[row] + n) % self.history_length
+        self.counts[row] = min(self.history_length, self.counts[row] + n)
+        return row
+
+    def history(self, device_id):
+        """{column: oldest-first NumPy view} of a device's readings, or None if unknown."""
+        row = self._index.get(device_id)
+        if row is None:
+            return None
+        count = self.counts[row]
+        start = (self._next[row] - count) % self.history_length
+        return {name: column[row, start:start + count] for name, column in self._columns.items()}
+
+    def latest(self, device_id):
+        """The newest reading as a dict of Python values, or None."""
+        row = self._index.get(device_id)
+        if row is None or self.counts[row] == 0:
+            return None
+        slot = (self._next[row] - 1) % self.history_length
+        reading = {"device_id": device_id, "animal_id": self.animal_ids[row], "species": self.species[row]}
+        for name, column in self._columns.items():
+            reading[name] = to_python(column[row, slot], name)
+        return reading
+
+    def readings(self, device_id):
+        """A device's history as a list of reading dicts (TelemetryData fields), oldest first."""
+        history = self.history(device_id)
+        if history is None:
+            return []
+        row = self._index[device_id]
+        rows = zip(*(history[name].tolist() for name in COLUMNS))
+        return [{"device_id": device_id, "animal_id": self.animal_ids[row], "species": self.species[row],
+                 **{name: to_python(value, name) for name, value in zip(COLUMNS, values)}}
+                for values in rows]
+
+    def __contains__(self, device_id):
+        return device_id in self._index
+
+    def __len__(self):
+        return len(self.device_ids)
+
+    def __iter__(self):
+        return iter(list(self.device_ids))
+
+    def nbytes(self):
+        """Bytes held by the column arrays (allocated rows, not just used ones)."""
+        return sum(column.nbytes for column in self._columns.values()) + self._next.nbytes + self.counts.nbytes
+
+    def stats(self):
+        used = self.counts[:len(self.device_ids)]
+        return {
+            "devices": len(self.device_ids),
+            "rows_allocated": len(self.counts),
+            "history_length": self.history_length,
+            "buffered_readings": int(used.sum()),
+            "max_buffer": int(used.max()) if len(used) else 0,
+            "column_bytes": self.nbytes(),
+        }
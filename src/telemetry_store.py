@@ -0,0 +1,308 @@
+"""
+Telemetry Store
+Persistent device telemetry in an embedded SQLite database (WAL mode), so
+history survives restarts and reaches further back than the in-memory
+ring buffers.
+
+- `readings` holds raw readings for RAW_RETENTION_S (default 48 h).
+- `rollup_1m` and `rollup_1h` hold min, max, sum and count of every vital
+  per device and minute / hour. They are updated as readings are written,
+  one upsert per device and bucket in each batch. Minute rollups are kept
+  for MINUTE_RETENTION_S (default 30 days); hour rollups are kept forever.
+- Ingestion only enqueues rows. A background thread writes them in
+  batches, one transaction each, like the prediction log writer
+  (src/monitoring.py). When the queue is full, readings are dropped and
+  counted; they are still in the ring buffers.
+- query() picks the coarsest table whose buckets are no wider than the
+  requested resolution and which still covers the requested start (see
+  choose_resolution()).
+
+Pre-fork workers each write through their own connection. WAL lets
+readers run beside the writer, and upserts add to the rollups, so rows
+from several processes combine.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+
+TELEMETRY_DB = os.environ.get('VETNET_TELEMETRY_DB', 'logs/telemetry.db')
+TELEMETRY_STORE = os.environ.get('VETNET_TELEMETRY_STORE', '1') != '0'
+RAW_RETENTION_S = float(os.environ.get('VETNET_TELEMETRY_RAW_RETENTION_H', 48)) * 3600
+MINUTE_RETENTION_S = float(os.environ.get('VETNET_TELEMETRY_MINUTE_RETENTION_D', 30)) * 86400
+STORE_QUEUE_SIZE = int(os.environ.get('VETNET_TELEMETRY_QUEUE_SIZE', 100000))  # readings
+STORE_FLUSH_ROWS = 2048
+STORE_FLUSH_INTERVAL_S = float(os.environ.get('VETNET_TELEMETRY_FLUSH_INTERVAL_S', 1.0))
+PRUNE_INTERVAL_S = 60.0
+MAX_HISTORY_POINTS = 1000  # target points when a history query gives no resolution
+MAX_HISTORY_ROWS = 10000
+
+VITALS = ("temperature", "heart_rate", "activity_level", "battery_level")
+# Reading rows: (device_id, timestamp, animal_id, species, *VITALS)
+READING_COLUMNS = ("device_id", "timestamp", "animal_id", "species") + VITALS
+# Resolution name -> (table, bucket width in seconds), finest first
+ROLLUPS = {"1m": ("rollup_1m", 60), "1h": ("rollup_1h", 3600)}
+
+def _rollup_schema(table):
+    vitals = ", ".join(f"{v}_min REAL, {v}_max REAL, {v}_sum REAL NOT NULL DEFAULT 0, "
+                       f"{v}_count INTEGER NOT NULL DEFAULT 0" for v in VITALS)
+    return (f"CREATE TABLE IF NOT EXISTS {table} (device_id TEXT NOT NULL, bucket REAL NOT NULL, "
+            f"readings INTEGER NOT NULL, {vitals}, PRIMARY KEY (device_id, bucket)) WITHOUT ROWID")
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS readings (device_id TEXT NOT NULL, timestamp REAL NOT NULL, animal_id TEXT, "
+    "species TEXT, " + ", ".join(f"{v} REAL" for v in VITALS) + ")",
+    "CREATE INDEX IF NOT EXISTS readings_device_time ON readings (device_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS readings_time ON readings (timestamp)",  # retention deletes
+    *(_rollup_schema(table) for table, _ in ROLLUPS.values()),
+]
+
+def _upsert_sql(table):
+    columns = ["device_id", "bucket", "readings"] + [f"{v}_{s}" for v in VITALS for s in ("min", "max", "sum", "count")]
+    updates = ["readings = readings + excluded.readings"]
+    for v in VITALS:
+        # NULL < x is not true, so a NULL (no values) side never replaces the other
+        updates += [f"{v}_min = CASE WHEN {v}_min IS NULL OR excluded.{v}_min < {v}_min "
+                    f"THEN excluded.{v}_min ELSE {v}_min END",
+                    f"{v}_max = CASE WHEN {v}_max IS NULL OR excluded.{v}_max > {v}_max "
+                    f"THEN excluded.{v}_max ELSE {v}_max END",
+                    f"{v}_sum = {v}_sum + excluded.{v}_sum",
+                    f"{v}_count = {v}_count + excluded.{v}_count"]
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT (device_id, bucket) DO UPDATE SET {', '.join(updates)}")
+
+def rollup_rows(rows, width):
+    """Rollup rows (device_id, bucket, readings, then min/max/sum/count per vital) of reading rows."""
+    groups = {}
+    for row in rows:
+        timestamp = row[1]
+        key = (row[0], timestamp - timestamp % width)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = [0] + [None, None, 0.0, 0] * len(VITALS)
+        group[0] += 1
+        for i, value in enumerate(row[4:]):
+            if value is None:
+                continue
+            j = 1 + 4 * i
+            if group[j] is None or value < group[j]:
+                group[j] = value
+            if group[j + 1] is None or value > group[j + 1]:
+                group[j + 1] = value
+            group[j + 2] += value
+            group[j + 3] += 1
+    return [(device_id, bucket, *group) for (device_id, bucket), group in groups.items()]
+
+def choose_resolution(start, end, resolution=None, now=None, raw_retention_s=RAW_RETENTION_S,
+                      minute_retention_s=MINUTE_RETENTION_S):
+    """
+    The coarsest of "raw", "1m" and "1h" whose buckets are no wider than
+    `resolution` seconds (default: the range over MAX_HISTORY_POINTS), moved
+    to a coarser one if `start` is older than its retention.
+    """
+    now = time.time() if now is None else now
+    if resolution is None:
+        resolution = (end - start) / MAX_HISTORY_POINTS
+    choice = "raw"
+    for name, (_, width) in ROLLUPS.items():
+        if width <= resolution:
+            choice = name
+    if choice == "raw" and start < now - raw_retention_s:
+        choice = "1m"
+    if choice == "1m" and start < now - minute_retention_s:
+        choice = "1h"
+    return choice
+
+_stores = weakref.WeakSet()  # reset in pre-fork workers
+
+class _FlushMarker:
+    def __init__(self):
+        self.done = threading.Event()
+
+class TelemetryStore:
+    """SQLite-backed raw readings and rollups, written by a background thread."""
+    def __init__(self, path=TELEMETRY_DB, max_queue=STORE_QUEUE_SIZE, flush_rows=STORE_FLUSH_ROWS,
+                 flush_interval_s=STORE_FLUSH_INTERVAL_S, raw_retention_s=RAW_RETENTION_S,
+                 minute_retention_s=MINUTE_RETENTION_S):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.raw_retention_s = raw_retention_s
+        self.minute_retention_s = minute_retention_s
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._readers = threading.local()
+        self._next_prune = 0.0
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.pruned = 0
+        _stores.add(self)
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL: durable at checkpoints, never corrupt
+        for statement in SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, daemon=True, name="telemetry-store")
+                    self._thread.start()
+
+    def append(self, rows):
+        """Queue reading rows (tuples in READING_COLUMNS order); never blocks."""
+        self._ensure_thread()
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+                self.enqueued += 1
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed. Returns False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def _run(self):
+        conn = None
+        batch, markers = [], []
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            if markers or len(batch) >= self.flush_rows or time.monotonic() >= deadline:
+                if batch:
+                    try:
+                        conn = conn or self._connect()
+                        self._write_batch(conn, batch)
+                        if time.monotonic() >= self._next_prune:
+                            self.prune(conn)
+                    except Exception as e:
+                        self.write_errors += 1
+                        print(f"⚠️ Telemetry store {self.path} failed: {e}")
+                        if conn is not None:
+                            conn.close()
+                            conn = None
+                    batch = []
+                for marker in markers:
+                    marker.done.set()
+                markers = []
+                deadline = time.monotonic() + self.flush_interval_s
+
+    def _write_batch(self, conn, rows):
+        with conn:  # one transaction: the rollups never miss committed readings
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(f"INSERT INTO readings ({', '.join(READING_COLUMNS)}) "
+                             f"VALUES ({', '.join('?' * len(READING_COLUMNS))})", rows)
+            for table, width in ROLLUPS.values():
+                conn.executemany(_upsert_sql(table), rollup_rows(rows, width))
+        self.written += len(rows)
+        self.batches += 1
+
+    def prune(self, conn=None, now=None):
+        """Delete raw readings and minute rollups past their retention."""
+        conn = conn or self._reader()
+        now = time.time() if now is None else now
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute("DELETE FROM readings WHERE timestamp < ?", (now - self.raw_retention_s,)).rowcount
+            deleted += conn.execute("DELETE FROM rollup_1m WHERE bucket < ?", (now - self.minute_retention_s,)).rowcount
+        self.pruned += deleted
+        self._next_prune = time.monotonic() + PRUNE_INTERVAL_S
+        return deleted
+
+    def _reader(self):
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._readers.conn = self._connect()
+        return conn
+
+    def query(self, device_id, start, end, resolution=None, limit=MAX_HISTORY_ROWS):
+        """
+        {"resolution", "points"} for one device between `start` and `end`
+        (epoch seconds, end exclusive), at the resolution choose_resolution()
+        picks. Raw points are readings; rollup points have a bucket start
+        `timestamp`, `readings`, and min/max/mean/count per vital.
+        """
+        choice = choose_resolution(start, end, resolution, raw_retention_s=self.raw_retention_s,
+                                   minute_retention_s=self.minute_retention_s)
+        conn = self._reader()
+        if choice == "raw":
+            cursor = conn.execute(f"SELECT {', '.join(READING_COLUMNS[1:])} FROM readings "
+                                  "WHERE device_id = ? AND timestamp >= ? AND timestamp < ? "
+                                  "ORDER BY timestamp LIMIT ?", (device_id, start, end, limit))
+            points = [{"device_id": device_id, **dict(zip(READING_COLUMNS[1:], row))} for row in cursor]
+        else:
+            table, width = ROLLUPS[choice]
+            stats = ", ".join(f"{v}_min, {v}_max, {v}_sum / NULLIF({v}_count, 0), {v}_count" for v in VITALS)
+            # Buckets that overlap the range
+            cursor = conn.execute(f"SELECT bucket, readings, {stats} FROM {table} "
+                                  "WHERE device_id = ? AND bucket > ? AND bucket < ? ORDER BY bucket LIMIT ?",
+                                  (device_id, start - width, end, limit))
+            names = ["timestamp", "readings"] + [f"{v}_{s}" for v in VITALS for s in ("min", "max", "mean", "count")]
+            points = [dict(zip(names, row)) for row in cursor]
+        return {"resolution": choice, "points": points}
+
+    def close(self):
+        self.flush()
+        conn = getattr(self._readers, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._readers.conn = None
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "pruned": self.pruned,
+        }
+
+    def _reset_after_fork(self):
+        # The writer thread and connections do not survive fork
+        self._thread = None
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+
+def flush_stores(timeout=5.0):
+    """Commit everything queued by this process's stores (on shutdown)."""
+    return all(store.flush(timeout) for store in list(_stores))
+
+def _reset_stores_after_fork():
+    for store in list(_stores):
+        store._reset_after_fork()
+
+os.register_at_fork(after_in_child=_reset_stores_after_fork)
+atexit.register(flush_stores)
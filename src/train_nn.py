@@ -190,5 +190,13 @@ def train_vetnet():
     
     print("✅ Model Checkpoint saved to models/vetnet_checkpoint.pth")
 
+    # 10. Folded + frozen TorchScript artifact for CPU serving
+    from src.export_nn import export_frozen_vetnet
+    export_frozen_vetnet()
+
+    # 11. Single versioned bundle (VetNet + Stage 2) for inference
+    from src.model_bundle import try_build_bundle
+    try_build_bundle()
+
 if __name__ == "__main__":
     train_vetnet()
@@ -0,0 +1,41 @@
+"""
+Shared test fixtures
+Keep the API's runtime files (telemetry database, published aggregates, ...)
+out of the working tree: every test gets them under its own tmp_path.
+"""
+import pytest
+import sys
+import os
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import monitoring
+from src.aggregates import AggregatePublisher, RollingAggregates, StageLatency
+
+@pytest.fixture(autouse=True)
+def isolated_aggregates(tmp_path, monkeypatch):
+    """Fresh prediction and stage aggregates, published under tmp_path instead of logs/aggregates."""
+    aggregates_dir = str(tmp_path / "aggregates")
+    stages_dir = str(tmp_path / "aggregates" / "stages")
+    aggregates = RollingAggregates()
+    latency = StageLatency()
+    monkeypatch.setattr(monitoring, 'AGGREGATES_DIR', aggregates_dir)
+    monkeypatch.setattr(monitoring, 'STAGE_AGGREGATES_DIR', stages_dir)
+    monkeypatch.setattr(monitoring, 'prediction_aggregates', aggregates)
+    monkeypatch.setattr(monitoring, '_aggregate_publisher', AggregatePublisher(aggregates, aggregates_dir))
+    monkeypatch.setattr(monitoring, 'stage_latency', latency)
+    monkeypatch.setattr(monitoring, '_stage_publisher', AggregatePublisher(latency, stages_dir))
+
+@pytest.fixture(autouse=True)
+def isolated_telemetry_store(tmp_path, monkeypatch):
+    """Point the IoT gateway's telemetry store (if the test imported it) at tmp_path."""
+    iot_gateway = sys.modules.get('src.iot_gateway')
+    if iot_gateway is None or iot_gateway.telemetry_store is None:
+        yield
+        return
+    from src.telemetry_store import TelemetryStore
+    store = TelemetryStore(str(tmp_path / "telemetry.db"))
+    monkeypatch.setattr(iot_gateway, 'telemetry_store', store)
+    yield
+    store.close()
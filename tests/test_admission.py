@@ -0,0 +1,178 @@
+"""
+Admission Control Tests
+Route classes, priority lane, shedding with Retry-After, and deadlines that
+drop work before inference.
+"""
+import pytest
+import sys
+import os
+import asyncio
+import time
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import admission
+from src.admission import HIGH, NORMAL, LOW, AdmissionController, Shed
+from src.batching import DeadlineExceeded, MicroBatchScheduler
+from src.inference_executor import InferenceExecutor
+
+def _controller(**kwargs):
+    config = dict(route_limits={'telemetry': 8, 'predict': 8, 'bulk': 8}, max_concurrency=2,
+                  high_priority_reserve=0, max_queue_wait_ms={'high': 1000, 'normal': 1000, 'low': 1000})
+    config.update(kwargs)
+    return AdmissionController(**config)
+
+def test_route_classification():
+    controller = AdmissionController()
+    assert controller.classify('/predict') == ('predict', NORMAL)
+    assert controller.classify('/predict/batch') == ('bulk', LOW)
+    assert controller.classify('/iot/telemetry') == ('telemetry', HIGH)
+    assert controller.classify('/iot/diagnose/TAG_101') == ('diagnose', NORMAL)
+    assert controller.classify('/predictions') is None
+    assert controller.classify('/health') is None
+
+def test_priority_header_can_only_lower_priority():
+    assert admission.request_priority({}, NORMAL) == NORMAL
+    assert admission.request_priority({'x-priority': 'low'}, NORMAL) == LOW
+    assert admission.request_priority({'x-priority': 'HIGH'}, LOW) == LOW
+    assert admission.request_priority({'x-priority': 'high'}, NORMAL) == NORMAL
+    assert admission.request_priority({'x-priority': 'urgent'}, HIGH) == HIGH
+
+def test_deadline_headers():
+    assert admission.parse_deadline({}, now=100.0) is None
+    assert admission.parse_deadline({'x-request-timeout-ms': '250'}, now=100.0) == pytest.approx(100.25)
+    deadline = admission.parse_deadline({'x-request-deadline': str(time.time() + 2)}, now=100.0)
+    assert deadline == pytest.approx(102.0, abs=0.05)
+    assert admission.parse_deadline({'x-request-timeout-ms': 'soon'}) is None
+
+def test_high_priority_reserve():
+    """Normal work cannot take the reserved slots; telemetry can"""
+    async def scenario():
+        controller = _controller(max_concurrency=2, high_priority_reserve=1,
+                                 max_queue_wait_ms={'high': 1000, 'normal': 50, 'low': 50})
+        await controller.acquire('predict', NORMAL)
+        with pytest.raises(Shed):
+            await controller.acquire('predict', NORMAL)
+        await controller.acquire('telemetry', HIGH)
+        return controller.in_flight
+    assert asyncio.run(scenario()) == 2
+
+def test_waiters_are_woken_by_priority():
+    async def scenario():
+        controller = _controller(max_concurrency=1)
+        await controller.acquire('predict', NORMAL)
+        order = []
+        async def waiter(route, priority):
+            await controller.acquire(route, priority)
+            order.append(route)
+            controller.release(route, 1.0)
+        tasks = [asyncio.create_task(waiter('bulk', LOW)), asyncio.create_task(waiter('predict', NORMAL))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(waiter('telemetry', HIGH)))
+        await asyncio.sleep(0.01)
+        controller.release('predict', 1.0)
+        await asyncio.gather(*tasks)
+        return order, controller.in_flight
+    order, in_flight = asyncio.run(scenario())
+    assert order == ['telemetry', 'predict', 'bulk']
+    assert in_flight == 0
+
+def test_sheds_with_retry_after_when_wait_exceeds_budget():
+    async def scenario():
+        controller = _controller(max_concurrency=1, max_queue_wait_ms={'high': 1000, 'normal': 1000, 'low': 50})
+        await controller.acquire('predict', NORMAL)
+        start = time.monotonic()
+        with pytest.raises(Shed) as waited:
+            await controller.acquire('bulk', LOW)
+        waited_s = time.monotonic() - start
+
+        # Once the route is known to be slow, shedding happens without waiting
+        controller.routes['bulk'].service_ms = 40000.0
+        start = time.monotonic()
+        with pytest.raises(Shed) as early:
+            await controller.acquire('bulk', LOW)
+        return waited.value, waited_s, early.value, time.monotonic() - start, controller
+
+    waited, waited_s, early, early_s, controller = asyncio.run(scenario())
+    assert waited.status_code == 503 and waited.retry_after >= 1
+    assert waited_s >= 0.04
+    assert early.status_code == 503 and early.retry_after >= 5
+    assert early_s < 0.02
+    assert controller.routes['bulk'].shed == 2
+    assert controller.stats()['waiting'] == 0
+
+def test_expired_deadline_is_rejected_before_queueing():
+    async def scenario():
+        controller = _controller()
+        with pytest.raises(Shed) as e:
+            await controller.acquire('predict', NORMAL, deadline=time.monotonic() - 0.001)
+        return e.value, controller
+    shed, controller = asyncio.run(scenario())
+    assert shed.status_code == 504
+    assert controller.routes['predict'].expired == 1
+    assert controller.in_flight == 0
+
+def test_scheduler_drops_expired_records_before_scoring():
+    scored = []
+    def predict_batch(records):
+        scored.extend(records)
+        return [{"success": True} for _ in records]
+    scheduler = MicroBatchScheduler(predict_batch, max_batch_size=8, max_wait_ms=5)
+    expired = scheduler.submit({"id": "late"}, deadline=time.monotonic() - 1)
+    live = scheduler.submit({"id": "ok"}, deadline=time.monotonic() + 5)
+    assert live.result(timeout=5) == {"success": True}
+    with pytest.raises(DeadlineExceeded):
+        expired.result(timeout=5)
+    assert scored == [{"id": "ok"}]
+    assert scheduler.stats()['expired'] == 1
+    scheduler.stop()
+
+def test_executor_drops_expired_calls():
+    executor = InferenceExecutor(max_workers=1, max_queue_depth=4)
+    calls = []
+    future = executor.submit(calls.append, 'late', deadline=time.monotonic() - 1)
+    with pytest.raises(DeadlineExceeded):
+        future.result(timeout=5)
+    assert calls == []
+    assert executor.stats()['expired'] == 1
+    executor.shutdown()
+
+# Middleware on the real app (no trained models needed)
+from fastapi.testclient import TestClient
+import simple_api
+
+def test_api_sheds_and_expires(monkeypatch):
+    client = TestClient(simple_api.app)
+    monkeypatch.setattr(simple_api.admission_controller.routes['bulk'], 'limit', 0)
+    response = client.post("/predict/batch", json=[])
+    assert response.status_code == 503
+    assert int(response.headers['retry-after']) >= 1
+
+    called = []
+    monkeypatch.setattr(simple_api, 'scheduler', None)
+    monkeypatch.setattr(simple_api, 'predict_disease_nn', lambda record: called.append(record))
+    response = client.post("/predict", json={"Animal": "Dog", "Age": 3.0, "Gender": "Male"},
+                           headers={"X-Request-Deadline": str(time.time() - 5)})
+    assert response.status_code == 504
+    assert called == []
+
+    # Uncontrolled routes are never shed
+    assert client.get("/health").status_code == 200
+
+def test_bulk_request_asking_for_high_stays_below_telemetry(monkeypatch):
+    client = TestClient(simple_api.app)
+    controller = simple_api.admission_controller
+    acquire = controller.acquire
+    admitted = {}
+
+    async def recording_acquire(route_name, priority, deadline=None):
+        admitted[route_name] = priority
+        return await acquire(route_name, priority, deadline)
+    monkeypatch.setattr(controller, 'acquire', recording_acquire)
+
+    client.post("/predict/batch", json=[], headers={"X-Priority": "high"})
+    client.post("/iot/telemetry", json={"device_id": "PRIO_1", "animal_id": "A", "species": "Dog",
+                                        "timestamp": time.time(), "temperature": 38.5, "heart_rate": 90})
+    assert admitted['bulk'] == LOW
+    assert admitted['telemetry'] == HIGH < admitted['bulk']
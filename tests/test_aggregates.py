@@ -0,0 +1,138 @@
+"""
+Rolling Aggregates Tests
+Quantile sketch accuracy and merging, tumbling time buckets, and the
+published per-process state that dashboards merge.
+"""
+import pytest
+import sys
+import os
+import json
+import multiprocessing
+import numpy as np
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import monitoring
+from src.aggregates import (AggregatePublisher, QuantileSketch, RollingAggregates,
+                            compact_published, load_published)
+
+def _entry(animal="Dog", category="Viral", disease="Flu", latency_ms=10.0, status="success", confidence=0.8):
+    return {"animal": animal, "category": category, "disease": disease, "latency_ms": latency_ms,
+            "status": status, "disease_confidence": confidence}
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(mean=2.5, sigma=1.0, size=50000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for v in values:
+        sketch.add(float(v))
+    for q in (0.5, 0.9, 0.95, 0.99, 0.999):
+        exact = np.quantile(values, q, method='lower')
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+    assert sketch.count == 50000
+    assert sketch.mean() == pytest.approx(values.mean())
+    assert len(sketch.bins) < 1000  # bounded by the value range, not the sample count
+
+def test_sketch_merge_matches_a_single_sketch():
+    rng = np.random.default_rng(1)
+    a_values, b_values = rng.exponential(5, 3000), rng.exponential(50, 1000)
+    a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for v in a_values:
+        a.add(float(v)); both.add(float(v))
+    for v in b_values:
+        b.add(float(v)); both.add(float(v))
+    a.merge(QuantileSketch.from_dict(json.loads(json.dumps(b.to_dict()))))
+    assert a.bins == both.bins and a.count == both.count
+    assert a.quantile(0.99) == both.quantile(0.99)
+    assert QuantileSketch().quantile(0.5) is None
+
+def test_all_time_and_windowed_counts():
+    aggregates = RollingAggregates(minute_buckets=10, hour_buckets=5)
+    t0 = 1_700_000_000 // 3600 * 3600
+    aggregates.record(_entry("Dog", "Viral"), now=t0)
+    aggregates.record(_entry("Cat", "Viral", status="error", confidence=None), now=t0 + 30)
+    aggregates.record(_entry("Dog", "Bacterial", latency_ms=40.0), now=t0 + 600)
+
+    everything = aggregates.snapshot()
+    assert everything["count"] == 3 and everything["errors"] == 1
+    assert everything["species"] == {"Dog": 2, "Cat": 1}
+    assert everything["species_category"] == {"Dog": {"Viral": 1, "Bacterial": 1}, "Cat": {"Viral": 1}}
+    assert everything["mean_confidence"] == pytest.approx(0.8)
+
+    last_5 = aggregates.snapshot(window_minutes=5, now=t0 + 630)
+    assert last_5["count"] == 1 and last_5["bucket_seconds"] == 60
+    assert last_5["latency_ms"]["max"] == 40.0
+    assert [p["count"] for p in last_5["series"]] == [1]
+    # Longer than the minute retention: answered from hour buckets
+    assert aggregates.snapshot(window_minutes=120, now=t0 + 630)["bucket_seconds"] == 3600
+
+def test_old_buckets_are_evicted():
+    aggregates = RollingAggregates(minute_buckets=10, hour_buckets=2)
+    t0 = 1_700_000_000
+    for minute in range(100):
+        aggregates.record(_entry(), now=t0 + minute * 60)
+    assert len(aggregates.minutes) <= 11
+    assert len(aggregates.hours) <= 3
+    assert aggregates.snapshot()["count"] == 100
+
+def test_state_round_trips_through_json():
+    aggregates = RollingAggregates()
+    for i in range(20):
+        aggregates.record(_entry(latency_ms=float(i)), now=1_700_000_000 + i * 30)
+    restored = RollingAggregates.from_dict(json.loads(json.dumps(aggregates.to_dict())))
+    assert restored.snapshot() == aggregates.snapshot()
+    assert restored.snapshot(60, now=1_700_000_600) == aggregates.snapshot(60, now=1_700_000_600)
+
+def test_published_states_are_merged_and_dead_ones_compacted(tmp_path):
+    directory = str(tmp_path)
+    mine, other = RollingAggregates(), RollingAggregates()
+    mine_pub, other_pub = AggregatePublisher(mine, directory), AggregatePublisher(other, directory)
+    assert not mine_pub.publish()  # nothing recorded yet
+    mine.record(_entry("Dog"))
+    other.record(_entry("Cat"))
+    assert mine_pub.publish() and other_pub.publish()
+    assert not mine_pub.publish()  # unchanged
+
+    # Unpublished live changes replace this process's (stale) file
+    mine.record(_entry("Dog"))
+    merged = load_published(directory, live=mine, live_path=mine_pub.path)
+    assert merged.snapshot()["species"] == {"Dog": 2, "Cat": 1}
+
+    # A file left by a process that has exited is folded into base.json
+    dead = multiprocessing.get_context('fork').Process(target=int)
+    dead.start()
+    dead.join()
+    with open(os.path.join(directory, f"worker-{dead.pid}-1.json"), "w") as f:
+        json.dump(RollingAggregates().to_dict() | {"all_time": _bucket_state("Horse")}, f)
+    assert compact_published(directory) == 1
+    assert not os.path.exists(os.path.join(directory, f"worker-{dead.pid}-1.json"))
+    merged = load_published(directory, live=mine, live_path=mine_pub.path)
+    assert merged.snapshot()["species"] == {"Dog": 2, "Cat": 1, "Horse": 1}
+    assert compact_published(directory) == 0
+
+def _bucket_state(animal):
+    aggregates = RollingAggregates()
+    aggregates.record(_entry(animal))
+    return aggregates.to_dict()["all_time"]
+
+# API integration (no trained models needed)
+from fastapi.testclient import TestClient
+import simple_api
+
+def test_monitor_records_predictions_and_serves_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitoring, 'LOG_FILE', str(tmp_path / "prediction_log.jsonl"))
+
+    monitor = monitoring.SystemMonitor()
+    monitor.log_prediction({"Animal": "Cat"}, {"success": True, "predicted_category": "Viral",
+                                               "predicted_disease": "Flu", "disease_confidence": 0.9}, 12.0)
+    monitor.log_predictions([{"Animal": "Dog"}, {"Animal": "Dog"}],
+                            [{"success": True, "predicted_category": "Bacterial"}, {"success": False}], 30.0)
+
+    response = TestClient(simple_api.app).get("/monitoring/aggregates", params={"window_minutes": 15})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["all_time"]["count"] == 3
+    assert body["all_time"]["species"] == {"Dog": 2, "Cat": 1}
+    assert body["window"]["count"] == 3 and body["window"]["errors"] == 1
+    assert body["window"]["latency_ms"]["max"] == 15.0  # batch latency is amortized per row
+    assert TestClient(simple_api.app).get("/monitoring/aggregates", params={"window_minutes": 0}).status_code == 400
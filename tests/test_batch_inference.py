@@ -0,0 +1,143 @@
+"""
+Batch Inference Tests
+Verifies that the vectorized batch path returns the same results as scoring
+each record on its own.
+"""
+import pytest
+import sys
+import os
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import inference_nn
+from src.inference_nn import predict_disease_nn, predict_disease_nn_batch
+
+requires_models = pytest.mark.skipif(not inference_nn.wait_until_ready(), reason="Model artifacts not available")
+
+SAMPLE_RECORDS = [
+    {'Animal': 'Dog', 'Age': 5.0, 'Gender': 'Male', 'Breed': 'Mixed', 'WBC': 20.0, 'RBC': 6.0,
+     'Hemoglobin': 14.0, 'Platelets': 200, 'Glucose': 90, 'ALT': 40, 'AST': 40, 'Urea': 20,
+     'Creatinine': 1.0, 'Symptom_Fever': 1, 'Symptom_Lethargy': 1},
+    {'Animal': 'Cat', 'Age': 3.0, 'Gender': 'Female', 'WBC': 15.0, 'Symptom_Vomiting': 1},
+    {'Animal': 'Cattle', 'Age': 6.0, 'Gender': 'Female', 'Breed': 'Holstein', 'WBC': 9.0, 'RBC': 0.0,
+     'Glucose': 60, 'Symptom_Drooling': 1, 'Symptom_Blisters': 1, 'Symptom_Lameness': 1},
+    {'Animal': 'Horse', 'Age': 7.0, 'Gender': 'Male', 'Symptom_Lameness': 1},
+    {'Animal': 'Dragon', 'Age': 1.0, 'Gender': 'Male', 'ALT': 300, 'AST': 35, 'Symptom_Coughing': 1},
+    {'Animal': 'Chicken', 'Age': 1.5, 'Gender': 'Female', 'Urea': 80, 'Creatinine': 0.5,
+     'Symptom_NasalDischarge': 1, 'Symptom_EyeDischarge': 1},
+]
+
+@requires_models
+def test_batch_matches_single_record_path():
+    """Every record scored in a batch must match scoring it alone"""
+    batch_results = predict_disease_nn_batch([dict(r) for r in SAMPLE_RECORDS])
+    assert len(batch_results) == len(SAMPLE_RECORDS)
+
+    for record, batch_result in zip(SAMPLE_RECORDS, batch_results):
+        single_result = predict_disease_nn(dict(record))
+        assert batch_result == single_result
+
+@requires_models
+def test_batch_isolates_bad_records():
+    """A record that cannot be parsed fails alone"""
+    records = [dict(SAMPLE_RECORDS[0]), {'Animal': 'Dog', 'Age': 2.0, 'WBC': 'not-a-number'}]
+    results = predict_disease_nn_batch(records)
+
+    assert results[0]['success'] == True
+    assert results[1]['success'] == False
+    assert 'error' in results[1]
+
+@requires_models
+def test_batch_isolates_bad_non_ratio_values():
+    """A non-numeric Age/Hemoglobin/Platelets/Glucose fails only its own record"""
+    bad = [dict(SAMPLE_RECORDS[0], Glucose='high'), dict(SAMPLE_RECORDS[1], Age='old')]
+    records = [dict(SAMPLE_RECORDS[0]), bad[0], dict(SAMPLE_RECORDS[2]), bad[1]]
+    results = predict_disease_nn_batch(records)
+
+    assert [r['success'] for r in results] == [True, False, True, False]
+    assert results[0] == predict_disease_nn(dict(SAMPLE_RECORDS[0]))
+    assert results[2] == predict_disease_nn(dict(SAMPLE_RECORDS[2]))
+
+def test_raw_numeric_row_coerces_every_value():
+    """Every base value is coerced per record; None stays missing for the imputer"""
+    row = inference_nn._raw_numeric_row({'Age': '4', 'Hemoglobin': None, 'Platelets': 250, 'Symptom_Fever': 1})
+    assert all(isinstance(v, float) for v in row)
+    assert row[0] == 4.0 and row[4] == 250.0
+    assert row[3] != row[3]  # NaN
+    for col in ('Age', 'Hemoglobin', 'Platelets', 'Glucose'):
+        with pytest.raises(ValueError):
+            inference_nn._raw_numeric_row({col: 'n/a'})
+
+def test_feature_matrix_ratios():
+    """Ratios are computed vectorized with the zero-denominator guard"""
+    # 10 base values + 12 symptoms
+    row_ok = [5.0, 10.0, 5.0, 14.0, 300.0, 100.0, 40.0, 20.0, 30.0, 1.5] + [0.0] * 12
+    row_zero = [5.0, 10.0, 0.0, 14.0, 300.0, 100.0, 40.0, 0.0, 30.0, 0.0] + [1.0] * 12
+    X = inference_nn.build_feature_matrix([row_ok, row_zero])
+
+    assert X.shape == (2, 25)
+    assert X[0, 10:13].tolist() == pytest.approx([2.0, 2.0, 20.0])
+    assert X[1, 10:13].tolist() == [0.0, 0.0, 0.0]
+    assert X[1, 13:].tolist() == [1.0] * 12
+
+# API Endpoint Tests
+def _api_client():
+    from fastapi.testclient import TestClient
+    from simple_api import app
+    return TestClient(app)
+
+@requires_models
+def test_api_predict_batch():
+    """POST /predict/batch scores a list of requests in order"""
+    client = _api_client()
+    payload = [
+        {"Animal": "Cat", "Age": 3.0, "Gender": "Female", "WBC": 15.0, "Symptom_Vomiting": 1},
+        {"Animal": "Horse", "Age": 7.0, "Gender": "Male", "Symptom_Lameness": 1},
+    ]
+    response = client.post("/predict/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data['count'] == 2
+    assert data['failed'] == 0
+    single = client.post("/predict", json=payload[1]).json()
+    assert data['results'][1] == single
+
+@requires_models
+def test_api_predict_stream():
+    """POST /predict/stream returns one NDJSON result per input line"""
+    import json
+    client = _api_client()
+    lines = [
+        json.dumps({"Animal": "Dog", "Age": 4.0, "Gender": "Male", "Symptom_Fever": 1}),
+        "{not json",
+        json.dumps({"Animal": "Cattle", "Age": 6.0, "Gender": "Female", "Symptom_Drooling": 1}),
+    ]
+    response = client.post("/predict/stream", content="\n".join(lines) + "\n",
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+
+    results = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [r['index'] for r in results] == [0, 1, 2]
+    assert results[0]['success'] == True
+    assert results[1]['success'] == False
+    assert results[2]['success'] == True
+
+def test_api_predict_stream_indexes_physical_lines_and_caps_line_length(monkeypatch):
+    """Blank lines keep their numbers; an over-long line gets an error result instead of being buffered"""
+    import json
+    import simple_api
+    monkeypatch.setattr(simple_api, '_predict_chunk', lambda records: [{"success": True, "animal": r["Animal"]}
+                                                                       for r in records])
+    monkeypatch.setattr(simple_api, 'MAX_STREAM_LINE_BYTES', 200)
+    record = json.dumps({"Animal": "Dog", "Age": 4.0, "Gender": "Male"}).encode()
+    chunks = [record + b"\n\n", b"{" + b" " * 150, b" " * 150 + b"}\n", record + b"\n   \n", record]
+    response = _api_client().post("/predict/stream", content=iter(chunks),
+                                  headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r['index'] for r in results] == [0, 2, 3, 5]
+    assert [r['success'] for r in results] == [True, False, True, True]
+    assert "too long" in results[1]['error']
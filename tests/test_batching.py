@@ -0,0 +1,118 @@
+"""
+Micro-Batching Scheduler Tests
+Uses a stub batch function so no model artifacts are needed.
+"""
+import pytest
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.batching import MicroBatchScheduler, QueueFullError, Histogram
+
+def test_concurrent_requests_are_coalesced():
+    """Requests arriving within the window share one batch call"""
+    calls = []
+    def predict_batch(records):
+        calls.append(len(records))
+        return [{"echo": r["id"]} for r in records]
+
+    scheduler = MicroBatchScheduler(predict_batch, max_batch_size=16, max_wait_ms=50)
+    futures = [scheduler.submit({"id": i}) for i in range(10)]
+    results = [f.result(timeout=5) for f in futures]
+    scheduler.stop()
+
+    # Each caller gets its own result back
+    assert results == [{"echo": i} for i in range(10)]
+    assert calls == [10]
+    stats = scheduler.stats()
+    assert stats['batch_size']['count'] == 1
+    assert stats['queue_wait_ms']['count'] == 10
+
+def test_batch_size_is_capped():
+    def predict_batch(records):
+        time.sleep(0.01)
+        return [None] * len(records)
+
+    scheduler = MicroBatchScheduler(predict_batch, max_batch_size=4, max_wait_ms=20)
+    futures = [scheduler.submit({}) for _ in range(10)]
+    for f in futures:
+        f.result(timeout=5)
+    scheduler.stop()
+
+    assert scheduler.stats()['batch_size']['buckets']['4'] >= 2
+    assert scheduler.batch_sizes.n == 3
+
+def test_queue_depth_limit():
+    gate = threading.Event()
+    def predict_batch(records):
+        gate.wait(5)
+        return [None] * len(records)
+
+    scheduler = MicroBatchScheduler(predict_batch, max_batch_size=1, max_wait_ms=0, max_queue_depth=2)
+    first = scheduler.submit({})
+    time.sleep(0.05)  # worker picks up the first record and blocks
+    scheduler.submit({})
+    scheduler.submit({})
+    with pytest.raises(QueueFullError):
+        scheduler.submit({})
+    gate.set()
+    first.result(timeout=5)
+    scheduler.stop()
+    assert scheduler.rejected == 1
+
+def test_batch_errors_reach_every_caller():
+    def predict_batch(records):
+        raise RuntimeError("model exploded")
+
+    scheduler = MicroBatchScheduler(predict_batch, max_wait_ms=10)
+    futures = [scheduler.submit({}) for _ in range(3)]
+    for f in futures:
+        with pytest.raises(RuntimeError):
+            f.result(timeout=5)
+    scheduler.stop()
+
+def test_cancelled_caller_does_not_stall_the_scheduler():
+    """A Future cancelled while queued is skipped; its batch-mates and later calls still complete"""
+    scored = []
+    def predict_batch(records):
+        scored.extend(r["id"] for r in records)
+        return [{"echo": r["id"]} for r in records]
+
+    scheduler = MicroBatchScheduler(predict_batch, max_batch_size=16, max_wait_ms=100)
+    futures = [scheduler.submit({"id": i}) for i in range(3)]
+    assert futures[1].cancel()
+    assert futures[0].result(timeout=5) == {"echo": 0}
+    assert futures[2].result(timeout=5) == {"echo": 2}
+    assert scheduler.submit({"id": 3}).result(timeout=5) == {"echo": 3}
+    scheduler.stop()
+    assert scored == [0, 2, 3]
+    assert scheduler.stats()['cancelled'] == 1
+
+def test_wait_for_timeout_on_a_wrapped_future():
+    """The API awaits asyncio.wrap_future(); a wait_for timeout cancels the queued record"""
+    scheduler = MicroBatchScheduler(lambda records: [{"echo": r["id"]} for r in records],
+                                    max_batch_size=16, max_wait_ms=100)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.wrap_future(scheduler.submit({"id": 0})), 0.01)
+        mate = asyncio.wrap_future(scheduler.submit({"id": 1}))
+        return await asyncio.wait_for(mate, 5)
+
+    assert asyncio.run(scenario()) == {"echo": 1}
+    assert scheduler.submit({"id": 2}).result(timeout=5) == {"echo": 2}
+    scheduler.stop()
+    assert scheduler.stats()['cancelled'] == 1
+
+def test_histogram_buckets():
+    h = Histogram([1, 5, 10])
+    for v in [0.5, 1, 3, 10, 50]:
+        h.observe(v)
+    snap = h.snapshot()
+    assert snap['buckets'] == {'1': 2, '5': 1, '10': 1, '+Inf': 1}
+    assert snap['count'] == 5
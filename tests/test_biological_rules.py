@@ -0,0 +1,61 @@
+"""
+Biological Rules Tests
+Vectorized vitals checks: analyze_vitals_batch() and vitals_alerts() must
+agree row for row with analyze_vitals(), whose messages are unchanged.
+"""
+import sys
+import os
+import numpy as np
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.biological_rules import (CRITICAL, INFO, NORMAL, UNKNOWN_SPECIES, WARNING, analyze_vitals,
+                                  analyze_vitals_batch, species_codes, vitals_alerts, VITAL_SIGNS_REFERENCE)
+
+def test_single_animal_messages_are_unchanged():
+    assert analyze_vitals('Cow', temp=38.5, hr=60) == {
+        'species': 'Cattle', 'alerts': [], 'reference_used': VITAL_SIGNS_REFERENCE['Cattle']}
+    alerts = analyze_vitals('Cow', temp=40.5, hr=90)['alerts']
+    assert alerts == [
+        {'severity': 'CRITICAL', 'message': "Fever Detected: 40.5°C is above normal range (38.0-39.3) for Cow",
+         'param': 'Temperature'},
+        {'severity': 'WARNING', 'message': "Tachycardia (High HR): 90 bpm is above normal (40-80)",
+         'param': 'Heart Rate'},
+    ]
+    unknown = analyze_vitals('Dragon', temp=36.0)
+    assert unknown['species'] == 'Dragon' and unknown['reference_used'] == VITAL_SIGNS_REFERENCE['Unknown']
+    assert [a['severity'] for a in unknown['alerts']] == ['INFO', 'CRITICAL']
+    assert analyze_vitals('Horse', rr=20)['alerts'][0]['param'] == 'Respiration'
+
+def test_batch_matches_single_animal_checks():
+    rng = np.random.default_rng(0)
+    n = 2000
+    animals = rng.choice(list(VITAL_SIGNS_REFERENCE) + ['Cow', 'Foal', 'Dragon'], n).tolist()
+    temps = np.round(rng.uniform(34.0, 44.0, n), 1)
+    hrs = rng.integers(10, 320, n).astype(np.float64)
+    rrs = rng.integers(2, 45, n).astype(np.float64)
+    temps[::7] = np.nan  # not measured
+    hrs[::11] = np.nan
+
+    result = analyze_vitals_batch(species_codes(animals), temps, hrs, rrs)
+    alerts = vitals_alerts(result, animals)
+    assert set(alerts) == set(np.flatnonzero(result['severity']).tolist())
+    for i, animal in enumerate(animals):
+        t, h, r = (None if np.isnan(v) else float(v) for v in (temps[i], hrs[i], rrs[i]))
+        expected = analyze_vitals(animal, temp=t, hr=h, rr=r)['alerts']
+        assert alerts.get(i, []) == expected
+        worst = max((['NORMAL', 'INFO', 'WARNING', 'CRITICAL'].index(a['severity']) for a in expected), default=NORMAL)
+        assert result['severity'][i] == worst
+
+def test_severity_codes_and_float32_messages():
+    codes = species_codes(['Cattle', 'Cattle', 'Cattle', 'Dragon', 'Dragon'])
+    assert codes[3] == UNKNOWN_SPECIES
+    temps = np.array([38.9, 37.5, 39.8, 38.0, 41.0], dtype=np.float32)
+    result = analyze_vitals_batch(codes, temps=temps)
+    assert result['severity'].tolist() == [NORMAL, CRITICAL, WARNING, INFO, CRITICAL]
+    assert result['temp_flag'].tolist() == [0, -1, 1, 0, 1]
+    alerts = vitals_alerts(result)
+    assert 0 not in alerts
+    assert alerts[2][0]['message'] == "Fever Detected: 39.8°C is above normal range (38.0-39.3) for Cattle"
+    assert analyze_vitals_batch(species_codes([]))['severity'].shape == (0,)
@@ -0,0 +1,138 @@
+"""
+Compiled Stage 2 Pipeline Parity Tests
+The compiled preprocessing path must produce the same probabilities as the
+sklearn Pipeline it was extracted from.
+"""
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from xgboost import XGBClassifier
+
+from src import forest_compiler
+from src.compiled_pipeline import CompiledPipeline
+
+NUMERIC = ['Age', 'WBC', 'Glucose', 'Symptom_Fever']
+CATEGORICAL = ['Animal', 'Gender', 'Breed']
+STAGE2_ARTIFACT = 'models/stage2_models.pkl'
+
+def _fit_pipeline(n_classes):
+    """Small pipeline with the same layout as scripts/retrain_models.py"""
+    rng = np.random.default_rng(0)
+    n = 300
+    df = pd.DataFrame({
+        'Age': rng.uniform(0, 15, n),
+        'WBC': rng.normal(10, 3, n),
+        'Glucose': rng.normal(100, 20, n),
+        'Symptom_Fever': rng.integers(0, 2, n),
+        'Animal': rng.choice(['Dog', 'Cat', 'Cattle'], n),
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'Breed': rng.choice(['Mixed', 'Purebred', np.nan], n),
+    })
+    df.loc[rng.choice(n, 30), 'WBC'] = np.nan
+    y = (df['WBC'].fillna(10) > 10).astype(int) + (df['Animal'] == 'Dog') * (n_classes - 2)
+
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', Pipeline([('imputer', SimpleImputer(strategy='mean')), ('scaler', StandardScaler())]), NUMERIC),
+        ('cat', Pipeline([('imputer', SimpleImputer(strategy='constant', fill_value='missing')),
+                          ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))]), CATEGORICAL),
+    ])
+    pipeline = Pipeline([
+        ('preprocessor', preprocessor),
+        ('model', XGBClassifier(n_estimators=10, max_depth=3, n_jobs=1, random_state=42)),
+    ])
+    pipeline.fit(df, y)
+    return pipeline
+
+EDGE_RECORDS = [
+    {'Age': 3.0, 'WBC': 12.0, 'Glucose': 90.0, 'Symptom_Fever': 1, 'Animal': 'Dog', 'Gender': 'Male', 'Breed': 'Mixed'},
+    {'Age': 7.0, 'WBC': None, 'Glucose': 110.0, 'Symptom_Fever': 0, 'Animal': 'Cat', 'Gender': 'Female', 'Breed': np.nan},
+    {'Age': 1.0, 'WBC': 8.0, 'Glucose': np.nan, 'Symptom_Fever': 0, 'Animal': 'Dragon', 'Gender': 'Male', 'Breed': None},
+    {'Age': 12, 'WBC': 20, 'Glucose': 60, 'Symptom_Fever': 1, 'Animal': 'Cattle', 'Gender': 'Unknown', 'Breed': 'Purebred'},
+]
+
+@pytest.mark.parametrize("n_classes", [2, 4])
+def test_compiled_matches_pipeline(n_classes):
+    """Binary and multi-class boosters, including NaN/None/unknown values"""
+    pipeline = _fit_pipeline(n_classes)
+    compiled = CompiledPipeline(pipeline)
+
+    expected = np.vstack([pipeline.predict_proba(pd.DataFrame([r])) for r in EDGE_RECORDS])
+    actual = compiled.predict_proba(EDGE_RECORDS)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(actual, expected)
+    assert compiled.required_columns == set(NUMERIC + CATEGORICAL)
+
+def test_compiled_reports_bad_rows():
+    compiled = CompiledPipeline(_fit_pipeline(2))
+    records = [dict(EDGE_RECORDS[0]), dict(EDGE_RECORDS[0], Glucose='high')]
+    X, errors = compiled.transform(records)
+
+    assert X.shape[0] == 2
+    assert list(errors) == [1]
+
+@pytest.mark.parametrize("use_numba", [True, False])
+@pytest.mark.parametrize("n_classes", [2, 4])
+def test_native_forest_matches_pipeline(n_classes, use_numba, monkeypatch):
+    """Flat-array evaluator vs predict_proba, single rows and one batch"""
+    if use_numba and not forest_compiler.NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+    monkeypatch.setattr(forest_compiler, 'NUMBA_AVAILABLE', use_numba)
+    pipeline = _fit_pipeline(n_classes)
+    compiled = CompiledPipeline(pipeline, backend='native')
+    assert compiled.booster is None
+
+    expected = np.vstack([pipeline.predict_proba(pd.DataFrame([r])) for r in EDGE_RECORDS])
+    batch = compiled.predict_proba(EDGE_RECORDS)
+    singles = np.vstack([compiled.predict_proba([r]) for r in EDGE_RECORDS])
+
+    np.testing.assert_allclose(batch, expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_array_equal(singles, batch)
+    assert (batch.argmax(axis=1) == expected.argmax(axis=1)).all()
+
+def test_native_state_round_trip():
+    """export_state/from_state (as stored in the model bundle) rebuilds the same scorer"""
+    pipeline = _fit_pipeline(4)
+    compiled = CompiledPipeline(pipeline, backend='native')
+    meta, arrays = compiled.export_state()
+    # Bundle arrays come back as read-only views
+    for a in arrays.values():
+        a.flags.writeable = False
+    restored = CompiledPipeline.from_state(meta, arrays)
+
+    np.testing.assert_array_equal(restored.predict_proba(EDGE_RECORDS), compiled.predict_proba(EDGE_RECORDS))
+    assert restored.required_columns == compiled.required_columns
+    np.testing.assert_array_equal(restored.classes_, compiled.classes_)
+
+@pytest.mark.skipif(not os.path.exists(STAGE2_ARTIFACT), reason="Run scripts/retrain_models.py first")
+def test_parity_with_retrain_models_artifacts():
+    """Every trained Stage 2 model, on real rows with missing and unseen values"""
+    import joblib
+    stage2_models = joblib.load(STAGE2_ARTIFACT)
+
+    df = pd.read_csv('data/enhanced_training_data.csv').sample(200, random_state=7)
+    df = df.astype(object).where(df.notna(), np.nan)
+    records = df.to_dict(orient='records')
+    for i, r in enumerate(records):
+        if i % 5 == 0:
+            r['Breed'] = None
+        if i % 9 == 0:
+            r['Animal'] = 'Unicorn'
+
+    for category, pipeline in stage2_models.items():
+        compiled = CompiledPipeline(pipeline)
+        expected = np.vstack([pipeline.predict_proba(pd.DataFrame([r])) for r in records])
+        np.testing.assert_array_equal(compiled.predict_proba(records), expected, err_msg=category)
+
+        native = CompiledPipeline(pipeline, backend='native')
+        np.testing.assert_allclose(native.predict_proba(records), expected, rtol=1e-5, atol=1e-6, err_msg=category)
@@ -0,0 +1,96 @@
+"""
+VetNet Export Tests
+The folded, frozen TorchScript model must reproduce the eager model; the int8
+variant must stay close to it, and is not written when it fails the accuracy gate.
+"""
+import pytest
+import sys
+import os
+import numpy as np
+import torch
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.neural_network import VetNet
+from src import evaluate_nn, export_nn
+from src.export_nn import fold_linear_bn, freeze_vetnet, quantize_vetnet, max_logit_diff
+
+def _trained_like_vetnet():
+    """VetNet with non-trivial BatchNorm statistics (fresh BNs fold to identity)"""
+    torch.manual_seed(0)
+    model = VetNet(n_categories=8, n_species=20, numeric_dim=25)
+    for bn in (model.bn_num1, model.bn1, model.bn2):
+        bn.running_mean.uniform_(-1, 1)
+        bn.running_var.uniform_(0.5, 2.0)
+        bn.weight.data.uniform_(0.5, 1.5)
+        bn.bias.data.uniform_(-0.5, 0.5)
+    return model.eval()
+
+def test_fold_linear_bn():
+    model = _trained_like_vetnet()
+    x = torch.randn(64, 25)
+    fused = fold_linear_bn(model.fc_num1, model.bn_num1)
+    with torch.no_grad():
+        assert torch.allclose(fused(x), model.bn_num1(model.fc_num1(x)), atol=1e-5)
+
+@pytest.mark.parametrize("batch_size", [1, 512])
+def test_frozen_matches_eager(batch_size):
+    model = _trained_like_vetnet()
+    frozen = freeze_vetnet(model)
+
+    x_num = torch.randn(batch_size, 25)
+    x_cat = torch.randint(0, 21, (batch_size,))
+    with torch.no_grad():
+        expected = model(x_num, x_cat)
+        actual = frozen(x_num, x_cat)
+    assert torch.allclose(actual, expected, atol=1e-4)
+    assert torch.equal(actual.argmax(dim=1), expected.argmax(dim=1))
+    assert max_logit_diff(model, frozen, 25, 21) < 1e-4
+
+def test_frozen_has_no_batchnorm_or_dropout():
+    frozen = freeze_vetnet(_trained_like_vetnet())
+    graph = str(frozen.graph)
+    assert 'batch_norm' not in graph
+    assert 'dropout' not in graph
+
+def test_int8_variant_is_quantized_and_close():
+    model = _trained_like_vetnet()
+    quantized = quantize_vetnet(model)
+    assert 'quantized' in str(quantized.graph)
+
+    x_num = torch.randn(512, 25)
+    x_cat = torch.randint(0, 21, (512,))
+    with torch.no_grad():
+        expected = model(x_num, x_cat)
+        actual = quantized(x_num, x_cat)
+    # Dynamic int8 is approximate; predictions should still almost always agree
+    agreement = (actual.argmax(dim=1) == expected.argmax(dim=1)).float().mean().item()
+    assert agreement > 0.95
+
+def _gate_inputs(monkeypatch, int8_correct):
+    """Stub the artifacts and held-out split: fp32 gets all 100 rows right, int8 `int8_correct` of them"""
+    y_test = np.arange(100) % 8
+    monkeypatch.setattr(export_nn, 'load_eager_vetnet', lambda state_path: _trained_like_vetnet())
+    monkeypatch.setattr(export_nn.joblib, 'load', lambda path: None)
+    monkeypatch.setattr(evaluate_nn, 'load_test_split', lambda *encoders: (None, None, y_test))
+
+    def predict_categories(model, X_num, X_cat, device=None):
+        if isinstance(model, torch.jit.ScriptModule):  # the int8 export
+            return np.where(np.arange(100) < int8_correct, y_test, (y_test + 1) % 8)
+        return y_test
+    monkeypatch.setattr(evaluate_nn, 'predict_categories', predict_categories)
+
+def test_int8_export_refused_past_the_accuracy_gate(monkeypatch, tmp_path):
+    _gate_inputs(monkeypatch, int8_correct=98)  # 2 pts drop
+    output = tmp_path / "vetnet_int8.pt"
+    argv = ['--variant', 'int8', '--output', str(output), '--max-accuracy-drop', '1.0']
+    assert export_nn.main(argv) == 1
+    assert not output.exists()
+
+def test_int8_export_written_within_the_accuracy_gate(monkeypatch, tmp_path):
+    _gate_inputs(monkeypatch, int8_correct=98)
+    output = tmp_path / "vetnet_int8.pt"
+    argv = ['--variant', 'int8', '--output', str(output), '--max-accuracy-drop', '2.5']
+    assert export_nn.main(argv) == 0
+    assert output.exists()
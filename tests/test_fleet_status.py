@@ -0,0 +1,109 @@
+"""
+Fleet Status Index Tests
+/iot/dashboard/summary is served from per-device records updated on
+ingestion: filters, pagination, cached renders and ETag/304 polling.
+"""
+import pytest
+import sys
+import os
+import json
+import time
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi.testclient import TestClient
+import simple_api
+from src import iot_gateway
+from src.fleet_status import FleetStatusIndex
+from src.telemetry_buffer import TelemetryRingBuffer
+
+client = TestClient(simple_api.app)
+
+@pytest.fixture(autouse=True)
+def empty_fleet(monkeypatch):
+    monkeypatch.setattr(iot_gateway, 'device_stream_buffer', TelemetryRingBuffer())
+    monkeypatch.setattr(iot_gateway, 'fleet_status', FleetStatusIndex())
+    monkeypatch.setattr(iot_gateway, 'telemetry_store', None)
+
+def test_filters_and_pages_in_first_seen_order():
+    index = FleetStatusIndex()
+    for i, (status, species, seen) in enumerate([("HEALTHY", "Cattle", 990.0), ("CRITICAL", "Dog", 100.0),
+                                                 ("WARNING", "Cattle", 995.0), ("CRITICAL", "Cattle", 999.0)]):
+        index.update(f"D{i}", f"A{i}", species, seen, status)
+    index.update("D0", "A0", "Cattle", 998.0, "CRITICAL")  # moves, keeps its place
+    ids = lambda body: [d["device_id"] for d in body["devices"]]
+
+    assert ids(index.summary(now=1000.0)) == ["D0", "D1", "D2", "D3"]
+    critical = index.summary(statuses={"CRITICAL"}, now=1000.0)
+    assert ids(critical) == ["D0", "D1", "D3"] and critical["total"] == 3
+    assert ids(index.summary(statuses={"CRITICAL"}, species={"Cattle"}, now=1000.0)) == ["D0", "D3"]
+    assert ids(index.summary(stale=True, stale_after_s=300, now=1000.0)) == ["D1"]
+    assert ids(index.summary(stale=False, stale_after_s=300, now=1000.0)) == ["D0", "D2", "D3"]
+    page = index.summary(offset=1, limit=2, now=1000.0)
+    assert ids(page) == ["D1", "D2"] and page["count"] == 2 and page["total"] == 4
+    assert page["devices"][0]["seconds_ago"] == 900 and page["devices"][0]["stale"] is True
+    assert index.stats()["status_counts"] == {"HEALTHY": 0, "WARNING": 1, "CRITICAL": 3}
+
+def test_renders_are_cached_until_a_relevant_update():
+    index = FleetStatusIndex(max_age_s=60)
+    now = time.time()
+    index.update("D0", "A0", "Cattle", now, "CRITICAL")
+    index.update("D1", "A1", "Dog", now, "HEALTHY")
+    etag, body = index.render(statuses={"CRITICAL"})
+    assert index.render(statuses={"CRITICAL"}) == (etag, body) and index.hits == 1
+
+    index.update("D1", "A1", "Dog", now, "HEALTHY")  # cannot change the CRITICAL list
+    assert index.render(statuses={"CRITICAL"})[0] == etag
+    full_etag, _ = index.render()
+    index.update("D1", "A1", "Dog", now, "CRITICAL")
+    assert index.render()[0] != full_etag
+    etag2, body2 = index.render(statuses={"CRITICAL"})
+    assert etag2 != etag and len(json.loads(body2)["devices"]) == 2
+
+    index.max_age_s = 0  # seconds_ago moves with the clock: old entries are rebuilt
+    misses = index.misses
+    time.sleep(0.01)
+    rebuilt_etag, rebuilt_body = index.render(statuses={"CRITICAL"})
+    assert index.misses == misses + 1
+    assert json.loads(rebuilt_body)["generated_at"] != json.loads(body2)["generated_at"]
+    assert rebuilt_etag == etag2  # nothing changed: a slow poller still gets its 304
+
+def test_etag_changes_when_a_listed_device_goes_stale():
+    index = FleetStatusIndex(max_age_s=0)
+    index.update("D0", "A0", "Cattle", time.time() - 0.8, "HEALTHY")
+    etag, body = index.render(stale_after_s=1)
+    assert json.loads(body)["devices"][0]["stale"] is False
+    time.sleep(0.3)
+    stale_etag, stale_body = index.render(stale_after_s=1)
+    assert json.loads(stale_body)["devices"][0]["stale"] is True and stale_etag != etag
+
+def test_summary_endpoint_tracks_ingestion_and_answers_304():
+    now = time.time()
+    readings = [("F1", "Cattle", 38.5, 60), ("F2", "Cattle", 41.0, 60), ("F3", "Sheep", 39.5, 95),
+                ("F4", "Dragon", 38.0, 70)]
+    batch = [{"device_id": d, "animal_id": f"{d}_animal", "species": sp, "timestamp": now,
+              "temperature": t, "heart_rate": hr} for d, sp, t, hr in readings]
+    assert client.post("/iot/telemetry/batch", json=batch).status_code == 200
+
+    response = client.get("/iot/dashboard/summary")
+    assert response.status_code == 200
+    devices = {d["device_id"]: d for d in response.json()["devices"]}
+    assert {d: v["status"] for d, v in devices.items()} == {"F1": "HEALTHY", "F2": "CRITICAL", "F3": "WARNING",
+                                                            "F4": "HEALTHY"}
+    assert devices["F4"]["alerts"] == ["Species 'Dragon' not found. Using generic mammal ranges."]
+    assert devices["F2"]["temperature"] == 41.0 and devices["F2"]["seconds_ago"] == 0
+
+    etag = response.headers["etag"]
+    unchanged = client.get("/iot/dashboard/summary", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.headers["etag"] == etag
+
+    client.post("/iot/telemetry", json=dict(batch[0], temperature=36.0))  # F1 becomes critical
+    changed = client.get("/iot/dashboard/summary", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+    critical = client.get("/iot/dashboard/summary", params={"status": "CRITICAL,WARNING", "limit": 2}).json()
+    assert [d["device_id"] for d in critical["devices"]] == ["F1", "F2"] and critical["total"] == 3
+    assert client.get("/iot/dashboard/summary", params={"species": "Sheep"}).json()["total"] == 1
+    assert client.get("/iot/dashboard/summary", params={"status": "FINE"}).status_code == 400
+    assert client.get("/iot/dashboard/summary", params={"limit": 0}).status_code == 400
@@ -0,0 +1,142 @@
+"""
+Inference Executor Tests
+Bounded pool saturation, torch thread pinning, and that diagnosis load does
+not stall telemetry ingestion on the event loop.
+"""
+import pytest
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import inference_executor as ie
+from src.batching import QueueFullError
+from src.inference_executor import InferenceExecutor
+
+def test_rejects_when_threads_and_queue_are_full():
+    executor = InferenceExecutor(max_workers=1, max_queue_depth=1)
+    release = threading.Event()
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: 'done')
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: 'rejected')
+
+    stats = executor.stats()
+    assert (stats['running'], stats['queued'], stats['rejected']) == (1, 1, 1)
+    release.set()
+    assert queued.result(timeout=5) == 'done'
+    running.result(timeout=5)
+    assert executor.stats()['completed'] == 2
+    # Capacity is released once calls finish
+    assert executor.submit(lambda: 'again').result(timeout=5) == 'again'
+    executor.shutdown()
+
+def test_torch_threads_fit_the_cores(monkeypatch):
+    monkeypatch.setattr(ie, 'CPU_CORES', 16)
+    assert ie.torch_threads_for(4) == 4
+    assert ie.torch_threads_for(32) == 1
+    assert ie.torch_threads_for(4, cpu_cores=4) == 1
+    monkeypatch.setattr(ie, 'TORCH_THREADS', 3)
+    assert ie.torch_threads_for(4) == 3
+
+def test_run_does_not_block_the_event_loop():
+    executor = InferenceExecutor(max_workers=2, max_queue_depth=4)
+
+    async def scenario():
+        ticks = []
+        async def ticker():
+            for _ in range(10):
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                ticks.append(time.perf_counter() - start)
+        results = await asyncio.gather(executor.run(time.sleep, 0.2), executor.run(time.sleep, 0.2), ticker())
+        return ticks
+
+    ticks = asyncio.run(scenario())
+    assert max(ticks) < 0.1
+    executor.shutdown()
+
+# API integration (no trained models needed: model calls are replaced)
+import httpx
+from simple_api import app
+import simple_api
+from src import iot_gateway, inference_nn
+
+TELEMETRY = {"device_id": "TAG_EXEC", "animal_id": "Cow_9", "species": "Cattle", "timestamp": 0.0,
+             "temperature": 38.6, "heart_rate": 70, "activity_level": 50}
+
+def test_telemetry_stays_fast_during_diagnosis_spike(monkeypatch):
+    executor = InferenceExecutor(max_workers=2, max_queue_depth=32)
+    monkeypatch.setattr(iot_gateway, 'inference_executor', executor)
+
+    def slow_prediction(record):
+        time.sleep(0.3)
+        return {"success": True, "predicted_disease": "Healthy"}
+    monkeypatch.setattr(inference_nn, 'predict_disease_nn', slow_prediction)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.post("/iot/telemetry", json=TELEMETRY)).status_code == 200
+            diagnoses = [asyncio.create_task(client.post("/iot/diagnose/TAG_EXEC")) for _ in range(6)]
+            await asyncio.sleep(0.05)
+            latencies = []
+            for _ in range(5):
+                start = time.perf_counter()
+                assert (await client.post("/iot/telemetry", json=TELEMETRY)).status_code == 200
+                latencies.append(time.perf_counter() - start)
+            responses = await asyncio.gather(*diagnoses)
+            return latencies, responses
+
+    latencies, responses = asyncio.run(scenario())
+    assert all(r.status_code == 200 for r in responses)
+    # Six 0.3 s diagnoses on two threads take ~0.9 s; telemetry never waits for them
+    assert max(latencies) < 0.15
+    executor.shutdown()
+
+def test_saturated_executor_returns_503(monkeypatch):
+    from fastapi.testclient import TestClient
+    executor = InferenceExecutor(max_workers=1, max_queue_depth=0)
+    monkeypatch.setattr(iot_gateway, 'inference_executor', executor)
+    monkeypatch.setattr(simple_api, 'inference_executor', executor)
+    monkeypatch.setattr(simple_api, 'scheduler', None)
+    release = threading.Event()
+    executor.submit(release.wait)
+    try:
+        client = TestClient(app)
+        client.post("/iot/telemetry", json=TELEMETRY)
+        assert client.post("/iot/diagnose/TAG_EXEC").status_code == 503
+        response = client.post("/predict", json={"Animal": "Dog", "Age": 3.0, "Gender": "Male"})
+        assert response.status_code == 503
+        response = client.post("/predict/batch", json=[{"Animal": "Dog", "Age": 3.0, "Gender": "Male"}])
+        assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+        response = client.post("/predict/stream", content=b'{"Animal": "Cat", "Age": 2.0, "Gender": "Female"}\n')
+        assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        executor.shutdown()
+
+def test_bulk_routes_score_on_the_executor(monkeypatch):
+    from fastapi.testclient import TestClient
+    executor = InferenceExecutor(max_workers=1, max_queue_depth=4)
+    monkeypatch.setattr(simple_api, 'inference_executor', executor)
+    threads = []
+
+    def fake_chunk(input_dicts):
+        threads.append(threading.current_thread().name)
+        return [{"success": True, "animal": d["Animal"]} for d in input_dicts]
+    monkeypatch.setattr(simple_api, '_predict_chunk', fake_chunk)
+    try:
+        client = TestClient(app)
+        record = {"Animal": "Dog", "Age": 3.0, "Gender": "Male"}
+        assert client.post("/predict/batch", json=[record] * 3).json()["count"] == 3
+        lines = client.post("/predict/stream", content=json.dumps(record).encode() + b"\nnot json").text
+        assert [json.loads(line)["success"] for line in lines.splitlines()] == [True, False]
+        assert threads and all(name.startswith("vetnet-inference") for name in threads)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,165 @@
+"""
+Log Archive Tests
+Rotation of the monitoring logs by size and by day into gzip partitions,
+the manifest, and range reads that open only overlapping partitions.
+"""
+import sys
+import os
+import json
+import gzip
+import multiprocessing
+from datetime import datetime, timedelta
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import monitoring
+from src.log_archive import LogArchive, archive_dir_for
+from src.monitoring import BufferedLogWriter
+
+def _entry(day, i, pad=0):
+    return {"timestamp": f"2026-03-{day:02d}T12:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}", "animal": "Dog", "i": i, "pad": "x" * pad}
+
+def _all_rows(archive):
+    rows = []
+    for segment in archive.segments():
+        rows.extend(json.loads(line) for line in archive.read_segment(segment))
+    return rows
+
+def test_archive_dir_names(tmp_path):
+    assert archive_dir_for("logs/prediction_log.jsonl") == os.path.join("logs", "predictions")
+    assert archive_dir_for("logs/system_metrics.jsonl") == os.path.join("logs", "metrics")
+    assert archive_dir_for("logs/other.jsonl") == os.path.join("logs", "other_archive")
+
+def test_day_change_rotates_into_date_partitions(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    writer = BufferedLogWriter(path, flush_lines=1000, flush_interval_s=60, rotate_bytes=0)
+    for day in (1, 2, 3):
+        writer.write([_entry(day, i) for i in range(10)])
+    writer.flush()
+
+    archive = LogArchive(path)
+    segments = archive.segments()
+    assert [s["date"] for s in segments] == ["2026-03-01", "2026-03-02"]
+    assert [s["path"] for s in segments] == ["date=2026-03-01/part-00000.jsonl.gz",
+                                             "date=2026-03-02/part-00000.jsonl.gz"]
+    assert all(s["rows"] == 10 for s in segments)
+    assert segments[0]["start"] == "2026-03-01T12:00:00.000000"
+    assert segments[0]["end"] == "2026-03-01T12:00:09.000009"
+    assert writer.stats()['rotations'] == 2
+    # Today's entries stay in the active file
+    with open(path) as f:
+        assert {json.loads(line)["timestamp"][:10] for line in f} == {"2026-03-03"}
+
+def test_size_limit_rotates_into_numbered_parts(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    writer = BufferedLogWriter(path, flush_lines=10, flush_interval_s=60, rotate_bytes=20000)
+    writer.write([_entry(5, i, pad=900) for i in range(100)])
+    writer.flush()
+
+    archive = LogArchive(path)
+    segments = archive.segments()
+    assert len(segments) >= 4
+    assert all(s["path"].startswith("date=2026-03-05/part-") for s in segments)
+    assert all(s["raw_bytes"] <= 20000 and s["bytes"] < s["raw_bytes"] for s in segments)
+    with open(path) as f:
+        active = [json.loads(line) for line in f]
+    assert [e["i"] for e in _all_rows(archive) + active] == list(range(100))
+
+def test_manifest_is_written_atomically(tmp_path):
+    path = str(tmp_path / "system_metrics.jsonl")
+    writer = BufferedLogWriter(path, flush_lines=1000, flush_interval_s=60, rotate_bytes=0)
+    writer.write([_entry(1, 0), _entry(2, 1)])
+    writer.flush()
+    with open(os.path.join(str(tmp_path), "metrics", "_manifest.json")) as f:
+        manifest = json.load(f)
+    assert manifest["log"] == "system_metrics.jsonl"
+    assert manifest["segments"][0]["rows"] == 1
+    assert not [name for name in os.listdir(str(tmp_path / "metrics")) if ".tmp-" in name]
+    with gzip.open(tmp_path / "metrics" / manifest["segments"][0]["path"]) as f:
+        assert json.loads(f.readline())["i"] == 0
+
+def test_leftover_staged_files_are_archived(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    dead = multiprocessing.get_context('fork').Process(target=int)
+    dead.start()
+    dead.join()
+    staged = f"{path}.rotating-{dead.pid}-1"
+    with open(staged, "w") as f:
+        f.write(json.dumps(_entry(4, 7)) + "\n")
+    # Files staged by a live process are left to it
+    live = f"{path}.rotating-{os.getppid()}-1"
+    with open(live, "w") as f:
+        f.write(json.dumps(_entry(3, 6)) + "\n")
+    writer = BufferedLogWriter(path, flush_interval_s=0.01)
+    writer.write(_entry(9, 8))
+    writer.flush()
+    assert [s["date"] for s in LogArchive(path).segments()] == ["2026-03-04"]
+    assert not os.path.exists(staged)
+    assert os.path.exists(live)
+
+def test_range_reads_open_only_overlapping_partitions(tmp_path, monkeypatch):
+    path = str(tmp_path / "prediction_log.jsonl")
+    monkeypatch.setattr(monitoring, 'LOG_FILE', path)
+    today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    writer = monitoring._writer_for(path)
+    for back in range(20, -1, -1):
+        day = today - timedelta(days=back)
+        writer.write([{"timestamp": (day + timedelta(minutes=i)).isoformat(), "animal": "Cat",
+                       "latency_ms": float(back)} for i in range(3)])
+    writer.flush()
+
+    opened = []
+    read_segment = LogArchive.read_segment
+    def tracking_read(self, segment):
+        opened.append(segment["date"])
+        return read_segment(self, segment)
+    monkeypatch.setattr(LogArchive, 'read_segment', tracking_read)
+
+    monitor = monitoring.SystemMonitor()
+    df = monitor.get_predictions_between(days=7)
+    # Six archived days plus today's active file
+    assert len(opened) == 6
+    assert len(df) == 21
+    assert sorted(set(df['latency_ms'])) == [float(b) for b in range(7)]
+
+    opened.clear()
+    start = (today - timedelta(days=10)).date().isoformat()
+    end = (today - timedelta(days=8)).date().isoformat()
+    df = monitor.get_predictions_between(start, end)
+    assert len(opened) == 2
+    assert sorted(set(df['latency_ms'])) == [9.0, 10.0]
+
+def test_recent_reads_continue_into_the_archive(tmp_path, monkeypatch):
+    path = str(tmp_path / "prediction_log.jsonl")
+    monkeypatch.setattr(monitoring, 'LOG_FILE', path)
+    writer = monitoring._writer_for(path)
+    writer.write([_entry(1, i) for i in range(5)] + [_entry(2, i) for i in range(5, 8)])
+    writer.flush()
+    df = monitoring.SystemMonitor().get_recent_predictions(limit=6)
+    assert len(df) == 6
+    assert list(df['i']) == [2, 3, 4, 5, 6, 7]
+
+def _write_days_from_process(path, tag):
+    writer = BufferedLogWriter(path, flush_lines=16, flush_interval_s=0.01, rotate_bytes=50000)
+    for day in (1, 2, 3):
+        writer.write([dict(_entry(day, i, pad=200), tag=tag) for i in range(300)])
+        writer.flush()
+    writer.flush()
+
+def test_concurrent_writers_rotate_without_losing_lines(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=_write_days_from_process, args=(path, tag)) for tag in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(120)
+        assert p.exitcode == 0
+
+    with open(path) as f:
+        rows = _all_rows(LogArchive(path)) + [json.loads(line) for line in f]
+    assert len(rows) == 2700
+    for tag in range(3):
+        assert sorted((e["timestamp"][:10], e["i"]) for e in rows if e["tag"] == tag) == \
+            sorted((f"2026-03-{d:02d}", i) for d in (1, 2, 3) for i in range(300))
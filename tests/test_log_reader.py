@@ -0,0 +1,83 @@
+"""
+Log Reader Tests
+Reverse block-seeking tail reader and typed log DataFrames.
+"""
+import pytest
+import sys
+import os
+import json
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import monitoring
+from src.monitoring import tail_lines
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1 << 16])
+@pytest.mark.parametrize("limit", [0, 1, 3, 50, 500])
+def test_tail_matches_readlines(tmp_path, block_size, limit):
+    path = tmp_path / "log.jsonl"
+    lines = [json.dumps({"i": i, "pad": "x" * (i % 13)}) for i in range(200)]
+    path.write_text("\n".join(lines[:100]) + "\n\n" + "\n".join(lines[100:]) + "\n")
+    expected = [l.encode() for l in lines][-limit:] if limit else []
+    assert tail_lines(str(path), limit, block_size=block_size) == expected
+
+def test_tail_skips_partial_last_line(tmp_path):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(b'{"i": 1}\n{"i": 2}\n{"i": 3, "trunc')
+    assert tail_lines(str(path), 5) == [b'{"i": 1}', b'{"i": 2}']
+    assert tail_lines(str(tmp_path / "missing.jsonl"), 5) == []
+
+def test_tail_reads_only_the_end(tmp_path, monkeypatch):
+    path = tmp_path / "log.jsonl"
+    with open(path, "w") as f:
+        for i in range(100000):
+            f.write(json.dumps({"i": i}) + "\n")
+    reads = []
+    real_open = open
+    class CountingFile:
+        def __init__(self, f):
+            self.f = f
+        def read(self, n):
+            reads.append(n)
+            return self.f.read(n)
+        def __getattr__(self, name):
+            return getattr(self.f, name)
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            self.f.close()
+    monkeypatch.setattr(monitoring, 'open', lambda *a, **k: CountingFile(real_open(*a, **k)), raising=False)
+    lines = tail_lines(str(path), 10, block_size=4096)
+    assert [json.loads(l)["i"] for l in lines] == list(range(99990, 100000))
+    assert sum(reads) <= 4096
+
+def test_frames_have_fixed_columns_and_dtypes(tmp_path, monkeypatch):
+    pred_path, metrics_path = tmp_path / "p.jsonl", tmp_path / "m.jsonl"
+    monkeypatch.setattr(monitoring, 'LOG_FILE', str(pred_path))
+    monkeypatch.setattr(monitoring, 'METRICS_FILE', str(metrics_path))
+    monitor = monitoring.SystemMonitor()
+
+    empty = monitor.get_recent_predictions()
+    assert empty.empty
+    assert list(empty.columns) == list(monitoring.PREDICTION_DTYPES)
+
+    pred_path.write_text(
+        json.dumps({"timestamp": "2026-01-02T03:04:05.123456", "animal": "Dog", "category": "Viral",
+                    "disease": "Parvo", "category_confidence": 0.9, "disease_confidence": 0.8,
+                    "latency_ms": 12, "status": "success", "error_msg": None}) + "\n" +
+        json.dumps({"timestamp": "2026-01-02T03:04:06", "animal": "Cat", "category": None, "disease": None,
+                    "category_confidence": None, "disease_confidence": None, "latency_ms": 3.5,
+                    "status": "error", "error_msg": "bad input", "batch_size": 4}) + "\n")
+    df = monitor.get_recent_predictions(limit=10)
+    assert list(df['animal']) == ['Dog', 'Cat']
+    assert str(df['timestamp'].dtype).startswith('datetime64')
+    for col in ('category_confidence', 'disease_confidence', 'latency_ms', 'batch_size'):
+        assert df[col].dtype == 'float64'
+    assert df['batch_size'].isna().tolist() == [True, False]
+
+    metrics_path.write_text(json.dumps({"timestamp": "2026-01-02T03:04:05", "cpu_percent": 12.5,
+                                        "memory_percent": 40, "disk_usage": 70, "prediction_cache_hits": 3}) + "\n")
+    metrics = monitor.get_system_metrics()
+    assert metrics['memory_percent'].dtype == 'float64'
+    assert metrics['prediction_cache_hits'].tolist() == [3]
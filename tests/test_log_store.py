@@ -0,0 +1,119 @@
+"""
+Columnar Log Store Tests
+Parquet compaction of rotated prediction segments, dictionary encoding, and
+query pushdown of time-range and species filters.
+"""
+import pytest
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import log_store, monitoring
+from src.log_archive import LogArchive
+from src.monitoring import BufferedLogWriter
+
+requires_pyarrow = pytest.mark.skipif(not log_store.PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+SPECIES = ["Dog", "Cat", "Cattle"]
+
+def _write_days(path, days, per_day=50):
+    """`per_day` predictions on each of the last `days` days (today included)."""
+    today = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    writer = BufferedLogWriter(path, flush_lines=10000, flush_interval_s=60)
+    for back in range(days - 1, -1, -1):
+        day = today - timedelta(days=back)
+        writer.write([{"timestamp": (day + timedelta(minutes=i)).isoformat(), "animal": SPECIES[i % 3],
+                       "category": "Viral" if i % 2 else "Bacterial", "disease": f"D{i % 5}",
+                       "disease_confidence": 0.5, "latency_ms": float(back), "status": "success",
+                       "error_msg": None, "unknown_field": {"nested": True}}
+                      for i in range(per_day)])
+    writer.flush()
+    return writer, today
+
+@requires_pyarrow
+def test_rotated_segments_get_a_dictionary_encoded_parquet_copy(tmp_path):
+    import pyarrow.parquet as pq
+    path = str(tmp_path / "prediction_log.jsonl")
+    writer, _ = _write_days(path, 3)
+    segments = LogArchive(path).segments()
+    assert writer.stats()['compactions'] == 2
+    assert [s["columnar"] for s in segments] == [s["path"].replace(".jsonl.gz", ".parquet") for s in segments]
+
+    table = pq.read_table(os.path.join(str(tmp_path), "predictions", segments[0]["columnar"]))
+    assert table.num_rows == 50
+    for name in log_store.DICTIONARY_COLUMNS:
+        assert str(table.schema.field(name).type).startswith("dictionary")
+    assert "unknown_field" not in table.schema.names
+    assert table.column("timestamp").to_pylist() == sorted(table.column("timestamp").to_pylist())
+
+def test_metrics_log_is_not_compacted(tmp_path):
+    writer = BufferedLogWriter(str(tmp_path / "system_metrics.jsonl"))
+    assert not writer.columnar
+
+@requires_pyarrow
+def test_query_pushes_down_time_range_and_species(tmp_path, monkeypatch):
+    import pyarrow.parquet as pq
+    path = str(tmp_path / "prediction_log.jsonl")
+    _, today = _write_days(path, 10)
+
+    opened = []
+    read_table = pq.read_table
+    def tracking_read(source, *args, **kwargs):
+        opened.append(os.path.basename(os.path.dirname(source)))
+        return read_table(source, *args, **kwargs)
+    monkeypatch.setattr(log_store.pq, 'read_table', tracking_read)
+
+    start = today - timedelta(days=4)
+    df = log_store.query(path, start=start, end=today - timedelta(days=2), species=["Cat"],
+                         columns=["timestamp", "disease", "latency_ms"])
+    assert len(opened) == 2  # only the two partitions in range
+    assert list(df.columns) == ["timestamp", "disease", "latency_ms"]
+    assert sorted(set(df["latency_ms"])) == [3.0, 4.0]
+    assert len(df) == 2 * len(range(1, 50, 3))
+    assert str(df["disease"].dtype) == "category"
+    assert df["timestamp"].is_monotonic_increasing
+
+def test_query_predictions_matches_the_json_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "prediction_log.jsonl")
+    monkeypatch.setattr(monitoring, 'LOG_FILE', path)
+    _write_days(path, 9)
+    monitor = monitoring.SystemMonitor()
+
+    df = monitor.query_predictions(days=7, species=["Dog", "Cattle"])
+    expected = monitor.get_predictions_between(days=7)
+    expected = expected[expected["animal"].isin(["Dog", "Cattle"])]
+    assert len(df) == len(expected) > 0
+    assert list(df["animal"].astype(str)) == list(expected["animal"])
+    assert list(df["latency_ms"]) == list(expected["latency_ms"])
+
+    # Without pyarrow the same call is answered from the JSON segments
+    monkeypatch.setattr(log_store, 'PYARROW_AVAILABLE', False)
+    fallback = monitor.query_predictions(days=7, species=["Dog", "Cattle"], columns=["animal", "latency_ms"])
+    assert list(fallback["latency_ms"]) == list(df["latency_ms"])
+
+@requires_pyarrow
+def test_query_skips_corrupt_lines_and_partial_tail(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    ts = datetime.now().isoformat()
+    with open(path, "w") as f:
+        f.write(json.dumps({"timestamp": ts, "animal": "Dog", "latency_ms": 1.0}) + "\n")
+        f.write("{not json\n")
+        f.write(json.dumps({"timestamp": ts, "animal": "Cat", "latency_ms": 2.0}) + "\n")
+        f.write('{"timestamp": "' + ts)
+    df = log_store.query(path)
+    assert list(df["animal"].astype(str)) == ["Dog", "Cat"]
+
+@requires_pyarrow
+def test_compact_archive_backfills_missing_copies(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    writer = BufferedLogWriter(path, flush_lines=10000, flush_interval_s=60, columnar=False)
+    writer.write([{"timestamp": f"2026-01-0{d}T10:00:00", "animal": "Dog"} for d in (1, 2, 3)])
+    writer.flush()
+    assert not any(s.get("columnar") for s in LogArchive(path).segments())
+    assert log_store.compact_archive(path) == 2
+    assert log_store.compact_archive(path) == 0
+    assert len(log_store.query(path, start="2026-01-01", end="2026-01-03")) == 2
@@ -0,0 +1,78 @@
+"""
+Log Writer Tests
+Background buffered JSONL writer: batching, flush, drop counting and
+non-interleaved appends from several processes.
+"""
+import sys
+import os
+import json
+import multiprocessing
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import monitoring
+from src.monitoring import BufferedLogWriter
+
+def _read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_entries_are_written_in_batches_off_the_caller(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    writer = BufferedLogWriter(path, flush_lines=1000, flush_interval_s=60)
+    for i in range(100):
+        writer.write({"i": i})
+    writer.write([{"i": 100}, {"i": 101}])
+    # Nothing reached the disk yet: the thread waits for a size or time threshold
+    assert writer.stats()['written'] == 0
+
+    assert writer.flush()
+    assert [e["i"] for e in _read(path)] == list(range(102))
+    stats = writer.stats()
+    assert (stats['enqueued'], stats['written'], stats['batches'], stats['queued']) == (102, 102, 1, 0)
+
+def test_size_threshold_triggers_a_write(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    writer = BufferedLogWriter(path, flush_lines=10, flush_interval_s=60)
+    writer.write([{"i": i} for i in range(25)])
+    writer.flush()
+    assert writer.stats()['batches'] >= 2
+    assert len(_read(path)) == 25
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = BufferedLogWriter(str(tmp_path / "log.jsonl"), max_queue=3)
+    writer._ensure_thread = lambda: None  # nothing drains the queue
+    writer.write([{"i": i} for i in range(5)])
+    stats = writer.stats()
+    assert (stats['queued'], stats['enqueued'], stats['dropped']) == (3, 3, 2)
+
+def _write_from_process(path, tag, n):
+    writer = BufferedLogWriter(path, flush_lines=64, flush_interval_s=0.01)
+    for i in range(n):
+        writer.write({"tag": tag, "i": i, "pad": "x" * 300})
+    writer.flush()
+
+def test_concurrent_processes_do_not_interleave_lines(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=_write_from_process, args=(path, tag, 2000)) for tag in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    entries = _read(path)  # every line parses
+    assert len(entries) == 8000
+    for tag in range(4):
+        assert [e["i"] for e in entries if e["tag"] == tag] == list(range(2000))
+
+def test_monitor_reads_its_own_queued_entries(tmp_path, monkeypatch):
+    path = str(tmp_path / "predictions.jsonl")
+    monkeypatch.setattr(monitoring, 'LOG_FILE', path)
+    monitor = monitoring.SystemMonitor()
+    monitor.log_prediction({"Animal": "Cat"}, {"success": True, "predicted_disease": "Flu"}, 3.0)
+    df = monitor.get_recent_predictions(limit=10)
+    assert list(df['animal']) == ['Cat']
+    assert monitoring.flush_logs()
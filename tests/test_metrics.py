@@ -0,0 +1,148 @@
+"""
+Prometheus Metrics Tests
+The in-process registry, the text exposition format served at /metrics, and
+the request, stage, cache, IoT and process metrics it reports.
+"""
+import pytest
+import sys
+import os
+import re
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import metrics, monitoring
+from src.metrics import MetricsRegistry
+
+# One sample line of the text format: name{label="value",...} value
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*",?)*\})? '
+                    r'(-?[0-9.e+-]+|[+-]Inf|NaN)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+def parse_exposition(text):
+    """
+    Strict parse of the Prometheus text format (0.0.4). Returns
+    {family: {"type": ..., "samples": [(name, labels, value)]}} and fails on
+    anything a scraper would reject.
+    """
+    assert text.endswith("\n")
+    families, current = {}, None
+    for line in text.rstrip("\n").split("\n"):
+        if line.startswith("# HELP "):
+            name = line.split(" ")[2]
+            assert name not in families, f"duplicate family {name}"
+            current = families[name] = {"type": None, "samples": []}
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert current is families[name] and kind in ("counter", "gauge", "histogram", "summary", "untyped")
+            current["type"] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"bad sample line: {line!r}"
+            name = match.group(1)
+            labels = dict(LABEL.findall(match.group(2) or ""))
+            family = next(f for f in (name, re.sub(r'_(bucket|sum|count)$', '', name)) if f in families)
+            assert families[family] is current, f"{name} is outside its family block"
+            current["samples"].append((name, labels, float(match.group(3))))
+    return families
+
+def _series(family, name):
+    return {tuple(sorted(labels.items())): value for n, labels, value in family["samples"] if n == name}
+
+def test_counters_gauges_and_histograms_render_valid_exposition():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests", "Requests\nserved", ("route",))
+    requests.labels('/say/"hi"\\').inc()
+    requests.labels('/say/"hi"\\').inc(2)
+    registry.gauge("queue_depth", "Queued items").set(7)
+    latency = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=[0.1, 1])
+    latency.labels("forward").observe(0.05)
+    latency.labels("forward").observe(0.5, n=3)
+    latency.labels("forward").observe(5)
+    assert registry.counter("requests", "Requests\nserved", ("route",)) is requests  # re-registration
+    with pytest.raises(ValueError):
+        registry.gauge("requests", "Not a counter")
+    with pytest.raises(ValueError):
+        requests.labels("a", "b")
+
+    families = parse_exposition(registry.render())
+    counter = families["vetnet_requests_total"]
+    assert counter["type"] == "counter"
+    assert counter["samples"] == [("vetnet_requests_total", {"route": '/say/\\"hi\\"\\\\'}, 3.0)]
+    assert families["vetnet_queue_depth"]["samples"][0][2] == 7
+
+    histogram = families["vetnet_latency_seconds"]
+    assert histogram["type"] == "histogram"
+    buckets = [(labels["le"], value) for name, labels, value in histogram["samples"] if name.endswith("_bucket")]
+    assert buckets == [("0.1", 1), ("1", 4), ("+Inf", 5)]
+    assert _series(histogram, "vetnet_latency_seconds_count") == {(("stage", "forward"),): 5}
+    assert _series(histogram, "vetnet_latency_seconds_sum") == {(("stage", "forward"),): pytest.approx(6.55)}
+
+def test_collectors_run_at_scrape_time():
+    registry = MetricsRegistry()
+    calls = []
+    def collect():
+        calls.append(1)
+        return [metrics.gauge("vetnet_things", "Things", len(calls))]
+    registry.register_collector(collect)
+    registry.register_collector(collect)
+    assert not calls
+    assert parse_exposition(registry.render())["vetnet_things"]["samples"][0][2] == 1
+    assert parse_exposition(registry.render())["vetnet_things"]["samples"][0][2] == 2
+
+    def broken():
+        raise RuntimeError("no data")
+    registry.register_collector(broken)
+    assert "vetnet_things" in parse_exposition(registry.render())
+
+# API integration (no trained models needed)
+from fastapi.testclient import TestClient
+import simple_api
+from src import iot_gateway
+from src.fleet_status import FleetStatusIndex
+from src.telemetry_buffer import TelemetryRingBuffer
+
+def test_metrics_endpoint_scrape(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitoring, 'LOG_FILE', str(tmp_path / "prediction_log.jsonl"))
+    monkeypatch.setattr(iot_gateway, 'device_stream_buffer', TelemetryRingBuffer())
+    monkeypatch.setattr(iot_gateway, 'fleet_status', FleetStatusIndex())
+    monkeypatch.setattr(iot_gateway, 'telemetry_store', None)
+    client = TestClient(simple_api.app)
+
+    def scrape():
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == metrics.CONTENT_TYPE
+        return parse_exposition(response.text)
+
+    before = scrape()
+    readings_before = _series(before["vetnet_iot_readings_total"], "vetnet_iot_readings_total")
+    for device, temperature in (("M1", 38.5), ("M2", 43.0), ("M2", 43.5)):
+        client.post("/iot/telemetry", json={"device_id": device, "animal_id": device, "species": "Cattle",
+                                             "timestamp": 1.0, "temperature": temperature, "heart_rate": 60})
+    client.get("/iot/device/M2/history")
+    monitoring.record_stage_timings("Cattle", "Viral", {"vetnet_forward": 2.0}, n=4)
+    after = scrape()
+
+    requests = _series(after["vetnet_http_requests_total"], "vetnet_http_requests_total")
+    key = (("method", "POST"), ("route", "/iot/telemetry"), ("status", "200"))
+    assert requests[key] >= 3
+    # Route templates, not raw paths, label the requests
+    assert (("method", "GET"), ("route", "/iot/device/{device_id}/history"), ("status", "200")) in requests
+    assert not any("M2" in dict(k)["route"] for k in requests)
+
+    readings = _series(after["vetnet_iot_readings_total"], "vetnet_iot_readings_total")
+    assert readings[(("species", "Cattle"),)] - readings_before.get((("species", "Cattle"),), 0) == 3
+    alerts = _series(after["vetnet_iot_alerts_total"], "vetnet_iot_alerts_total")
+    assert alerts[(("severity", "CRITICAL"), ("species", "Cattle"))] >= 2
+    assert after["vetnet_iot_devices"]["samples"][0][2] == 2
+    assert after["vetnet_iot_buffered_readings"]["samples"][0][2] == 3
+    assert after["vetnet_iot_device_buffer_max"]["samples"][0][2] == 2
+    fleet = _series(after["vetnet_iot_fleet_devices"], "vetnet_iot_fleet_devices")
+    assert fleet[(("status", "HEALTHY"),)] == 1 and fleet[(("status", "CRITICAL"),)] == 1
+
+    stages = _series(after["vetnet_inference_stage_duration_seconds"], "vetnet_inference_stage_duration_seconds_count")
+    assert stages[(("stage", "vetnet_forward"),)] >= 4
+    assert (("source", "prediction_cache"),) in _series(after["vetnet_cache_hit_ratio"], "vetnet_cache_hit_ratio")
+    assert after["process_resident_memory_bytes"]["samples"][0][2] > 0
+    assert after["process_cpu_seconds_total"]["type"] == "counter"
@@ -0,0 +1,99 @@
+"""
+Model Bundle Tests
+Bundle file round trip, sklearn-equivalent preprocessing and schema checks.
+"""
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+from src import model_bundle
+from src.model_bundle import (BundleImputer, BundleLabelEncoder, BundleScaler, BundleSchemaError,
+                              read_bundle, write_bundle)
+
+def test_round_trip_is_aligned_and_read_only(tmp_path):
+    path = str(tmp_path / "test.bundle")
+    arrays = {
+        "a/weights": np.arange(12, dtype=np.float32).reshape(3, 4),
+        "a/index": np.array([1, -1, 7], dtype=np.int32),
+        "b/flags": np.array([1, 0, 1], dtype=np.uint8),
+        "b/empty": np.zeros((0,), dtype=np.float64),
+    }
+    manifest = write_bundle(path, {"feature_schema": {"cols": ["x", "y"]}}, arrays)
+
+    bundle = read_bundle(path)
+    assert bundle.version == manifest["bundle_version"]
+    assert bundle.manifest["feature_schema"] == {"cols": ["x", "y"]}
+    for name, expected in arrays.items():
+        np.testing.assert_array_equal(bundle.arrays[name], expected)
+        assert bundle.arrays[name].dtype == expected.dtype
+        assert not bundle.arrays[name].flags.writeable
+    assert all(spec["offset"] % model_bundle.ALIGNMENT == 0 for spec in manifest["arrays"].values())
+    assert set(bundle.group("a")) == {"weights", "index"}
+
+def test_version_tracks_content(tmp_path):
+    arrays = {"w": np.ones(4, dtype=np.float32)}
+    v1 = write_bundle(str(tmp_path / "1.bundle"), {"m": 1}, arrays)["bundle_version"]
+    v2 = write_bundle(str(tmp_path / "2.bundle"), {"m": 1}, arrays)["bundle_version"]
+    v3 = write_bundle(str(tmp_path / "3.bundle"), {"m": 1}, {"w": np.full(4, 2, dtype=np.float32)})["bundle_version"]
+    assert v1 == v2
+    assert v1 != v3
+
+def test_rejects_foreign_files_and_formats(tmp_path, monkeypatch):
+    junk = tmp_path / "junk.bundle"
+    junk.write_bytes(b"not a bundle at all")
+    with pytest.raises(BundleSchemaError):
+        read_bundle(str(junk))
+
+    monkeypatch.setattr(model_bundle, 'FORMAT_VERSION', 99)
+    path = str(tmp_path / "future.bundle")
+    write_bundle(path, {}, {"w": np.ones(1)})
+    monkeypatch.setattr(model_bundle, 'FORMAT_VERSION', 1)
+    with pytest.raises(BundleSchemaError):
+        read_bundle(path)
+
+def test_preprocessing_matches_sklearn():
+    """Bundle imputer/scaler reproduce SimpleImputer + StandardScaler bit for bit"""
+    rng = np.random.default_rng(0)
+    train = rng.normal(5, 3, size=(500, 25))
+    train[rng.random(train.shape) < 0.1] = np.nan
+    imputer = SimpleImputer(strategy='mean').fit(train)
+    scaler = StandardScaler().fit(imputer.transform(train))
+
+    X = rng.normal(5, 3, size=(200, 25)).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    expected = scaler.transform(imputer.transform(X))
+    actual = BundleScaler(scaler.mean_, scaler.scale_).transform(BundleImputer(imputer.statistics_).transform(X))
+
+    assert actual.dtype == expected.dtype
+    np.testing.assert_array_equal(actual, expected)
+
+def test_label_encoder():
+    encoder = BundleLabelEncoder(['Bacterial', 'Viral'])
+    assert list(encoder.inverse_transform(np.array([1, 0, 1]))) == ['Viral', 'Bacterial', 'Viral']
+
+def test_inference_refuses_mismatched_schema():
+    from src import inference_nn
+    numeric = inference_nn.BASE_NUMERIC_COLS + inference_nn.RATIO_COLS + inference_nn.SYMPTOM_LIST
+    manifest = {
+        "feature_schema": {"vetnet_numeric": list(numeric), "categories": ["Viral"], "stage2": {"Viral": []}},
+        "vetnet": {"numeric_dim": len(numeric)},
+    }
+    inference_nn._check_bundle_schema(manifest)
+
+    swapped = list(numeric)
+    swapped[0], swapped[1] = swapped[1], swapped[0]
+    manifest["feature_schema"]["vetnet_numeric"] = swapped
+    with pytest.raises(BundleSchemaError):
+        inference_nn._check_bundle_schema(manifest)
+
+    manifest["feature_schema"]["vetnet_numeric"] = list(numeric)
+    manifest["feature_schema"]["categories"] = ["Viral", "Fungal"]
+    with pytest.raises(BundleSchemaError):
+        inference_nn._check_bundle_schema(manifest)
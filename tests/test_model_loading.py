@@ -0,0 +1,62 @@
+"""
+Model Loading Tests
+Background artifact loading, per-artifact timings and the /ready endpoint.
+"""
+import pytest
+import sys
+import os
+import subprocess
+
+# Add root directory to sys.path so we can import modules
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+
+from src import inference_nn
+
+requires_models = pytest.mark.skipif(not inference_nn.wait_until_ready(), reason="Model artifacts not available")
+
+@requires_models
+def test_load_status_reports_each_artifact():
+    status = inference_nn.load_status()
+    assert status['ready'] == True
+    assert status['state'] == 'ready'
+
+    timings = status['load_timings_ms']
+    if os.path.exists(inference_nn.BUNDLE_PATH):
+        # One mapped file instead of the individual pickles
+        assert os.path.basename(inference_nn.BUNDLE_PATH) in timings
+    else:
+        for path in inference_nn.JOBLIB_ARTIFACTS.values():
+            assert os.path.basename(path) in timings
+    assert 'stage2_compile' in timings
+    assert timings['total'] >= max(v for k, v in timings.items() if k != 'total')
+
+def _api_client():
+    from fastapi.testclient import TestClient
+    from simple_api import app
+    return TestClient(app)
+
+@requires_models
+def test_ready_endpoint():
+    client = _api_client()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()['model_version'] == inference_nn.MODEL_VERSION
+
+def test_ready_is_503_while_loading(monkeypatch):
+    """/health stays up while /ready gates traffic"""
+    client = _api_client()
+    monkeypatch.setattr(inference_nn, 'MODELS_LOADED', False)
+    monkeypatch.setattr(inference_nn, 'LOAD_STATE', 'loading')
+
+    assert client.get("/health").status_code == 200
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()['state'] == 'loading'
+
+def test_compatibility_module_does_not_patch_on_import():
+    code = ("import src.model_compatibility\n"
+            "from sklearn.compose import ColumnTransformer\n"
+            "print(getattr(ColumnTransformer, '_transform_patched', False))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert out.stdout.strip().splitlines()[-1] == 'False'
@@ -0,0 +1,112 @@
+"""
+Prediction Cache Tests
+LRU/TTL behaviour, canonical keys, and invalidation on model reload.
+"""
+import pytest
+import sys
+import os
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import prediction_cache as pc
+from src.prediction_cache import PredictionCache, cache_key
+
+RECORD = {'Animal': 'Dog', 'Age': 5, 'Gender': 'Male', 'WBC': 12.5, 'Symptom_Fever': 1}
+
+def test_key_is_canonical():
+    """Key order and int/float spelling do not matter; values and version do"""
+    reordered = dict(reversed(list(RECORD.items())))
+    as_floats = dict(RECORD, Age=5.0, Symptom_Fever=1.0)
+    assert cache_key(RECORD, 'v1') == cache_key(reordered, 'v1') == cache_key(as_floats, 'v1')
+
+    assert cache_key(RECORD, 'v1') != cache_key(RECORD, 'v2')
+    assert cache_key(RECORD, 'v1') != cache_key(dict(RECORD, WBC=12.6), 'v1')
+    # A missing column and an explicit None are scored differently
+    assert cache_key(RECORD, 'v1') != cache_key(dict(RECORD, Breed=None), 'v1')
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_size=2, ttl_s=60)
+    cache.put('a', {'x': 1})
+    cache.put('b', {'x': 2})
+    assert cache.get('a') == {'x': 1}   # 'a' is now most recent
+    cache.put('c', {'x': 3})            # evicts 'b'
+
+    assert cache.get('b') is None
+    assert cache.get('c') == {'x': 3}
+    stats = cache.stats()
+    assert stats['size'] == 2
+    assert stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (2, 1)
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pc.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(max_size=10, ttl_s=5)
+    cache.put('a', {'x': 1})
+
+    now[0] += 4.9
+    assert cache.get('a') == {'x': 1}
+    now[0] += 0.2
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_values_are_copied():
+    cache = PredictionCache(max_size=10, ttl_s=60)
+    value = {'treatment': {'plan': 'rest'}}
+    cache.put('a', value)
+    value['treatment']['plan'] = 'changed'
+
+    hit = cache.get('a')
+    hit['treatment']['plan'] = 'mutated by caller'
+    assert cache.get('a') == {'treatment': {'plan': 'rest'}}
+
+def test_disabled_cache():
+    cache = PredictionCache(max_size=0, ttl_s=60)
+    cache.put('a', {'x': 1})
+    assert cache.get('a') is None
+    assert cache.stats()['enabled'] == False
+
+# Integration with the inference module
+from src import inference_nn
+requires_models = pytest.mark.skipif(not inference_nn.wait_until_ready(), reason="Model artifacts not available")
+
+@requires_models
+def test_repeated_prediction_hits_cache_and_reload_invalidates():
+    cache = inference_nn.prediction_cache
+    cache.clear()
+    record = {'Animal': 'Cat', 'Age': 3.0, 'Gender': 'Female', 'Breed': 'Mixed', 'WBC': 15.0,
+              'RBC': 7.0, 'Hemoglobin': 12.0, 'Platelets': 300, 'Glucose': 90, 'ALT': 40,
+              'AST': 40, 'Urea': 20, 'Creatinine': 1.0, 'Symptom_Vomiting': 1}
+
+    first = inference_nn.predict_disease_nn(dict(record))
+    hits = cache.hits
+    second = inference_nn.predict_disease_nn(dict(record))
+    assert second == first
+    assert cache.hits == hits + 1
+
+    inference_nn.reload_models()
+    assert cache.stats()['size'] == 0
+    misses = cache.misses
+    assert inference_nn.predict_disease_nn(dict(record)) == first
+    assert cache.misses == misses + 1
+
+def test_missing_age_and_default_age_do_not_share_an_entry(monkeypatch):
+    """A missing Age reaches VetNet as 0 but is filled with 5.0 for Stage 2: it must key apart from Age=5.0"""
+    monkeypatch.setattr(inference_nn, 'MODELS_LOADED', True)
+    monkeypatch.setattr(inference_nn, 'prediction_cache', PredictionCache(max_size=16, ttl_s=60))
+    scored = []
+
+    def fake_uncached(records, raw_rows=None):
+        scored.extend(row[0] for row in raw_rows)
+        return [{"success": True, "vetnet_age": row[0], "stage2_age": r['Age']} for r, row in zip(records, raw_rows)]
+    monkeypatch.setattr(inference_nn, '_predict_batch_uncached', fake_uncached)
+
+    missing = {'Animal': 'Dog', 'Gender': 'Male', 'WBC': 12.0}
+    explicit = dict(missing, Age=5.0)
+    first = inference_nn.predict_disease_nn_batch([dict(missing), dict(explicit)])
+    assert first == [{"success": True, "vetnet_age": 0.0, "stage2_age": 5.0},
+                     {"success": True, "vetnet_age": 5.0, "stage2_age": 5.0}]
+    # Either order: each is served its own cached result
+    assert inference_nn.predict_disease_nn_batch([dict(explicit), dict(missing)]) == first[::-1]
+    assert scored == [0.0, 5.0]
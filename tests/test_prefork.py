@@ -0,0 +1,74 @@
+"""
+Pre-fork Server Tests
+Socket setup, per-worker thread split and a real two-worker server.
+"""
+import pytest
+import sys
+import os
+import json
+import socket
+import subprocess
+import time
+import http.client
+
+# Add root directory to sys.path so we can import modules
+ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(ROOT)
+
+from src import inference_nn, prefork
+
+def test_bind_socket_is_tcp_and_inheritable():
+    sock = prefork.bind_socket("127.0.0.1", 0)
+    try:
+        assert sock.proto == socket.IPPROTO_TCP
+        assert sock.get_inheritable()
+    finally:
+        sock.close()
+
+def test_workers_split_cores(monkeypatch):
+    monkeypatch.setattr(prefork.os, 'cpu_count', lambda: 8)
+    assert prefork.worker_cpu_cores(1) == 8
+    assert prefork.worker_cpu_cores(4) == 2
+    assert prefork.worker_cpu_cores(16) == 1
+
+def _get(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+# The server process loads the same artifacts: skip unless they load here
+requires_models = pytest.mark.skipif(not inference_nn.wait_until_ready(), reason="Model artifacts not available")
+
+@requires_models
+def test_two_workers_serve_requests():
+    with prefork.bind_socket("127.0.0.1", 0) as probe:
+        port = probe.getsockname()[1]
+    env = dict(os.environ, VETNET_WORKERS='2', VETNET_API_PORT=str(port))
+    proc = subprocess.Popen([sys.executable, 'simple_api.py'], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        pids = set()
+        deadline = time.time() + 120
+        while len(pids) < 2 and time.time() < deadline:
+            assert proc.poll() is None, "server exited"
+            try:
+                status, body = _get(port, '/ready')
+                if status == 200:
+                    pids.add(body['pid'])
+            except OSError:
+                pass
+            time.sleep(0.5)
+        # Both answers come from forked workers, never from the loading parent
+        assert len(pids) == 2
+        assert proc.pid not in pids
+
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.request('POST', '/predict', body=json.dumps({'Animal': 'Dog', 'Age': 4.0, 'Gender': 'Male'}),
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())['success'] == True
+    finally:
+        proc.terminate()
+        assert proc.wait(timeout=30) is not None
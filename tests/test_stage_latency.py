@@ -0,0 +1,101 @@
+"""
+Stage Latency Tests
+Per-stage inference latency sketches by species and category, windowed
+quantile queries, and the timings recorded by the inference path.
+"""
+import pytest
+import sys
+import os
+import json
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src import monitoring
+from src.aggregates import STAGES, AggregatePublisher, StageLatency, load_published
+
+T0 = 1_700_000_000 // 3600 * 3600
+
+def test_quantiles_per_stage_species_and_category():
+    latency = StageLatency()
+    for i in range(1000):
+        latency.record("Dog", "Viral", {"feature_build": 1.0, "vetnet_forward": 1.0 + i / 100}, now=T0)
+    latency.record("Cat", "Bacterial", {"feature_build": 50.0}, n=10, now=T0)
+
+    overall = latency.snapshot()
+    assert list(overall["stages"]) == ["feature_build", "vetnet_forward"]  # pipeline order
+    assert overall["stages"]["feature_build"]["count"] == 1010
+    assert set(overall["stages"]["vetnet_forward"]) >= {"p50", "p95", "p99", "p99.9"}
+    p99 = overall["stages"]["vetnet_forward"]["p99"]
+    assert p99 == pytest.approx(10.9, rel=0.03)
+
+    cat = latency.snapshot(species="Cat")
+    assert cat["stages"] == {"feature_build": cat["stages"]["feature_build"]}
+    assert cat["stages"]["feature_build"]["p50"] == 50.0
+    assert latency.snapshot(category="Viral")["stages"]["feature_build"]["max"] == 1.0
+    assert overall["seen"] == {"species": ["Cat", "Dog"], "category": ["Bacterial", "Viral"]}
+    with pytest.raises(ValueError):
+        latency.snapshot(species="Dog", category="Viral")
+
+def test_windows_only_merge_recent_buckets():
+    latency = StageLatency(minute_buckets=30, hour_buckets=24)
+    latency.record("Dog", "Viral", {"stage2_trees": 100.0}, now=T0)
+    latency.record("Dog", "Viral", {"stage2_trees": 2.0}, n=5, now=T0 + 20 * 60)
+    last_5 = latency.snapshot(5, now=T0 + 21 * 60)
+    assert last_5["bucket_seconds"] == 60
+    assert last_5["stages"]["stage2_trees"]["count"] == 5
+    assert last_5["stages"]["stage2_trees"]["max"] == 2.0
+    # Beyond the minute retention the hour buckets answer
+    assert latency.snapshot(120, now=T0 + 21 * 60)["stages"]["stage2_trees"]["count"] == 6
+
+def test_published_stage_sketches_merge_across_processes(tmp_path):
+    directory = str(tmp_path)
+    mine, other = StageLatency(), StageLatency()
+    other.record("Horse", "Viral", {"bio_validation": 0.5}, n=3)
+    assert AggregatePublisher(other, directory).publish()
+    mine.record("Dog", "Viral", {"bio_validation": 0.1})
+
+    merged = load_published(directory, live=mine, factory=StageLatency)
+    assert merged.snapshot(category="Viral")["stages"]["bio_validation"]["count"] == 4
+    restored = StageLatency.from_dict(json.loads(json.dumps(merged.to_dict())))
+    assert restored.snapshot() == merged.snapshot()
+
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitoring, 'LOG_FILE', str(tmp_path / "prediction_log.jsonl"))
+    return monitoring.stage_latency  # fresh per test (see conftest.py)
+
+def test_logging_stage_is_recorded_per_row(tmp_path, monkeypatch):
+    latency = _isolate(tmp_path, monkeypatch)
+    monitor = monitoring.SystemMonitor()
+    monitor.log_prediction({"Animal": "Cat"}, {"success": True, "predicted_category": "Viral"}, 5.0)
+    monitor.log_predictions([{"Animal": "Dog"}] * 3, [{"success": True, "predicted_category": "Viral"}] * 3, 9.0)
+    assert latency.snapshot()["stages"]["logging"]["count"] == 4
+    assert latency.snapshot(species="Dog")["stages"]["logging"]["count"] == 3
+
+    from fastapi.testclient import TestClient
+    import simple_api
+    client = TestClient(simple_api.app)
+    body = client.get("/monitoring/stages", params={"window_minutes": 10, "category": "Viral"}).json()
+    assert body["stages"]["logging"]["count"] == 4
+    assert client.get("/monitoring/stages", params={"species": "Dog", "category": "Viral"}).status_code == 400
+    assert client.get("/monitoring/stages", params={"window_minutes": 0}).status_code == 400
+
+def test_inference_records_every_stage(tmp_path, monkeypatch):
+    from src import inference_nn
+    if not inference_nn.wait_until_ready():
+        pytest.skip("Model artifacts not available")
+    latency = _isolate(tmp_path, monkeypatch)
+    monkeypatch.setattr(inference_nn.prediction_cache, 'max_size', 0)  # score every record
+    labs = {'Breed': 'Mixed', 'WBC': 20.0, 'RBC': 6.0, 'Hemoglobin': 14.0, 'Platelets': 200, 'Glucose': 90,
+            'ALT': 40, 'AST': 40, 'Urea': 20, 'Creatinine': 1.0}
+    records = [dict(labs, Animal='Dog', Age=5.0, Gender='Male', Symptom_Fever=1),
+               dict(labs, Animal='Cat', Age=3.0, Gender='Female', Symptom_Vomiting=1),
+               dict(labs, Animal='Dog', Age=2.0, WBC='not-a-number')]
+    results = inference_nn.predict_disease_nn_batch(records)
+    scored = sum(1 for r in results if r.get('success'))
+    assert scored == 2
+
+    stages = latency.snapshot()["stages"]
+    assert set(stages) == set(STAGES) - {"logging"}
+    assert all(summary["count"] == scored for summary in stages.values())
+    assert latency.snapshot(species="Cat")["stages"]["vetnet_forward"]["count"] == 1
@@ -0,0 +1,104 @@
+"""
+Bulk Telemetry Ingestion Tests
+POST /iot/telemetry/batch must store and analyze readings exactly like the
+single-reading endpoint, report invalid readings by index, and answer with
+one alert result per device.
+"""
+import pytest
+import sys
+import os
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi.testclient import TestClient
+import simple_api
+from src import iot_gateway
+from src.admission import HIGH, admission_controller
+from src.fleet_status import FleetStatusIndex
+from src.telemetry_buffer import TelemetryRingBuffer
+
+client = TestClient(simple_api.app)
+
+def _reading(device, temperature=38.5, heart_rate=60, species="Cattle", activity=50.0, t=1.0):
+    return {"device_id": device, "animal_id": f"{device}_animal", "species": species, "timestamp": t,
+            "temperature": temperature, "heart_rate": heart_rate, "activity_level": activity}
+
+@pytest.fixture(autouse=True)
+def empty_buffers(monkeypatch):
+    monkeypatch.setattr(iot_gateway, 'device_stream_buffer', TelemetryRingBuffer())
+    monkeypatch.setattr(iot_gateway, 'fleet_status', FleetStatusIndex())
+    monkeypatch.setattr(iot_gateway, 'telemetry_store', None)
+
+READINGS = [
+    _reading("B1", 38.5, 60, t=1.0),
+    _reading("B1", 41.0, 60, t=2.0),                     # critical fever
+    _reading("B2", 39.5, 95, "Sheep", t=3.0),           # tachycardia warning
+    _reading("B3", 38.6, 60, activity=5.0, t=4.0),      # low activity
+    _reading("B4", 38.0, 30, "Dragon", t=5.0),           # unknown species
+    _reading("B1", 38.4, 61, t=6.0),
+]
+
+def test_batch_matches_single_readings():
+    singles = {}
+    for reading in READINGS:
+        singles.setdefault(reading["device_id"], []).append(client.post("/iot/telemetry", json=reading).json())
+    buffered = lambda: {d: iot_gateway.device_stream_buffer.readings(d) for d in iot_gateway.device_stream_buffer}
+    single_buffers = buffered()
+    iot_gateway.device_stream_buffer = TelemetryRingBuffer()
+
+    response = client.post("/iot/telemetry/batch", json=READINGS)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["accepted"] == len(READINGS) and body["rejected"] == []
+    assert buffered() == single_buffers
+
+    rank = iot_gateway.STATUS_RANK
+    devices = {d["device_id"]: d for d in body["devices"]}
+    assert list(devices) == ["B1", "B2", "B3", "B4"]  # first-seen order
+    for device_id, results in singles.items():
+        device = devices[device_id]
+        assert device["readings"] == len(results)
+        assert device["status"] == max((r["status"] for r in results), key=rank.get)
+        assert [{k: v for k, v in a.items() if k != "timestamp"} for a in device["alerts"]] == \
+            [a for r in results for a in r["alerts"]]
+        assert device["actions"] == sorted({a for r in results for a in r["actions"]})
+    assert devices["B1"]["status"] == "CRITICAL"
+    assert devices["B1"]["alerts"][0]["timestamp"] == 2.0
+    assert devices["B3"]["status"] == "WARNING"
+
+def test_invalid_readings_are_rejected_by_index():
+    readings = [_reading("C1"), {"device_id": "C2", "species": "Dog"}, _reading("C3", heart_rate="fast")]
+    body = client.post("/iot/telemetry/batch", json=readings).json()
+    assert body["accepted"] == 1
+    assert [r["index"] for r in body["rejected"]] == [1, 2]
+    assert list(iot_gateway.device_stream_buffer) == ["C1"]
+    assert client.post("/iot/telemetry/batch", json={"not": "a list"}).status_code == 422
+    assert client.post("/iot/telemetry/batch", content=b"[{", headers={"content-type": "application/json"}).status_code == 422
+
+def test_buffers_keep_the_latest_readings_and_size_is_capped(monkeypatch):
+    readings = [_reading("D1", t=float(i)) for i in range(120)]
+    assert client.post("/iot/telemetry/batch", json=readings).json()["accepted"] == 120
+    history = iot_gateway.device_stream_buffer.history("D1")["timestamp"]
+    assert len(history) == iot_gateway.device_stream_buffer.history_length == 50
+    assert history[-1] == 119.0 and history[0] == 70.0
+
+    monkeypatch.setattr(iot_gateway, 'MAX_TELEMETRY_BATCH', 10)
+    assert client.post("/iot/telemetry/batch", json=readings[:11]).status_code == 413
+    assert client.post("/iot/telemetry/batch", json=readings[:10] + [{}]).status_code == 413
+
+def test_oversized_body_is_rejected_before_parsing(monkeypatch):
+    def never(body):
+        raise AssertionError("oversized body was parsed")
+    monkeypatch.setattr(iot_gateway, '_validate_batch', never)
+    monkeypatch.setattr(iot_gateway, 'MAX_TELEMETRY_BATCH_BYTES', 1000)
+    readings = [_reading("E1", t=float(i)) for i in range(50)]
+    assert client.post("/iot/telemetry/batch", json=readings).status_code == 413
+    chunked = (b"[" + b"," * 10 + b"]" for _ in range(200))  # no Content-Length
+    assert client.post("/iot/telemetry/batch", content=chunked,
+                       headers={"content-type": "application/json"}).status_code == 413
+    assert len(iot_gateway.device_stream_buffer) == 0
+
+def test_batch_has_its_own_admission_class():
+    assert admission_controller.classify('/iot/telemetry/batch') == ('telemetry_batch', HIGH)
+    assert admission_controller.classify('/iot/telemetry') == ('telemetry', HIGH)
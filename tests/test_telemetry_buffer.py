@@ -0,0 +1,58 @@
+"""
+Telemetry Ring Buffer Tests
+Per-device reading history in fixed-size typed columns: wraparound order,
+zero-copy history views, batch appends and memory that stays fixed.
+"""
+import sys
+import os
+import numpy as np
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.telemetry_buffer import TelemetryRingBuffer
+
+def test_appends_wrap_around_and_keep_the_latest_readings():
+    buffer = TelemetryRingBuffer(history_length=4, initial_devices=2)
+    for t in range(10):
+        buffer.append("T1", "Cow_1", "Cattle", float(t), temperature=38.0 + t / 10, heart_rate=60 + t)
+    history = buffer.history("T1")
+    assert history["timestamp"].tolist() == [6.0, 7.0, 8.0, 9.0]
+    assert history["heart_rate"].tolist() == [66, 67, 68, 69]
+    assert history["temperature"].dtype == np.float32 and history["timestamp"].dtype == np.float64
+    # Views into the columns, not copies
+    assert all(np.shares_memory(view, buffer._columns[name]) for name, view in history.items())
+    assert buffer.latest("T1")["timestamp"] == 9.0
+    assert buffer.latest("T1")["temperature"] == 38.9
+    assert buffer.history("unknown") is None and buffer.latest("unknown") is None
+
+def test_extend_matches_repeated_appends():
+    appended = TelemetryRingBuffer(history_length=5, initial_devices=1)
+    extended = TelemetryRingBuffer(history_length=5, initial_devices=1)
+    appended.append("T1", "A", "Dog", 0.0, 38.0)
+    extended.append("T1", "A", "Dog", 0.0, 38.0)
+    start = 1.0
+    for size in (3, 1, 8):
+        times = [start + i for i in range(size)]
+        start += size
+        for t in times:
+            appended.append("T1", "A", "Dog", t, 38.0 + t, 70.0, None, 99.0)
+        extended.extend("T1", "A", "Dog", {"timestamp": times, "temperature": [38.0 + t for t in times],
+                                          "heart_rate": [70.0] * size, "battery_level": [99.0] * size})
+        assert extended.readings("T1") == appended.readings("T1")
+    assert appended.readings("T1")[-1]["activity_level"] is None  # NaN comes back as None
+
+def test_memory_is_fixed_per_device_and_rows_grow_by_doubling():
+    buffer = TelemetryRingBuffer(history_length=50, initial_devices=2)
+    buffer.add_device("R0", "A0", "Sheep")
+    assert "R0" in buffer and buffer.readings("R0") == [] and buffer.latest("R0") is None
+    for d in range(5):
+        buffer.append(f"R{d}", f"A{d}", "Sheep", 1.0, 39.0, 80.0)
+    size = buffer.nbytes()
+    assert buffer.stats()["rows_allocated"] == 8 and len(buffer) == 5
+    for t in range(200):
+        buffer.append("R3", "A3", "Sheep", float(t), 39.0, 80.0)
+    assert buffer.nbytes() == size
+    stats = buffer.stats()
+    assert stats["buffered_readings"] == 54 and stats["max_buffer"] == 50
+    assert list(buffer) == ["R0", "R1", "R2", "R3", "R4"]
@@ -0,0 +1,95 @@
+"""
+Telemetry Store Tests
+Readings persist in SQLite with 1-minute / 1-hour rollups computed as they
+are written, raw readings expire, and history queries pick the coarsest
+rollup that meets the requested resolution.
+"""
+import pytest
+import sys
+import os
+import time
+
+# Add root directory to sys.path so we can import modules
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi.testclient import TestClient
+import simple_api
+from src import iot_gateway
+from src.fleet_status import FleetStatusIndex
+from src.telemetry_buffer import TelemetryRingBuffer
+from src.telemetry_store import TelemetryStore, choose_resolution
+
+HOUR = 3600.0
+
+def _rows(device, start, n, step=10.0):
+    return [(device, start + i * step, f"{device}_animal", "Cattle", 38.0 + (i % 5) / 10, 60.0 + i % 7,
+             None if i % 2 else 50.0, 90.0) for i in range(n)]
+
+def test_rollups_match_the_raw_readings_across_batches(tmp_path):
+    store = TelemetryStore(str(tmp_path / "telemetry.db"))
+    start = time.time() // HOUR * HOUR - 2 * HOUR
+    rows = _rows("S1", start, 720)  # two hours, one reading every 10 s
+    store.append(rows[:500])
+    store.flush()
+    store.append(rows[500:])  # second batch adds to the same buckets
+    assert store.flush() and store.stats()["written"] == 720
+
+    raw = store.query("S1", start, start + 600, resolution=0)
+    assert raw["resolution"] == "raw" and len(raw["points"]) == 60
+    assert raw["points"][1]["activity_level"] is None and raw["points"][0]["species"] == "Cattle"
+
+    minutes = store.query("S1", start, start + HOUR, resolution=60)
+    assert minutes["resolution"] == "1m" and len(minutes["points"]) == 60
+    first = minutes["points"][0]
+    expected = [r[4] for r in rows[:6]]
+    assert first["readings"] == 6 and first["temperature_count"] == 6 and first["activity_level_count"] == 3
+    assert (first["temperature_min"], first["temperature_max"]) == (min(expected), max(expected))
+    assert first["temperature_mean"] == pytest.approx(sum(expected) / 6)
+
+    hours = store.query("S1", start, start + 2 * HOUR, resolution=HOUR)
+    assert hours["resolution"] == "1h" and [p["readings"] for p in hours["points"]] == [360, 360]
+    assert hours["points"][1]["heart_rate_mean"] == pytest.approx(sum(r[5] for r in rows[360:]) / 360)
+    store.close()
+
+def test_retention_prunes_raw_readings_but_keeps_rollups(tmp_path):
+    store = TelemetryStore(str(tmp_path / "telemetry.db"), raw_retention_s=HOUR, minute_retention_s=24 * HOUR)
+    now = time.time()
+    store.append(_rows("S2", now - 3 * HOUR, 30) + _rows("S2", now - 60, 5))
+    store.flush()
+    assert store.stats()["pruned"] == 30  # the writer prunes after its first batch
+    assert store.prune(now=now) == 0
+    # Raw data no longer covers the start, so the minute rollups answer
+    old = store.query("S2", now - 3 * HOUR, now - 2 * HOUR, resolution=0)
+    assert old["resolution"] == "1m" and sum(p["readings"] for p in old["points"]) == 30
+    assert len(store.query("S2", now - 120, now + 1, resolution=0)["points"]) == 5
+    store.close()
+
+def test_choose_resolution():
+    now = 1_000_000.0
+    assert choose_resolution(now - HOUR, now, now=now) == "raw"  # 3.6 s per point
+    assert choose_resolution(now - 24 * HOUR, now, now=now) == "1m"
+    assert choose_resolution(now - 60 * 24 * HOUR, now, now=now) == "1h"
+    assert choose_resolution(now - HOUR, now, resolution=300, now=now) == "1m"
+    assert choose_resolution(now - 72 * HOUR, now - 71 * HOUR, resolution=0, now=now, raw_retention_s=48 * HOUR) == "1m"
+    assert choose_resolution(now - 40 * 24 * HOUR, now, resolution=60, now=now,
+                             minute_retention_s=30 * 24 * HOUR) == "1h"
+
+def test_history_endpoint_reads_ranges_from_the_store(tmp_path, monkeypatch):
+    store = TelemetryStore(str(tmp_path / "telemetry.db"))
+    monkeypatch.setattr(iot_gateway, 'device_stream_buffer', TelemetryRingBuffer())
+    monkeypatch.setattr(iot_gateway, 'fleet_status', FleetStatusIndex())
+    monkeypatch.setattr(iot_gateway, 'telemetry_store', store)
+    client = TestClient(simple_api.app)
+    now = time.time()
+    batch = [{"device_id": "H1", "animal_id": "H1_animal", "species": "Dog", "timestamp": now - 600 + i * 5,
+              "temperature": 38.5, "heart_rate": 80 + i % 3} for i in range(120)]
+    assert client.post("/iot/telemetry/batch", json=batch).status_code == 200
+    store.flush()
+
+    assert len(client.get("/iot/device/H1/history").json()["history"]) == 50  # memory, as before
+    body = client.get("/iot/device/H1/history", params={"start": now - 600, "end": now}).json()
+    assert body["resolution"] == "raw" and len(body["history"]) == 120
+    body = client.get("/iot/device/H1/history", params={"start": now - 600, "end": now, "resolution": 60}).json()
+    assert body["resolution"] == "1m" and sum(p["readings"] for p in body["history"]) == 120
+    assert client.get("/iot/device/H1/history", params={"start": now, "end": now - 1}).status_code == 400
+    store.close()